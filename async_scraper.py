@@ -0,0 +1,105 @@
+"""
+async_scraper.py - Asyncio façade for the Reddit Selenium scraper
+Keeps many profiles in flight on one event loop. Blocking WebDriver work runs on a small
+executor sized to the DriverPool, so extra profiles wait as coroutines, not as threads.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterable, Optional
+
+from scrape import RedditSeleniumScraper
+from driver_pool import DriverPool
+from records import UserProfile
+
+
+class AsyncRedditScraper:
+    """Async entry points backed by a pool of warm browser sessions"""
+
+    def __init__(self, pool_size: int = 2, headless: bool = True,
+                 scraper_options: Optional[Dict[str, Any]] = None,
+                 pool: Optional[DriverPool] = None, **pool_options):
+        self.pool_size = pool_size
+        self.headless = headless
+        self.scraper_options = scraper_options or {}
+        self.pool_options = pool_options
+        self.pool = pool
+        self._owns_pool = pool is None
+        self._executor = None
+        self._slots = None
+
+    async def start(self) -> "AsyncRedditScraper":
+        """Start the executor and pre-warm the driver pool without blocking the loop"""
+        sessions_per_profile = 2 if self.scraper_options.get('parallel_sections') else 1
+        self._executor = ThreadPoolExecutor(max_workers=self.pool_size,
+                                            thread_name_prefix="reddit-scraper")
+        self._slots = asyncio.Semaphore(max(1, self.pool_size // sessions_per_profile))
+        if self.pool is None:
+            factory = RedditSeleniumScraper(headless=self.headless,
+                                            lean=self.scraper_options.get('lean', False)).create_driver
+            self.pool = DriverPool(factory, size=self.pool_size, **self.pool_options)
+            await asyncio.get_running_loop().run_in_executor(self._executor, self.pool.start)
+        return self
+
+    async def scrape_user_profile_async(self, profile_url: str,
+                                        parallel_sections: Optional[bool] = None) -> UserProfile:
+        """Scrape one profile; safe to call concurrently for many profiles"""
+        if self._executor is None:
+            await self.start()
+        async with self._slots:
+            scraper = RedditSeleniumScraper(headless=self.headless, pool=self.pool, **self.scraper_options)
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, scraper.scrape_user_profile, profile_url, parallel_sections
+            )
+
+    async def scrape_many(self, profile_urls: Iterable[str]) -> AsyncIterator[Dict[str, Any]]:
+        """Scrape every URL concurrently and yield result dicts in completion order.
+
+        Each dict has 'url' and 'status'; 'data' holds the UserProfile when status is 'ok',
+        'error' the message otherwise.
+        """
+        async def run(url):
+            try:
+                return {'url': url, 'status': 'ok', 'data': await self.scrape_user_profile_async(url)}
+            except Exception as e:
+                return {'url': url, 'status': 'error', 'error': str(e)}
+
+        tasks = [asyncio.ensure_future(run(url)) for url in profile_urls]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def close(self):
+        if self.pool is not None and self._owns_pool:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self.pool.close)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+async def main():
+    """Example usage of the async scraper"""
+    profile_urls = [
+        "https://www.reddit.com/user/Seshat_the_Scribe/"
+    ]
+
+    async with AsyncRedditScraper(pool_size=2) as scraper:
+        async for result in scraper.scrape_many(profile_urls):
+            if result['status'] == 'ok':
+                data = result['data']
+                print(f"✓ {data.username}: {data.total_posts} posts, {data.total_comments} comments")
+            else:
+                print(f"✗ {result['url']}: {result['error']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
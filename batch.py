@@ -0,0 +1,276 @@
+"""
+batch.py - Concurrent multi-profile scraping with a pool of WebDriver sessions
+Each worker thread owns its own RedditSeleniumScraper, borrows warm Chrome sessions from a
+shared DriverPool, pulls profile URLs from a bounded queue and streams results back as soon
+as each profile finishes.
+"""
+
+import os
+import sys
+import time
+import queue
+import argparse
+import threading
+import traceback
+from datetime import timedelta
+from typing import Iterable, Iterator, Dict, Any, Optional
+from urllib.parse import urlparse
+
+from scrape import RedditSeleniumScraper
+from driver_pool import DriverPool
+from disk_cache import ScrapeCache
+from streaming import ScrapeDepth
+from jsonl_sink import JsonlSink
+from run_journal import RunJournal, SCRAPE_STAGES, open_journal
+from instrumentation import Metrics
+from selector_registry import SelectorRegistry
+
+_DONE = object()
+
+
+class DomainRateLimiter:
+    """Thread-safe politeness limit: at most one request per domain every min_interval seconds"""
+
+    def __init__(self, min_interval: float = 2.0):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_slot: Dict[str, float] = {}
+
+    def wait(self, url: str):
+        """Block until the caller may send a request to url's domain"""
+        domain = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(domain, 0.0))
+            self._next_slot[domain] = slot + self.min_interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def read_profile_urls(path: str) -> Iterator[str]:
+    """Yield profile URLs from a file, one per line; blank lines and # comments are skipped"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            url = line.strip()
+            if url and not url.startswith('#'):
+                yield url
+
+
+class BatchRunner:
+    """Scrape many profiles concurrently with pooled browser sessions"""
+
+    def __init__(self, workers: int = 2, headless: bool = True, queue_size: Optional[int] = None,
+                 min_interval: float = 2.0, output_dir: Optional[str] = None,
+                 scraper_options: Optional[Dict[str, Any]] = None,
+                 max_session_uses: int = 50, max_session_memory_mb: Optional[float] = None,
+                 incremental: bool = False, journal: Optional[RunJournal] = None,
+                 metrics: Optional[Metrics] = None,
+                 selector_registry: Optional[SelectorRegistry] = None):
+        self.workers = workers
+        self.headless = headless
+        self.queue_size = queue_size or workers * 2
+        self.rate_limiter = DomainRateLimiter(min_interval)
+        self.output_dir = output_dir
+        self.scraper_options = scraper_options or {}
+        self.max_session_uses = max_session_uses
+        self.max_session_memory_mb = max_session_memory_mb
+        self.incremental = incremental
+        # Optional RunJournal shared by all workers; completed sections are not scraped again
+        self.journal = journal
+        # Batch-wide metrics; every worker's per-profile metrics roll up into it
+        self.metrics = metrics or Metrics()
+        # Shared by all workers, so every profile scraped teaches the others the best selectors
+        self.selector_registry = selector_registry or SelectorRegistry()
+        self.pool = None
+
+    def _new_scraper(self) -> RedditSeleniumScraper:
+        return RedditSeleniumScraper(headless=self.headless, rate_limiter=self.rate_limiter,
+                                     pool=self.pool, journal=self.journal, metrics=self.metrics,
+                                     selector_registry=self.selector_registry, **self.scraper_options)
+
+    def _start_pool(self) -> DriverPool:
+        # Parallel sections need a second session per worker
+        sessions_per_worker = 2 if self.scraper_options.get('parallel_sections') else 1
+        factory = RedditSeleniumScraper(headless=self.headless,
+                                        lean=self.scraper_options.get('lean', False)).create_driver
+        return DriverPool(factory, size=self.workers * sessions_per_worker,
+                          max_uses=self.max_session_uses,
+                          max_memory_mb=self.max_session_memory_mb).start()
+
+    def _feed(self, profile_urls: Iterable[str], tasks: queue.Queue):
+        try:
+            for url in profile_urls:
+                tasks.put(url)
+        finally:
+            for _ in range(self.workers):
+                tasks.put(_DONE)
+
+    def _work(self, worker_id: int, tasks: queue.Queue, results: queue.Queue):
+        scraper = self._new_scraper()
+        try:
+            while True:
+                url = tasks.get()
+                if url is _DONE:
+                    break
+
+                started = time.monotonic()
+                try:
+                    username = scraper.extract_username_from_url(url)
+                    filename = os.path.join(self.output_dir or '.', f"{username}_scraped_data.json")
+                    # Incremental runs refresh the previous output file in place
+                    data = scraper.scrape_user_profile(url, incremental=self.incremental, snapshot=filename)
+                    if self.output_dir:
+                        scraper.save_to_file(data, filename)
+                    results.put({'url': url, 'status': 'ok', 'worker': worker_id,
+                                 'elapsed': time.monotonic() - started, 'data': data,
+                                 'metrics': scraper.profile_metrics.summary()})
+                except Exception as e:
+                    print(f"[worker {worker_id}] Error scraping {url}: {e}")
+                    traceback.print_exc()
+                    if self.journal:
+                        for stage in SCRAPE_STAGES:
+                            if not self.journal.is_done(url, stage):
+                                self.journal.failed(url, stage, str(e))
+                    results.put({'url': url, 'status': 'error', 'worker': worker_id,
+                                 'elapsed': time.monotonic() - started, 'error': str(e)})
+                    # Isolate the failure: throw away this worker's browser and start fresh
+                    scraper.close()
+                    scraper = self._new_scraper()
+        finally:
+            scraper.close()
+            results.put(_DONE)
+
+    def run(self, profile_urls: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """Scrape every URL and yield one result dict per profile as it finishes"""
+        if self.output_dir:
+            os.makedirs(self.output_dir, exist_ok=True)
+
+        tasks = queue.Queue(maxsize=self.queue_size)
+        # Bounded too, so a slow consumer of run() throttles the scraping workers
+        results = queue.Queue(maxsize=self.queue_size)
+        self.pool = self._start_pool()
+
+        threading.Thread(target=self._feed, args=(profile_urls, tasks), daemon=True).start()
+        for worker_id in range(self.workers):
+            threading.Thread(target=self._work, args=(worker_id, tasks, results), daemon=True).start()
+
+        try:
+            finished_workers = 0
+            while finished_workers < self.workers:
+                result = results.get()
+                if result is _DONE:
+                    finished_workers += 1
+                    continue
+                yield result
+        finally:
+            self.pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape many Reddit profiles concurrently")
+    parser.add_argument("url_file", help="File with one profile URL per line")
+    parser.add_argument("--workers", type=int, default=2, help="Number of browser sessions")
+    parser.add_argument("--min-interval", type=float, default=2.0,
+                        help="Minimum seconds between requests to the same domain")
+    parser.add_argument("--output-dir", default="scraped", help="Directory for per-user JSON files")
+    parser.add_argument("--extraction-mode", default="element", choices=["element", "script", "html"])
+    parser.add_argument("--parallel-sections", action="store_true",
+                        help="Scrape posts and comments of each profile in two sessions at once")
+    parser.add_argument("--max-session-uses", type=int, default=50,
+                        help="Recycle a browser session after this many profiles")
+    parser.add_argument("--max-session-memory-mb", type=float, default=None,
+                        help="Recycle a browser session once it uses more memory than this")
+    parser.add_argument("--max-browser-memory-mb", type=float, default=None,
+                        help="Recycle a session mid-scroll past this much memory, resuming after the last "
+                             "item collected (needs --extraction-mode script)")
+    parser.add_argument("--cache-dir", default=None, help="Serve recently scraped profiles from this cache")
+    parser.add_argument("--cache-ttl", type=float, default=6 * 3600, help="Cache freshness in seconds")
+    parser.add_argument("--refresh", default="stale", choices=["stale", "always", "never"],
+                        help="When to re-scrape cached profiles (sections a resumed run already "
+                             "finished are never re-scraped)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only fetch items newer than each user's previous output file")
+    parser.add_argument("--max-items", default="7",
+                        help="Posts/comments to collect per user, or 'all'")
+    parser.add_argument("--days", type=float, default=None,
+                        help="Only collect posts/comments from the last N days")
+    parser.add_argument("--jsonl", default=None,
+                        help="Append every post/comment to this JSONL file as it is extracted")
+    parser.add_argument("--flush", default="record", choices=["record", "profile", "none"],
+                        help="When to flush the JSONL stream")
+    parser.add_argument("--fsync", action="store_true", help="fsync the JSONL stream on every flush")
+    parser.add_argument("--journal", default=None,
+                        help="SQLite run journal recording what each run finished")
+    parser.add_argument("--resume", nargs="?", const=True, default=None, metavar="RUN_ID",
+                        help="Continue the latest run in --journal (or RUN_ID), skipping finished sections")
+    parser.add_argument("--selector-stats", default=None,
+                        help="JSON file of selector hit rates, loaded at start and updated at the end")
+    parser.add_argument("--metrics-out", default=None,
+                        help="Write batch metrics here (Prometheus text for .prom, JSON otherwise)")
+    parser.add_argument("--lean", action="store_true",
+                        help="Eager page loads without images, media, fonts or analytics")
+    parser.add_argument("--show-browser", action="store_true", help="Run Chrome with a visible window")
+    args = parser.parse_args()
+
+    cache = ScrapeCache(args.cache_dir, ttl=args.cache_ttl) if args.cache_dir else None
+    max_items = None if args.max_items == "all" else int(args.max_items)
+    window = timedelta(days=args.days) if args.days is not None else None
+    # Deep collection is bounded by item count / time window and end of history, not scrolls
+    deep = max_items is None or max_items > 7 or window is not None
+    depth = ScrapeDepth(max_items=max_items, window=window, max_scrolls=None if deep else 8)
+    sink = JsonlSink(args.jsonl, flush=args.flush, fsync=args.fsync) if args.jsonl else None
+    if args.resume and not args.journal:
+        parser.error("--resume needs --journal")
+    journal = open_journal(args.journal, args.resume) if args.journal else None
+
+    runner = BatchRunner(
+        workers=args.workers,
+        headless=not args.show_browser,
+        min_interval=args.min_interval,
+        output_dir=args.output_dir,
+        scraper_options={'extraction_mode': args.extraction_mode,
+                         'parallel_sections': args.parallel_sections,
+                         'cache': cache, 'refresh': args.refresh, 'depth': depth,
+                         'sink': sink, 'lean': args.lean,
+                         'max_browser_memory_mb': args.max_browser_memory_mb},
+        max_session_uses=args.max_session_uses,
+        max_session_memory_mb=args.max_session_memory_mb,
+        incremental=args.incremental,
+        journal=journal,
+        selector_registry=SelectorRegistry(args.selector_stats),
+    )
+
+    started = time.monotonic()
+    ok = failed = 0
+    try:
+        for result in runner.run(read_profile_urls(args.url_file)):
+            if result['status'] == 'ok':
+                ok += 1
+                data = result['data']
+                print(f"✓ {data.username}: {data.total_posts} posts, {data.total_comments} comments "
+                      f"in {result['elapsed']:.1f}s (worker {result['worker']})")
+            else:
+                failed += 1
+                print(f"✗ {result['url']}: {result['error']}")
+    finally:
+        if sink:
+            sink.close()
+        if journal:
+            print(f"Run journal {args.journal}, run {journal.run_id}: {journal.summary()}")
+            journal.close()
+        print(runner.metrics.format_summary("BATCH TIMING"))
+        if args.metrics_out:
+            runner.metrics.write(args.metrics_out)
+        print(f"Selector lookups per field: {runner.selector_registry.lookups_per_field()}")
+        demoted = runner.selector_registry.demoted()
+        if demoted:
+            print(f"Selectors moved to the back of their chains: {demoted}")
+        runner.selector_registry.save()
+
+    print(f"\n📊 BATCH SUMMARY: {ok} succeeded, {failed} failed in {time.monotonic() - started:.1f}s")
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
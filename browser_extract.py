@@ -0,0 +1,84 @@
+"""
+browser_extract.py - Single-pass in-browser extraction for posts and comments
+Runs the extraction specs from extraction.py inside the page with one execute_script
+call, instead of one WebDriver round trip per selector attempt.
+The returned dicts match extract_post_data / extract_comment_data field for field.
+"""
+
+from typing import List, Dict, Any, Optional
+
+from extraction import COMMENT_SPEC, POST_SPEC, SPEC_JS, ExtractionSpec
+
+# Container lookup and streaming bookkeeping around the shared spec interpreter
+_PAGE_JS = SPEC_JS + r"""
+var opts = arguments[2] || {};
+var SEEN = 'data-scraper-seen';
+function containers(chain) {
+    for (var i = 0; i < chain.length; i++) {
+        var els = findAll(document, chain[i]);
+        if (!els.length) continue;
+        // Streaming: keep using this selector but only return nodes not extracted before
+        if (opts.freshOnly) els = els.filter(function (el) { return !el.hasAttribute(SEEN); });
+        return els;
+    }
+    return [];
+}
+function markExtracted(els) {
+    if (!opts.freshOnly || !els.length) return;
+    // Drop the batch extracted last time; keep this one so the scroll position holds
+    if (opts.prune) findAll(document, '[' + SEEN + ']').forEach(function (el) { el.remove(); });
+    els.forEach(function (el) { el.setAttribute(SEEN, '1'); });
+}
+function fullname(el) {
+    // Listing fullname (t3_ post, t1_ comment) carried on the container element, for ?after= cursors
+    var names = ['thingid', 'id', 'comment-id', 'post-id', 'name'];
+    for (var i = 0; i < names.length; i++) {
+        var value = el.getAttribute(names[i]);
+        if (value && /^t[13]_[a-z0-9]+$/.test(value)) return value;
+    }
+    return null;
+}
+
+var spec = arguments[0];
+var limit = arguments[1];
+var els = containers(spec.containers);
+if (limit !== null) els = els.slice(0, limit);
+var items = els.map(function (el, index) {
+    var item = extractItem(el, spec.item, index, null);
+    if (item && opts.fullnames) item.fullname = fullname(el);
+    return item;
+});
+markExtracted(els);
+return items;
+"""
+
+
+def _extract_in_browser(driver, spec: ExtractionSpec, limit: Optional[int], fresh_only: bool,
+                        prune: bool, fullnames: bool) -> List[Optional[Dict[str, Any]]]:
+    payload = {'containers': spec.container_selectors(), 'item': spec.to_json()}
+    options = {'freshOnly': fresh_only, 'prune': prune, 'fullnames': fullnames}
+    return driver.execute_script(_PAGE_JS, payload, limit, options) or []
+
+
+def extract_posts_in_browser(driver, limit: Optional[int] = 7, fresh_only: bool = False,
+                             prune: bool = False, fullnames: bool = False) -> List[Optional[Dict[str, Any]]]:
+    """Extract every post on the current page with a single execute_script call.
+
+    Returns one entry per post element, in page order; entries that have no title are None.
+    With fresh_only, posts returned by an earlier fresh_only call are skipped, and with
+    prune those earlier posts are also removed from the DOM. With fullnames, each entry also
+    carries the post's listing fullname (t3_...) under 'fullname', or None if the page has none.
+    """
+    return _extract_in_browser(driver, POST_SPEC, limit, fresh_only, prune, fullnames)
+
+
+def extract_comments_in_browser(driver, limit: Optional[int] = 7, fresh_only: bool = False,
+                                prune: bool = False, fullnames: bool = False) -> List[Optional[Dict[str, Any]]]:
+    """Extract every comment on the current page with a single execute_script call.
+
+    Returns one entry per comment element, in page order; entries that have no body are None.
+    With fresh_only, comments returned by an earlier fresh_only call are skipped, and with
+    prune those earlier comments are also removed from the DOM. With fullnames, each entry also
+    carries the comment's listing fullname (t1_...) under 'fullname', or None if the page has none.
+    """
+    return _extract_in_browser(driver, COMMENT_SPEC, limit, fresh_only, prune, fullnames)
@@ -7,82 +7,88 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
-import time
 import re
-from typing import List, Dict, Any
+from typing import List, Callable, Set
+from waits import PageWaiter
+from html_extract import parse_comments
+from incremental import comment_key
+from records import Comment
+from instrumentation import Metrics
+from selector_registry import SelectorRegistry
+from streaming import AgeGate, ScrapeDepth, stream_items, depth_stop_condition
+from extraction import COMMENT_SPEC, SpecExtractor, dismiss_popups, wait_and_scroll
 
 class CommentScraper:
     """Enhanced comment scraping functionality for Reddit profiles"""
     
-    def __init__(self, driver, wait):
+    def __init__(self, driver, wait, waiter: PageWaiter = None, scroll_timeout: float = 3.0,
+                 extraction_mode: str = "element", rate_limiter=None, depth: ScrapeDepth = None,
+                 item_sink=None, metrics: Metrics = None, selector_registry: SelectorRegistry = None,
+                 max_memory_mb: float = None, recycle: Callable = None):
         self.driver = driver
+        self.extraction_mode = extraction_mode
+        self.rate_limiter = rate_limiter
+        self.depth = depth or ScrapeDepth()
+        # Optional jsonl_sink.ProfileWriter that receives each comment as it is extracted
+        self.item_sink = item_sink
+        # Span timers and selector-miss counters (normally the owning scraper's profile metrics)
+        self.metrics = metrics or Metrics()
+        # Per-selector hit rates; selectors that stopped matching are tried last
+        self.selector_registry = selector_registry or SelectorRegistry()
+        self.extractor = SpecExtractor(self.selector_registry, self.metrics)
+        # Optional memory bound for streaming: recycle(driver, url) returns a fresh session showing url
+        self.max_memory_mb = max_memory_mb
+        self.recycle = recycle
         self.wait = wait
+        self.waiter = waiter or PageWaiter(driver)
+        self.scroll_timeout = scroll_timeout
     
     def dismiss_popups(self):
         """Try to dismiss common Reddit popups"""
-        popup_selectors = [
-            "button[aria-label='Close']",
-            "button[data-testid='close-button']",
-            "button:contains('Continue')",
-            "button:contains('Accept')",
-            ".icon-close",
-            "[data-testid='cookie-banner'] button"
-        ]
-        
-        for selector in popup_selectors:
-            try:
-                popup = self.driver.find_element(By.CSS_SELECTOR, selector)
-                if popup.is_displayed():
-                    popup.click()
-                    time.sleep(1)
-                    print(f"Dismissed popup with selector: {selector}")
-            except:
-                continue
+        dismiss_popups(self.driver)
     
-    def wait_and_scroll(self, scrolls: int = 8):
-        """Scroll page to load more content with better timing"""
-        for i in range(scrolls):
-            print(f"Scrolling... {i+1}/{scrolls}")
-            
-            # Get current page height
-            current_height = self.driver.execute_script("return document.body.scrollHeight")
-            
-            # Scroll to bottom
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            
-            # Wait for new content to load
-            time.sleep(3)
-            
-            # Check if new content loaded
-            new_height = self.driver.execute_script("return document.body.scrollHeight")
-            if new_height == current_height:
-                print("No new content loaded, stopping scroll")
-                break
+    def wait_and_scroll(self, scrolls: int = 8, item_selector: str = None,
+                        stop_when: Callable[[], bool] = None):
+        """Scroll page to load more content, waiting only until new content appears.
+        
+        scrolls=None keeps scrolling until no new content loads or stop_when() is true.
+        """
+        wait_and_scroll(self.driver, self.waiter, scrolls, item_selector, stop_when, self.scroll_timeout)
     
-    def scrape_comments(self, username: str) -> List[Dict[str, Any]]:
-        """Scrape user comments from their profile with updated selectors"""
+    def scrape_comments(self, username: str, known: Set[str] = None) -> List[Comment]:
+        """Scrape user comments from their profile, as deep as self.depth asks.
+        
+        If known comment keys are given, scrolling and extraction stop at the first known comment.
+        """
         comments = []
         url = f"https://www.reddit.com/user/{username}/comments/"
         
         try:
             print(f"Navigating to: {url}")
-            self.driver.get(url)
+            if self.rate_limiter:
+                with self.metrics.span("rate_limit"):
+                    self.rate_limiter.wait(url)
+            with self.metrics.span("navigate"):
+                self.driver.get(url)
             
             # Wait for comments to load
-            time.sleep(5)
-            self.dismiss_popups()
+            with self.metrics.span("page_ready"):
+                self.waiter.page_ready()
+            with self.metrics.span("popups"):
+                self.dismiss_popups()
             
             try:
                 # Wait for the main content area to load
-                self.wait.until(
-                    EC.any_of(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "shreddit-profile-comment")),
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "article[aria-label*='comment']")),
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "div[data-testid='comment']")),
-                        EC.presence_of_element_located((By.CSS_SELECTOR, ".Comment")),
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "div[class*='hover:bg-neutral-background-hover']"))
+                with self.metrics.span("wait_for_items"):
+                    self.wait.until(
+                        EC.any_of(
+                            EC.presence_of_element_located((By.CSS_SELECTOR, "shreddit-profile-comment")),
+                            EC.presence_of_element_located((By.CSS_SELECTOR, "article[aria-label*='comment']")),
+                            EC.presence_of_element_located((By.CSS_SELECTOR, "div[data-testid='comment']")),
+                            EC.presence_of_element_located((By.CSS_SELECTOR, ".Comment")),
+                            EC.presence_of_element_located((By.CSS_SELECTOR, "div[class*='hover:bg-neutral-background-hover']"))
+                        )
                     )
-                )
                 print("Comments section loaded successfully")
             except TimeoutException:
                 print("No comments found or page didn't load properly")
@@ -91,60 +97,42 @@ class CommentScraper:
                 print(self.driver.page_source[:1000])
                 return comments
             
-            # Scroll to load more content
-            self.wait_and_scroll(8)
-            
-            # Updated comment selectors based on the console image
-            comment_selectors = [
-                "shreddit-profile-comment",
-                "article[aria-label*='comment']", 
-                "div[class*='hover:bg-neutral-background-hover'][class*='relative']",
-                "div[data-testid='comment']",
-                ".Comment",
-                "article[class*='mb-0'][class*='w-full']"
-            ]
+            if self.extraction_mode == "script":
+                # Stream: extract comments as they load and drop extracted nodes from the DOM
+                with self.metrics.span("stream"):
+                    for i, comment in stream_items(self.driver, self.waiter, 'comments', self.depth,
+                                                   self.scroll_timeout, known=known,
+                                                   max_memory_mb=self.max_memory_mb,
+                                                   recycle=self._recycle if self.recycle else None):
+                        if not self._collect_comment(comments, comment, i):
+                            break
+                return comments
             
-            comment_elements = []
-            for selector in comment_selectors:
-                try:
-                    comment_elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    if comment_elements:
-                        print(f"Found {len(comment_elements)} comments using selector: {selector}")
+            # Scroll until the page holds enough history
+            with self.metrics.span("scroll"):
+                self.wait_and_scroll(self.depth.max_scrolls, item_selector="shreddit-profile-comment",
+                                     stop_when=depth_stop_condition(self.driver, 'comments', self.depth, known))
+            gate = AgeGate(self.depth, self.depth.cutoff())
+            
+            if self.extraction_mode == "html":
+                # Parse the whole page locally instead of per-element WebDriver round trips
+                with self.metrics.span("extract"):
+                    extracted = parse_comments(self.driver.page_source, limit=None)
+                print(f"Extracted {len(extracted)} comment elements in html mode")
+                for i, comment_data in enumerate(extracted):
+                    comment = Comment.from_dict(comment_data) if comment_data else None
+                    if not self._collect_comment(comments, comment, i, known, gate):
                         break
-                except Exception as e:
-                    print(f"Selector {selector} failed: {e}")
-                    continue
-            
-            if not comment_elements:
-                print("No comment elements found with any selector. Trying fallback...")
-                # Fallback: look for any element containing comment-like structure
-                fallback_selectors = [
-                    "div[class*='text-12'][class*='relative']",
-                    "div[class*='post-revision-content']",
-                    "div[aria-label*='comment']"
-                ]
-                
-                for selector in fallback_selectors:
-                    try:
-                        comment_elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                        if comment_elements:
-                            print(f"Found {len(comment_elements)} elements with fallback selector: {selector}")
-                            break
-                    except:
-                        continue
+                return comments
             
-            # Extract data from each comment
-            for i, element in enumerate(comment_elements[:7]):
-                try:
-                    comment_data = self.extract_comment_data(element, i)
-                    if comment_data and comment_data.get('body'):
-                        comments.append(comment_data)
-                        print(f"✓ Extracted comment {i+1}: {comment_data['body'][:60]}...")
-                    else:
-                        print(f"✗ Failed to extract comment {i+1}")
-                except Exception as e:
-                    print(f"✗ Error extracting comment {i+1}: {e}")
-                    continue
+            # One in-page pass over all comment elements instead of a round trip per selector attempt
+            comment_elements = self.extractor.find_containers(self.driver, COMMENT_SPEC)
+            with self.metrics.span("extract"):
+                extracted = self.extractor.extract_batch(self.driver, comment_elements, COMMENT_SPEC)
+                for i, comment_data in enumerate(extracted):
+                    comment = Comment.from_dict(comment_data) if comment_data else None
+                    if not self._collect_comment(comments, comment, i, known, gate):
+                        break
             
         except Exception as e:
             print(f"Error scraping comments: {e}")
@@ -153,143 +141,40 @@ class CommentScraper:
         
         return comments
     
-    def extract_comment_data(self, element, index: int) -> Dict[str, Any]:
-        """Extract data from a single comment element with updated selectors"""
-        comment_data = {'index': index}
-        
-        try:
-            # Debug: Print element HTML for first few comments
-            if index < 3:
-                print(f"Debug - Comment {index} HTML snippet:")
-                print(element.get_attribute('outerHTML')[:500])
-            
-            # Extract comment text with updated selectors
-            text_selectors = [
-                "div[class*='post-revision-content']",
-                "div[slot='comment']",
-                "div[data-testid='comment-text']",
-                "div[class*='text-neutral-content-strong'][class*='overflow-hidden']",
-                "div[class*='usertext-body']",
-                "div p",
-                "div[class*='md']",
-                "[slot='text-body']",
-                # More specific selectors based on the structure
-                "div[class*='relative'] div[class*='text-neutral-content-strong']",
-                "div[class*='overflow-hidden'] p"
-            ]
-            
-            for selector in text_selectors:
-                try:
-                    text_elements = element.find_elements(By.CSS_SELECTOR, selector)
-                    for text_element in text_elements:
-                        comment_text = text_element.text.strip()
-                        if comment_text and len(comment_text) > 10:  # Ensure it's actual content
-                            comment_data['body'] = comment_text
-                            break
-                    if comment_data.get('body'):
-                        break
-                except Exception as e:
-                    print(f"Text selector {selector} failed: {e}")
-                    continue
-            
-            # Extract subreddit with updated selectors
-            subreddit_selectors = [
-                "a[href*='/r/'][class*='hover:underline']",
-                "a[href*='/r/']",
-                "[data-testid='subreddit-name']",
-                "faceplate-tracker a[href*='/r/']"
-            ]
-            
-            for selector in subreddit_selectors:
-                try:
-                    subreddit_element = element.find_element(By.CSS_SELECTOR, selector)
-                    subreddit_text = subreddit_element.text.strip()
-                    if subreddit_text and ('r/' in subreddit_text or subreddit_text.startswith('r/')):
-                        comment_data['subreddit'] = subreddit_text.replace('r/', '')
-                        break
-                except:
-                    continue
-            
-            # Extract score with updated selectors
-            score_selectors = [
-                "shreddit-score",
-                "div[class*='ml-[22px]'] span",
-                "faceplate-number",
-                ".score",
-                "[aria-label*='upvote']",
-                "div[class*='text-12'] span"
-            ]
-            
-            for selector in score_selectors:
-                try:
-                    score_element = element.find_element(By.CSS_SELECTOR, selector)
-                    score_text = score_element.text.strip()
-                    if score_text and score_text != '•' and score_text.isdigit():
-                        comment_data['score'] = score_text
-                        break
-                except:
-                    continue
-            
-            # Extract timestamp with updated selectors
-            time_selectors = [
-                "faceplate-timeago",
-                "time",
-                "[data-testid='comment-timestamp']",
-                "div[class*='text-12'] time",
-                "span[class*='text-12']"
-            ]
-            
-            for selector in time_selectors:
-                try:
-                    time_element = element.find_element(By.CSS_SELECTOR, selector)
-                    timestamp = time_element.get_attribute('datetime') or time_element.text
-                    if timestamp and ('ago' in timestamp or 'T' in timestamp):
-                        comment_data['timestamp'] = timestamp
-                        break
-                except:
-                    continue
-            
-            # Extract parent post title/context with updated selectors
-            context_selectors = [
-                "a[href*='/comments/'][class*='hover:underline']",
-                "a[href*='/comments/']",
-                "[data-testid='post-title']",
-                "div[class*='text-12'] a"
-            ]
-            
-            for selector in context_selectors:
-                try:
-                    context_element = element.find_element(By.CSS_SELECTOR, selector)
-                    context_text = context_element.text.strip()
-                    if context_text and len(context_text) > 5:
-                        comment_data['post_context'] = context_text
-                        # Also extract the post URL
-                        post_url = context_element.get_attribute('href')
-                        if post_url:
-                            comment_data['post_url'] = post_url
-                        break
-                except:
-                    continue
-            
-            # Try to extract additional metadata
-            try:
-                # Look for any additional text that might be metadata
-                metadata_elements = element.find_elements(By.CSS_SELECTOR, "div[class*='text-12'] span")
-                for meta_element in metadata_elements:
-                    meta_text = meta_element.text.strip()
-                    if 'points' in meta_text.lower() or 'point' in meta_text.lower():
-                        comment_data['score'] = meta_text
-                    elif 'ago' in meta_text.lower():
-                        comment_data['timestamp'] = meta_text
-            except:
-                pass
-            
-        except Exception as e:
-            print(f"Error extracting comment data: {e}")
-            import traceback
-            traceback.print_exc()
+    def _recycle(self, driver, url: str):
+        self.driver = self.recycle(driver, url)
+        return self.driver
+    
+    def _collect_comment(self, comments: List[Comment], comment: Comment, i: int,
+                         known: Set[str] = None, gate: AgeGate = None) -> bool:
+        """Keep a comment if it has a body and log the outcome; returns False once the depth is reached"""
+        if comment and known and comment_key(comment) in known:
+            print(f"Comment {i+1} is already known, stopping extraction")
+            return False
+        if comment and gate and gate.too_old(comment):
+            if gate.ended:
+                print(f"Comment {i+1} is older than the requested window, stopping extraction")
+                return False
+            print(f"Comment {i+1} is older than the requested window (pinned?), skipping")
+            return True
+        if comment and comment.body:
+            comments.append(comment)
+            if self.item_sink:
+                self.item_sink.comment(comment)
+            print(f"✓ Extracted comment {i+1}: {comment.body[:60]}...")
+        else:
+            print(f"✗ Failed to extract comment {i+1}")
+        return not self.depth.enough(len(comments))
+    
+    def extract_comment_data(self, element, index: int) -> Comment:
+        """Extract data from a single comment element, one WebDriver call per selector tried"""
+        # Debug: Print element HTML for first few comments
+        if index < 3:
+            print(f"Debug - Comment {index} HTML snippet:")
+            print(element.get_attribute('outerHTML')[:500])
         
-        return comment_data if comment_data.get('body') else None
+        comment_data = self.extractor.extract(element, COMMENT_SPEC, index)
+        return Comment.from_dict(comment_data) if comment_data else None
     
     def debug_comment_structure(self, username: str):
         """Debug method to analyze comment page structure"""
@@ -298,11 +183,11 @@ class CommentScraper:
         try:
             print(f"Debugging comment structure for: {url}")
             self.driver.get(url)
-            time.sleep(5)
+            self.waiter.page_ready()
             self.dismiss_popups()
             
             # Wait for page to load
-            time.sleep(3)
+            self.waiter.network_idle()
             
             # Get page source and analyze structure
             page_source = self.driver.page_source
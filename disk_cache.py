@@ -0,0 +1,164 @@
+"""
+disk_cache.py - Small persistent JSON cache with TTL and size-bounded LRU eviction
+Each entry is one JSON file named after a hash of its key. Hits refresh the file's mtime,
+so eviction removes the least recently used entries first once max_bytes is exceeded.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+class DiskCache:
+    """Key/value store of JSON-serializable values on disk"""
+
+    def __init__(self, directory: str, ttl: Optional[float] = None, max_bytes: Optional[int] = None):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def get_entry(self, key: str, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Return {'key', 'stored_at', 'value'} if present and younger than max_age (default: ttl)"""
+        max_age = self.ttl if max_age is None else max_age
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if entry.get('key') != key:
+            return None
+        if max_age is not None and time.time() - entry['stored_at'] > max_age:
+            return None
+
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return entry
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Any:
+        entry = self.get_entry(key, max_age)
+        return entry['value'] if entry else None
+
+    def put(self, key: str, value: Any):
+        """Store value atomically, then evict least recently used entries if over max_bytes"""
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'key': key, 'stored_at': time.time(), 'value': value}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+        if self.max_bytes is not None:
+            self.evict()
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _entries(self) -> List[os.DirEntry]:
+        return [entry for entry in os.scandir(self.directory)
+                if entry.is_file() and entry.name.endswith('.json')]
+
+    def size_bytes(self) -> int:
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        with self._lock:
+            entries = []
+            for entry in self._entries():
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except FileNotFoundError:
+                    continue
+
+    def clear(self):
+        for entry in self._entries():
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                continue
+
+
+class ScrapeCache(DiskCache):
+    """Scraped post/comment lists keyed by (username, section), with the depth they were scraped to"""
+
+    SECTIONS = ('posts', 'comments')
+
+    def __init__(self, directory: str = ".scrape_cache", ttl: Optional[float] = 6 * 3600,
+                 max_bytes: Optional[int] = 512 * 1024 * 1024):
+        super().__init__(directory, ttl, max_bytes)
+
+    @staticmethod
+    def _key(username: str, section: str) -> str:
+        return f"{username.lower()}:{section}"
+
+    def get_section(self, username: str, section: str,
+                    max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Return {'username', 'section', 'scraped_at', 'depth', 'items'} if cached and fresh enough.
+
+        'depth' is the ScrapeDepth.to_dict() the items were scraped with (None if not recorded);
+        callers compare it with the depth they need before using the items.
+        """
+        return self.get(self._key(username, section), max_age)
+
+    def put_section(self, username: str, section: str, items: List[Dict[str, Any]],
+                    scraped_at: Optional[str] = None, depth: Optional[Dict[str, Any]] = None):
+        self.put(self._key(username, section), {
+            'username': username,
+            'section': section,
+            'scraped_at': scraped_at or datetime.now().isoformat(),
+            'depth': depth,
+            'items': items,
+        })
+
+
+class PersonaCache(DiskCache):
+    """LLM persona responses keyed by a hash of model name, prompt and generation parameters"""
+
+    def __init__(self, directory: str = ".persona_cache", ttl: Optional[float] = None,
+                 max_bytes: Optional[int] = 64 * 1024 * 1024):
+        super().__init__(directory, ttl, max_bytes)
+
+    @staticmethod
+    def request_key(model: str, prompt: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Content hash of one generation request; identical requests share a key"""
+        payload = json.dumps({'model': model, 'prompt': prompt, 'params': params or {}},
+                             sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get_response(self, model: str, prompt: str, params: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        value = self.get(self.request_key(model, prompt, params))
+        return value['text'] if value else None
+
+    def put_response(self, model: str, prompt: str, text: str, params: Optional[Dict[str, Any]] = None):
+        self.put(self.request_key(model, prompt, params), {
+            'model': model,
+            'text': text,
+            'created_at': datetime.now().isoformat(),
+        })
@@ -0,0 +1,223 @@
+"""
+driver_pool.py - Long-lived, pre-warmed pool of Chrome WebDriver sessions
+Sessions are started up front, handed out to scrapers, reset between uses (tabs, cookies,
+storage) and recycled after a number of uses or once the browser's memory passes a limit.
+"""
+
+import time
+import queue
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+try:
+    import psutil
+except ImportError:  # memory-based recycling is skipped without psutil
+    psutil = None
+
+DEFAULT_RESET_ORIGINS = ["https://www.reddit.com"]
+# Seconds acquire() waits for a session by default (a worker holding one session and
+# waiting for a second must not wait forever)
+DEFAULT_ACQUIRE_TIMEOUT = 300.0
+# Attempts at starting a replacement session before the pool gives that slot up
+REPLACE_ATTEMPTS = 3
+
+
+def browser_memory_mb(driver) -> Optional[float]:
+    """Resident memory of the chromedriver process and all its children (Chrome), in MB"""
+    if psutil is None:
+        return None
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        processes = [root] + root.children(recursive=True)
+        total = 0
+        for process in processes:
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                continue
+        return total / (1024 * 1024)
+    except (AttributeError, psutil.Error):
+        return None
+
+
+class DriverPool:
+    """Thread-safe pool of reusable WebDriver sessions"""
+
+    def __init__(self, driver_factory: Callable[[], object], size: int = 2, max_uses: int = 50,
+                 max_memory_mb: Optional[float] = None, reset_origins: Optional[List[str]] = None,
+                 warm_url: Optional[str] = None):
+        self.driver_factory = driver_factory
+        self.size = size
+        self.max_uses = max_uses
+        self.max_memory_mb = max_memory_mb
+        self.reset_origins = reset_origins or DEFAULT_RESET_ORIGINS
+        self.warm_url = warm_url
+
+        self._idle = queue.Queue()
+        self._uses: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        # Replacement sessions being started; with len(self._uses), the sessions that exist or will
+        self._starting = 0
+        self.stats = {'created': 0, 'recycled': 0, 'acquired': 0, 'lost': 0}
+
+    def _create(self):
+        started = time.monotonic()
+        driver = self.driver_factory()
+        if self.warm_url:
+            # Pay first-page costs (DNS, TLS, HTTP cache) before anyone is waiting
+            driver.get(self.warm_url)
+        with self._lock:
+            self._uses[id(driver)] = 0
+            self.stats['created'] += 1
+        print(f"Started pooled browser session in {time.monotonic() - started:.1f}s")
+        return driver
+
+    def start(self) -> "DriverPool":
+        """Pre-warm every session in parallel"""
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            for driver in executor.map(lambda _: self._create(), range(self.size)):
+                self._idle.put(driver)
+        return self
+
+    def live_sessions(self) -> int:
+        """Sessions idle, checked out or being started"""
+        with self._lock:
+            return len(self._uses) + self._starting
+
+    def acquire(self, timeout: Optional[float] = DEFAULT_ACQUIRE_TIMEOUT):
+        """Check out a healthy session, waiting up to timeout seconds (None: forever) for one.
+
+        Raises TimeoutError when none comes back in time and RuntimeError once every session
+        has been lost to failed restarts.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self.live_sessions() == 0:
+                raise RuntimeError("Browser pool has no sessions left (replacements failed to start)")
+            wait = 1.0 if deadline is None else min(1.0, deadline - time.monotonic())
+            if wait <= 0:
+                raise TimeoutError(f"No browser session became available within {timeout:g}s")
+            try:
+                driver = self._idle.get(timeout=wait)
+            except queue.Empty:
+                continue
+            try:
+                driver.current_url  # cheap liveness check
+            except Exception:
+                print("Pooled browser session is dead, replacing it")
+                self._replace(driver)
+                continue
+            with self._lock:
+                self.stats['acquired'] += 1
+            return driver
+
+    def release(self, driver, discard: bool = False):
+        """Return a session to the pool, resetting or recycling it as needed"""
+        with self._lock:
+            self._uses[id(driver)] = self._uses.get(id(driver), 0) + 1
+            uses = self._uses[id(driver)]
+
+        if self._closed:
+            self._quit(driver)
+            return
+
+        reason = None
+        if discard:
+            reason = "discarded after an error"
+        elif uses >= self.max_uses:
+            reason = f"reached {uses} uses"
+        elif self.max_memory_mb is not None:
+            memory = browser_memory_mb(driver)
+            if memory is not None and memory > self.max_memory_mb:
+                reason = f"using {memory:.0f} MB"
+
+        if reason is None and not self.reset(driver):
+            reason = "reset failed"
+
+        if reason:
+            print(f"Recycling browser session ({reason})")
+            with self._lock:
+                self.stats['recycled'] += 1
+            # Start the replacement in the background so the releasing caller is not delayed
+            threading.Thread(target=self._replace, args=(driver,), daemon=True).start()
+        else:
+            self._idle.put(driver)
+
+    def reset(self, driver) -> bool:
+        """Close extra tabs and clear cookies and site storage; returns False if the session is unusable"""
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+
+            driver.get("about:blank")
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            for origin in self.reset_origins:
+                driver.execute_cdp_cmd("Storage.clearDataForOrigin",
+                                       {'origin': origin, 'storageTypes': 'all'})
+            return True
+        except Exception as e:
+            print(f"Failed to reset browser session: {e}")
+            return False
+
+    def _quit(self, driver):
+        with self._lock:
+            self._uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _replace(self, driver):
+        with self._lock:
+            self._starting += 1
+        try:
+            self._quit(driver)
+            for attempt in range(1, REPLACE_ATTEMPTS + 1):
+                if self._closed:
+                    return
+                try:
+                    self._idle.put(self._create())
+                    return
+                except Exception as e:
+                    print(f"Failed to start replacement browser session "
+                          f"(attempt {attempt}/{REPLACE_ATTEMPTS}): {e}")
+                    if attempt < REPLACE_ATTEMPTS:
+                        time.sleep(2 ** attempt)
+            with self._lock:
+                self.stats['lost'] += 1
+            print(f"Giving up on a browser session; {self.live_sessions() - 1} left in the pool")
+        finally:
+            with self._lock:
+                self._starting -= 1
+
+    @contextmanager
+    def session(self, timeout: Optional[float] = DEFAULT_ACQUIRE_TIMEOUT):
+        """Context manager that acquires a session and releases it (discarding it on error)"""
+        driver = self.acquire(timeout)
+        ok = False
+        try:
+            yield driver
+            ok = True
+        finally:
+            self.release(driver, discard=not ok)
+
+    def close(self):
+        """Quit every idle session; sessions still checked out are quit when released"""
+        self._closed = True
+        while True:
+            try:
+                self._quit(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
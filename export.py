@@ -0,0 +1,240 @@
+"""
+export.py - Columnar (Parquet / Arrow IPC) export of scraped datasets and a bulk loader
+Scrape output (per-user JSON files from save_to_file, or JSONL streams from jsonl_sink) is
+normalized into typed columns: integer scores and comment counts, aware UTC datetimes resolved
+against each scrape's scraped_at, and dictionary-encoded subreddit/username categories. Posts
+and comments are written as separate datasets, hive-partitioned by year, and loaded back through
+memory-mapped files so aggregations run over Arrow tables instead of json.load loops.
+"""
+
+import os
+import sys
+import json
+import shutil
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from pyarrow import fs
+
+from normalize import to_utc
+from records import Comment, Post
+
+FORMATS = {"parquet": "parquet", "arrow": "ipc"}
+SECTIONS = ("posts", "comments")
+
+_CATEGORY = pa.dictionary(pa.int32(), pa.string())
+_UTC = pa.timestamp('us', tz='UTC')
+
+POST_SCHEMA = pa.schema([
+    ('username', _CATEGORY),
+    ('index', pa.int32()),
+    ('title', pa.string()),
+    ('url', pa.string()),
+    ('subreddit', _CATEGORY),
+    ('score', pa.int64()),
+    ('comment_count', pa.int64()),
+    ('created_at', _UTC),
+    ('content', pa.string()),
+    ('scraped_at', _UTC),
+    ('year', pa.int16()),
+])
+
+COMMENT_SCHEMA = pa.schema([
+    ('username', _CATEGORY),
+    ('index', pa.int32()),
+    ('body', pa.string()),
+    ('subreddit', _CATEGORY),
+    ('score', pa.int64()),
+    ('created_at', _UTC),
+    ('post_context', pa.string()),
+    ('post_url', pa.string()),
+    ('scraped_at', _UTC),
+    ('year', pa.int16()),
+])
+
+SECTION_SCHEMAS = {'posts': POST_SCHEMA, 'comments': COMMENT_SCHEMA}
+
+# Partition key only; it is rebuilt from the directory names on load
+_PARTITIONING = ds.partitioning(pa.schema([('year', pa.int16())]), flavor="hive")
+
+
+def post_row(username: str, post: Dict[str, Any], scraped_at: Optional[str]) -> Dict[str, Any]:
+    """Typed export row for one scraped post"""
+    record = Post.from_dict(post, reference=scraped_at)
+    return {
+        'username': username,
+        'index': record.index,
+        'title': record.title,
+        'url': record.url,
+        'subreddit': record.subreddit,
+        'score': record.score_value,
+        'comment_count': record.comment_count_value,
+        'created_at': record.created_at,
+        'content': record.content,
+        'scraped_at': to_utc(scraped_at),
+        'year': record.created_at.year if record.created_at else None,
+    }
+
+
+def comment_row(username: str, comment: Dict[str, Any], scraped_at: Optional[str]) -> Dict[str, Any]:
+    """Typed export row for one scraped comment"""
+    record = Comment.from_dict(comment, reference=scraped_at)
+    return {
+        'username': username,
+        'index': record.index,
+        'body': record.body,
+        'subreddit': record.subreddit,
+        'score': record.score_value,
+        'created_at': record.created_at,
+        'post_context': record.post_context,
+        'post_url': record.post_url,
+        'scraped_at': to_utc(scraped_at),
+        'year': record.created_at.year if record.created_at else None,
+    }
+
+
+SECTION_ROWS = {'posts': post_row, 'comments': comment_row}
+
+
+def iter_scraped_items(path: str) -> Iterator[Tuple[str, str, Dict[str, Any], Optional[str]]]:
+    """Yield (section, username, item, scraped_at) from a scrape JSON file or a JSONL stream.
+
+    JSONL records are resolved against their own scraped_at: the time the item was extracted,
+    which for sections replayed from the cache or run journal predates the line's written_at.
+    Streams written before records carried scraped_at fall back to written_at.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                section = {'post': 'posts', 'comment': 'comments'}.get(record.get('type'))
+                if section:
+                    scraped_at = record.get('scraped_at') or record.get('written_at')
+                    yield section, record.get('username'), record, scraped_at
+            return
+
+        data = json.load(f)
+    username = data.get('username')
+    scraped_at = data.get('scraped_at')
+    for section in SECTIONS:
+        for item in data.get(section) or []:
+            yield section, username, item, scraped_at
+
+
+def _write_batch(rows: List[Dict[str, Any]], section: str, output_dir: str, file_format: str, part: int):
+    table = pa.Table.from_pylist(rows, schema=SECTION_SCHEMAS[section])
+    ds.write_dataset(
+        table,
+        os.path.join(output_dir, section),
+        format=FORMATS[file_format],
+        partitioning=_PARTITIONING,
+        basename_template=f"part-{part:05d}-{{i}}.{file_format}",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+
+
+def export_dataset(paths: Iterable[str], output_dir: str, file_format: str = "parquet",
+                   batch_size: int = 50_000, overwrite: bool = True) -> Dict[str, int]:
+    """Normalize scraped files into <output_dir>/{posts,comments}/year=YYYY/*.parquet|arrow.
+
+    Rows are buffered per section and flushed every batch_size rows, so memory stays bounded
+    however many input files there are. Returns the number of rows written per section.
+    """
+    if file_format not in FORMATS:
+        raise ValueError(f"Unknown export format: {file_format}")
+    if overwrite:
+        for section in SECTIONS:
+            shutil.rmtree(os.path.join(output_dir, section), ignore_errors=True)
+
+    buffers: Dict[str, List[Dict[str, Any]]] = {section: [] for section in SECTIONS}
+    counts = {section: 0 for section in SECTIONS}
+    parts = {section: 0 for section in SECTIONS}
+
+    def flush(section):
+        if buffers[section]:
+            _write_batch(buffers[section], section, output_dir, file_format, parts[section])
+            counts[section] += len(buffers[section])
+            parts[section] += 1
+            buffers[section] = []
+
+    for path in paths:
+        try:
+            for section, username, item, scraped_at in iter_scraped_items(path):
+                buffers[section].append(SECTION_ROWS[section](username, item, scraped_at))
+                if len(buffers[section]) >= batch_size:
+                    flush(section)
+        except (OSError, ValueError) as e:
+            print(f"Skipping {path}: {e}")
+
+    for section in SECTIONS:
+        flush(section)
+
+    print(f"Exported {counts['posts']} posts and {counts['comments']} comments to {output_dir}")
+    return counts
+
+
+def open_dataset(output_dir: str, section: str, file_format: str = "parquet") -> ds.Dataset:
+    """Lazily open an exported section; files are read through memory maps"""
+    return ds.dataset(
+        os.path.abspath(os.path.join(output_dir, section)),
+        schema=SECTION_SCHEMAS[section],
+        format=FORMATS[file_format],
+        partitioning=_PARTITIONING,
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+    )
+
+
+def load_dataset(output_dir: str, section: str, file_format: str = "parquet",
+                 columns: Optional[List[str]] = None, filter: Optional[ds.Expression] = None) -> pa.Table:
+    """Load an exported section (optionally only some columns / rows) as one Arrow table"""
+    if not os.path.isdir(os.path.join(output_dir, section)):
+        empty = SECTION_SCHEMAS[section].empty_table()
+        return empty.select(columns) if columns else empty
+    return open_dataset(output_dir, section, file_format).to_table(columns=columns, filter=filter)
+
+
+def subreddit_summary(table: pa.Table) -> pa.Table:
+    """Items, total and mean score per subreddit, most active first"""
+    # Count rows, not non-null subreddits, so the group of items without one is counted too
+    summary = table.group_by('subreddit').aggregate([
+        ('subreddit', 'count', pc.CountOptions(mode="all")), ('score', 'sum'), ('score', 'mean'),
+    ])
+    return summary.sort_by([('subreddit_count', 'descending')])
+
+
+def user_summary(table: pa.Table) -> pa.Table:
+    """Items, distinct subreddits and activity span per user"""
+    return table.group_by('username').aggregate([
+        ('username', 'count'), ('subreddit', 'count_distinct'),
+        ('created_at', 'min'), ('created_at', 'max'),
+    ])
+
+
+if __name__ == "__main__":
+    usage = ("Usage: python export.py export OUTPUT_DIR [parquet|arrow] FILE.json|FILE.jsonl ...\n"
+             "       python export.py summary OUTPUT_DIR [parquet|arrow]")
+    if len(sys.argv) < 3 or sys.argv[1] not in ("export", "summary"):
+        print(usage)
+        sys.exit(1)
+
+    command, output = sys.argv[1], sys.argv[2]
+    args = sys.argv[3:]
+    fmt = args.pop(0) if args and args[0] in FORMATS else "parquet"
+
+    if command == "export":
+        if not args:
+            print(usage)
+            sys.exit(1)
+        export_dataset(args, output, file_format=fmt)
+    else:
+        for section in SECTIONS:
+            table = load_dataset(output, section, fmt)
+            print(f"\n{section}: {table.num_rows} rows, "
+                  f"{len(pc.unique(table['username']))} users")
+            for row in subreddit_summary(table).slice(0, 15).to_pylist():
+                print(f"  r/{row['subreddit']}: {row['subreddit_count']} items, "
+                      f"score {row['score_sum'] or 0} (mean {row['score_mean'] or 0:.1f})")
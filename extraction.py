@@ -0,0 +1,428 @@
+"""
+extraction.py - Declarative extraction specs shared by the post and comment scrapers
+A spec lists each field's selector chain, where its value is read from (text or an
+attribute), validation rules and clean-up as plain data. One interpreter applies it to
+WebElements, one in the page (a whole batch of elements per execute_script call, used by
+element and script modes) and one to lxml trees (html_extract), so the modes cannot drift
+apart. The page helpers both scrapers need (popups, scrolling) live here too.
+"""
+
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from reddit_selectors import (
+    POST_CONTAINER_SELECTORS, POST_FALLBACK_SELECTOR, POST_FIELD_SELECTORS,
+    COMMENT_CONTAINER_SELECTORS, COMMENT_FALLBACK_SELECTORS, COMMENT_FIELD_SELECTORS,
+    COMMENT_METADATA_SELECTOR, POPUP_SELECTORS,
+)
+
+# selenium's By.CSS_SELECTOR, spelled out so offline extraction does not need selenium
+CSS = "css selector"
+
+# Validation rules a field may use, all of which must pass for a value to be accepted
+RULES = ('not_equal', 'isdigit', 'min_length', 'contains', 'contains_any', 'icontains')
+
+
+def accepts(value: Optional[str], rules: Dict[str, Any]) -> bool:
+    """True if value is non-empty and passes every rule"""
+    if not value:
+        return False
+    if 'not_equal' in rules and value == rules['not_equal']:
+        return False
+    if rules.get('isdigit') and not value.isdigit():
+        return False
+    if 'min_length' in rules and len(value) < rules['min_length']:
+        return False
+    if 'contains' in rules and rules['contains'] not in value:
+        return False
+    if 'contains_any' in rules and not any(part in value for part in rules['contains_any']):
+        return False
+    if 'icontains' in rules and rules['icontains'] not in value.lower():
+        return False
+    return True
+
+
+class FieldSpec:
+    """One output field: a selector chain, value sources, rules and clean-up"""
+
+    __slots__ = ('name', 'selectors', 'sources', 'rules', 'strip', 'scan_all', 'extra')
+
+    def __init__(self, name: str, selectors: Sequence[str], sources: Sequence[str] = ('text',),
+                 rules: Optional[Dict[str, Any]] = None, strip: Optional[str] = None,
+                 scan_all: bool = False, extra: Optional[Dict[str, str]] = None):
+        unknown = set(rules or ()) - set(RULES)
+        if unknown:
+            raise ValueError(f"Unknown rules for field {name}: {sorted(unknown)}")
+        self.name = name
+        self.selectors = list(selectors)
+        # 'text' or an attribute name; the first non-empty source is the value
+        self.sources = tuple(sources)
+        self.rules = rules or {}
+        # Substring removed from the accepted value (e.g. the 'r/' of subreddit names)
+        self.strip = strip
+        # Check every match of a selector instead of only the first one
+        self.scan_all = scan_all
+        # {output field: source} read from the same element once this field matched
+        self.extra = extra or {}
+
+    def to_json(self, selectors: Optional[List[str]] = None, chain: str = '',
+                probes: Sequence[int] = ()) -> Dict[str, Any]:
+        # Items at the probes positions of a batch try the declared order instead of selectors
+        return {'name': self.name, 'chain': chain, 'selectors': selectors or self.selectors,
+                'declared': self.selectors, 'probes': list(probes),
+                'sources': list(self.sources), 'rules': self.rules, 'strip': self.strip,
+                'scan_all': self.scan_all, 'extra': self.extra}
+
+
+class ExtractionSpec:
+    """How to find items on a page and turn each item element into a dict"""
+
+    __slots__ = ('name', 'containers', 'fields', 'required', 'metadata_selector', 'metadata_rules')
+
+    def __init__(self, name: str, containers: Sequence[Tuple[str, Sequence[str]]],
+                 fields: Sequence[FieldSpec], required: str,
+                 metadata_selector: Optional[str] = None,
+                 metadata_rules: Sequence[Tuple[str, str]] = ()):
+        self.name = name
+        # (chain name, selectors) tried in turn; the first selector with matches wins
+        self.containers = [(chain, list(selectors)) for chain, selectors in containers]
+        self.fields = list(fields)
+        # Items without this field are dropped (returned as None)
+        self.required = required
+        # Loose metadata elements: the first keyword found in one (lowercased) sets that field
+        self.metadata_selector = metadata_selector
+        self.metadata_rules = tuple(metadata_rules)
+
+    def chain(self, field: FieldSpec) -> str:
+        return f"{self.name}.{field.name}"
+
+    def container_selectors(self) -> List[str]:
+        return [selector for _, selectors in self.containers for selector in selectors]
+
+    def to_json(self, plan: Optional[Callable[[str, List[str], int], Tuple[List[str], List[int]]]] = None,
+                count: int = 1) -> Dict[str, Any]:
+        """Spec as JSON for the in-page interpreter, for a batch of count items.
+
+        plan(chain, selectors, count) (SelectorRegistry.plan) gives each chain's order and the
+        batch positions that probe the declared order instead.
+        """
+        fields = []
+        for field in self.fields:
+            chain = self.chain(field)
+            selectors, probes = plan(chain, field.selectors, count) if plan else (None, ())
+            fields.append(field.to_json(selectors, chain, probes))
+        return {'fields': fields, 'required': self.required,
+                'metadata_selector': self.metadata_selector,
+                'metadata_rules': [list(rule) for rule in self.metadata_rules]}
+
+    def extract(self, element, find_all: Callable[[Any, str], list], read: Callable[[Any, str], Optional[str]],
+                index: int = 0, tracker: Optional["SpecExtractor"] = None) -> Optional[Dict[str, Any]]:
+        """Apply the spec to one item element.
+
+        find_all(scope, selector) lists matching descendants and read(element, source) returns
+        its text or an attribute; tracker (optional) orders chains and records lookups.
+        """
+        data = {'index': index}
+        for field in self.fields:
+            chain = self.chain(field)
+            selectors = tracker.ordered(chain, field.selectors) if tracker else field.selectors
+            for selector in selectors:
+                match = _match(element, field, selector, find_all, read)
+                if tracker:
+                    tracker.lookup(chain, selector, match is not None)
+                if match is not None:
+                    matched, value = match
+                    data[field.name] = value.replace(field.strip, '') if field.strip else value
+                    for name, source in field.extra.items():
+                        extra = read(matched, source)
+                        if extra:
+                            data[name] = extra
+                    break
+            else:
+                if tracker:
+                    tracker.missing(chain)
+
+        if self.metadata_selector:
+            try:
+                metadata = find_all(element, self.metadata_selector)
+            except Exception:
+                metadata = []
+            for meta in metadata:
+                text = read(meta, 'text') or ''
+                lower = text.lower()
+                for keyword, name in self.metadata_rules:
+                    if keyword in lower:
+                        data[name] = text
+                        break
+
+        return data if data.get(self.required) else None
+
+
+def _match(element, field: FieldSpec, selector: str, find_all, read) -> Optional[Tuple[Any, str]]:
+    """(matched element, value) for the first match of selector that passes field's rules"""
+    try:
+        candidates = find_all(element, selector)
+        if not field.scan_all:
+            candidates = candidates[:1]
+        for candidate in candidates:
+            value = None
+            for source in field.sources:
+                value = read(candidate, source)
+                if value:
+                    break
+            if accepts(value, field.rules):
+                return candidate, value
+    except Exception:
+        # Invalid selector for this engine, or the element went stale
+        pass
+    return None
+
+
+POST_SPEC = ExtractionSpec(
+    'post',
+    containers=[('post.container', POST_CONTAINER_SELECTORS), ('post.fallback', [POST_FALLBACK_SELECTOR])],
+    fields=[
+        FieldSpec('title', POST_FIELD_SELECTORS['title']),
+        FieldSpec('url', POST_FIELD_SELECTORS['url'], sources=('href',), rules={'contains': '/comments/'}),
+        FieldSpec('subreddit', POST_FIELD_SELECTORS['subreddit'], strip='r/'),
+        FieldSpec('score', POST_FIELD_SELECTORS['score'], rules={'not_equal': '•'}),
+        FieldSpec('timestamp', POST_FIELD_SELECTORS['timestamp'], sources=('datetime', 'text')),
+        FieldSpec('content', POST_FIELD_SELECTORS['content']),
+        FieldSpec('comment_count', POST_FIELD_SELECTORS['comment_count'], rules={'icontains': 'comment'}),
+    ],
+    required='title',
+)
+
+COMMENT_SPEC = ExtractionSpec(
+    'comment',
+    containers=[('comment.container', COMMENT_CONTAINER_SELECTORS),
+                ('comment.fallback', COMMENT_FALLBACK_SELECTORS)],
+    fields=[
+        # Longer than 10 characters, so vote counts and labels are not taken for the body
+        FieldSpec('body', COMMENT_FIELD_SELECTORS['body'], rules={'min_length': 11}, scan_all=True),
+        FieldSpec('subreddit', COMMENT_FIELD_SELECTORS['subreddit'], rules={'contains': 'r/'}, strip='r/'),
+        FieldSpec('score', COMMENT_FIELD_SELECTORS['score'], rules={'isdigit': True}),
+        FieldSpec('timestamp', COMMENT_FIELD_SELECTORS['timestamp'], sources=('datetime', 'text'),
+                  rules={'contains_any': ['ago', 'T']}),
+        FieldSpec('post_context', COMMENT_FIELD_SELECTORS['post_context'], rules={'min_length': 6},
+                  extra={'post_url': 'href'}),
+    ],
+    required='body',
+    metadata_selector=COMMENT_METADATA_SELECTOR,
+    metadata_rules=[('point', 'score'), ('ago', 'timestamp')],
+)
+
+SECTION_SPECS = {'posts': POST_SPEC, 'comments': COMMENT_SPEC}
+
+# In-page interpreter for ExtractionSpec.to_json(). text() mirrors WebElement.text.strip(),
+# attr() mirrors WebElement.get_attribute() (property first, then attribute).
+SPEC_JS = r"""
+function text(el) {
+    if (!el) return '';
+    var t = (el.innerText !== undefined && el.innerText !== null) ? el.innerText : el.textContent;
+    return (t || '').trim();
+}
+function attr(el, name) {
+    var prop = el[name];
+    if (typeof prop === 'string' && prop) return prop;
+    return el.getAttribute(name);
+}
+function findAll(root, selector) {
+    try { return Array.prototype.slice.call(root.querySelectorAll(selector)); } catch (e) { return []; }
+}
+function findFirst(root, selector) {
+    try { var el = root.querySelector(selector); return el ? [el] : []; } catch (e) { return []; }
+}
+function readSource(el, source) { return source === 'text' ? text(el) : attr(el, source); }
+function accepts(value, rules) {
+    if (!value) return false;
+    if ('not_equal' in rules && value === rules.not_equal) return false;
+    if (rules.isdigit && !/^\d+$/.test(value)) return false;
+    if ('min_length' in rules && value.length < rules.min_length) return false;
+    if ('contains' in rules && value.indexOf(rules.contains) === -1) return false;
+    if ('contains_any' in rules && !rules.contains_any.some(function (part) {
+        return value.indexOf(part) !== -1;
+    })) return false;
+    if ('icontains' in rules && value.toLowerCase().indexOf(rules.icontains) === -1) return false;
+    return true;
+}
+function countLookup(stats, field, selector, hit) {
+    // In lookup order, so the decaying registry sees hits and misses as they happened
+    if (stats) stats.lookups.push([field.chain, selector, hit ? 1 : 0]);
+}
+function extractItem(el, spec, index, stats) {
+    var item = {index: index};
+    spec.fields.forEach(function (field) {
+        var found = false;
+        var selectors = field.probes && field.probes.indexOf(index) !== -1 ? field.declared : field.selectors;
+        for (var i = 0; i < selectors.length && !found; i++) {
+            var selector = selectors[i];
+            var candidates = field.scan_all ? findAll(el, selector) : findFirst(el, selector);
+            for (var j = 0; j < candidates.length && !found; j++) {
+                var value = null;
+                for (var k = 0; k < field.sources.length && !value; k++) {
+                    value = readSource(candidates[j], field.sources[k]);
+                }
+                if (!accepts(value, field.rules)) continue;
+                item[field.name] = field.strip ? value.split(field.strip).join('') : value;
+                for (var name in field.extra) {
+                    var extra = readSource(candidates[j], field.extra[name]);
+                    if (extra) item[name] = extra;
+                }
+                found = true;
+            }
+            countLookup(stats, field, selector, found);
+        }
+        if (!found && stats) stats.missing[field.chain] = (stats.missing[field.chain] || 0) + 1;
+    });
+    if (spec.metadata_selector) {
+        findAll(el, spec.metadata_selector).forEach(function (meta) {
+            var t = text(meta), lower = t.toLowerCase();
+            for (var i = 0; i < spec.metadata_rules.length; i++) {
+                if (lower.indexOf(spec.metadata_rules[i][0]) !== -1) {
+                    item[spec.metadata_rules[i][1]] = t;
+                    break;
+                }
+            }
+        });
+    }
+    return item[spec.required] ? item : null;
+}
+"""
+
+# arguments: spec JSON, list of item elements
+_BATCH_JS = SPEC_JS + r"""
+var spec = arguments[0];
+var stats = {lookups: [], missing: {}};
+var items = arguments[1].map(function (el, index) {
+    try { return extractItem(el, spec, index, stats); } catch (e) { return null; }
+});
+return {items: items, lookups: stats.lookups, missing: stats.missing};
+"""
+
+
+def read_webelement(element, source: str) -> Optional[str]:
+    return element.text.strip() if source == 'text' else element.get_attribute(source)
+
+
+def find_webelements(element, selector: str) -> list:
+    return element.find_elements(CSS, selector)
+
+
+class SpecExtractor:
+    """Runs specs against a live page, ordering chains by and recording into a SelectorRegistry"""
+
+    def __init__(self, registry=None, metrics=None):
+        self.registry = registry
+        self.metrics = metrics
+
+    # -- tracker interface used by ExtractionSpec.extract ------------------
+
+    def ordered(self, chain: str, selectors: List[str]) -> List[str]:
+        if self.registry:
+            self.registry.resolved(chain)
+            return self.registry.ordered(chain, selectors)
+        return selectors
+
+    def lookup(self, chain: str, selector: str, hit: bool):
+        if self.registry:
+            self.registry.record(chain, selector, hit)
+        if self.metrics and not hit:
+            self.metrics.selector_miss(chain)
+
+    def missing(self, chain: str, count: int = 1):
+        if self.metrics:
+            self.metrics.field_missing(chain, count)
+
+    # -- extraction --------------------------------------------------------
+
+    def find_containers(self, driver, spec: ExtractionSpec) -> list:
+        """Item elements on the page, from the first container selector that matches anything"""
+        for chain, selectors in spec.containers:
+            for selector in self.ordered(chain, selectors):
+                try:
+                    elements = driver.find_elements(CSS, selector)
+                except Exception as e:
+                    print(f"Selector {selector} failed: {e}")
+                    elements = []
+                self.lookup(chain, selector, bool(elements))
+                if elements:
+                    print(f"Found {len(elements)} {spec.name} elements using selector: {selector}")
+                    return elements
+            print(f"No {spec.name} elements found with the {chain} selectors")
+        return []
+
+    def extract(self, element, spec: ExtractionSpec, index: int = 0) -> Optional[Dict[str, Any]]:
+        """Extract one WebElement with per-field WebDriver calls"""
+        return spec.extract(element, find_webelements, read_webelement, index, tracker=self)
+
+    def extract_batch(self, driver, elements: list, spec: ExtractionSpec) -> List[Optional[Dict[str, Any]]]:
+        """Extract every element with a single execute_script call.
+
+        Returns one entry per element (None where the required field is missing). Falls back to
+        extract() element by element if the in-page run fails.
+        """
+        if not elements:
+            return []
+        plan = self.registry.plan if self.registry else None
+        try:
+            result = driver.execute_script(_BATCH_JS, spec.to_json(plan, len(elements)), elements)
+        except Exception as e:
+            print(f"Batch extraction failed ({e}); extracting element by element")
+            return [self.extract(element, spec, i) for i, element in enumerate(elements)]
+
+        for field in spec.fields:
+            if self.registry:
+                self.registry.resolved(spec.chain(field), len(elements))
+        for chain, selector, hit in result.get('lookups') or []:
+            self.lookup(chain, selector, bool(hit))
+        for chain, count in (result.get('missing') or {}).items():
+            self.missing(chain, count)
+        return result.get('items') or []
+
+
+# -- Page helpers shared by both scrapers ---------------------------------
+
+def dismiss_popups(driver, selectors: Iterable[str] = POPUP_SELECTORS):
+    """Try to dismiss common Reddit popups"""
+    for selector in selectors:
+        try:
+            popups = driver.find_elements(CSS, selector)
+            if popups and popups[0].is_displayed():
+                popups[0].click()
+                time.sleep(1)
+                print(f"Dismissed popup with selector: {selector}")
+        except Exception:
+            # Invalid selector in this browser, or the popup vanished while clicking
+            continue
+
+
+def wait_and_scroll(driver, waiter, scrolls: Optional[int] = 8, item_selector: Optional[str] = None,
+                    stop_when: Optional[Callable[[], bool]] = None, scroll_timeout: float = 3.0):
+    """Scroll page to load more content, waiting only until new content appears.
+
+    scrolls=None keeps scrolling until no new content loads or stop_when() is true.
+    """
+    i = 0
+    while scrolls is None or i < scrolls:
+        if stop_when and stop_when():
+            print("Page holds enough content, stopping scroll")
+            break
+
+        i += 1
+        print(f"Scrolling... {i}/{scrolls or '∞'}")
+
+        # Get current page height and item count
+        current_height = waiter.scroll_height()
+        current_count = waiter.element_count(item_selector) if item_selector else 0
+
+        # Scroll to bottom
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+
+        # Wait for new content to load, up to scroll_timeout
+        if not waiter.new_content(current_height, item_selector, current_count, timeout=scroll_timeout):
+            print("No new content loaded, stopping scroll")
+            break
+
+        # Let the freshly loaded batch finish rendering
+        waiter.stable_scroll_height(settle=waiter.poll_interval * 2, timeout=scroll_timeout)
@@ -0,0 +1,186 @@
+"""
+html_extract.py - Offline extraction of posts and comments from saved page_source HTML
+Applies the extraction specs from extraction.py to a parsed lxml tree,
+so extraction needs no live browser and can run in a process pool or on archived pages.
+The returned dicts match extract_post_data / extract_comment_data field for field.
+"""
+
+import re
+import sys
+import json
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional
+from urllib.parse import urljoin
+
+import lxml.html
+from lxml import etree
+from cssselect import GenericTranslator, SelectorError
+
+from extraction import COMMENT_SPEC, POST_SPEC, ExtractionSpec
+
+DEFAULT_BASE_URL = "https://www.reddit.com/"
+
+# Elements that start a new line in rendered text (approximates WebElement.text)
+_BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'dd', 'div', 'dl', 'dt', 'fieldset',
+    'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre', 'section', 'table', 'tr', 'ul'
+}
+_INVISIBLE_TAGS = ('script', 'style', 'template', 'noscript')
+_SPACES = re.compile(r'[ \t\r\f\v]+')
+
+
+class ParsedPage:
+    """A parsed page that answers scoped CSS queries the way WebElement.find_element(s) does"""
+
+    _translator = GenericTranslator()
+    _xpath_cache: Dict[str, Optional[etree.XPath]] = {}
+
+    def __init__(self, html: str, base_url: str = DEFAULT_BASE_URL):
+        self.base_url = base_url
+        self.root = lxml.html.document_fromstring(html)
+        etree.strip_elements(self.root, *_INVISIBLE_TAGS, with_tail=False)
+
+        # Document-order position and subtree end of every element, for descendant checks
+        self._order = {}
+        self._subtree_end = {}
+        for position, el in enumerate(self.root.iter()):
+            self._order[el] = position
+        for el, position in self._order.items():
+            last = el
+            while len(last):
+                last = last[-1]
+            self._subtree_end[el] = self._order[last]
+        # selector -> (matches in document order, their document-order positions)
+        self._matches: Dict[str, tuple] = {}
+
+    @classmethod
+    def _compile(cls, selector: str) -> Optional[etree.XPath]:
+        if selector not in cls._xpath_cache:
+            try:
+                cls._xpath_cache[selector] = etree.XPath(cls._translator.css_to_xpath(selector))
+            except (SelectorError, etree.XPathError):
+                cls._xpath_cache[selector] = None
+        return cls._xpath_cache[selector]
+
+    def _select(self, selector: str) -> tuple:
+        if selector not in self._matches:
+            xpath = self._compile(selector)
+            elements = xpath(self.root) if xpath is not None else []
+            self._matches[selector] = (elements, [self._order[el] for el in elements])
+        return self._matches[selector]
+
+    def select_all(self, selector: str) -> list:
+        """All elements in the document matching selector, in document order"""
+        return self._select(selector)[0]
+
+    def find_all(self, scope, selector: str) -> list:
+        """Descendants of scope matching selector (selector is matched against the whole document)"""
+        elements, positions = self._select(selector)
+        # A subtree is a contiguous run of document order, so its matches are one slice
+        low = bisect_right(positions, self._order[scope])
+        high = bisect_right(positions, self._subtree_end[scope], lo=low)
+        return elements[low:high]
+
+    def find(self, scope, selector: str):
+        matches = self.find_all(scope, selector)
+        return matches[0] if matches else None
+
+    def containers(self, selectors: List[str]) -> list:
+        for selector in selectors:
+            elements = self.select_all(selector)
+            if elements:
+                return elements
+        return []
+
+    def href(self, el) -> Optional[str]:
+        href = el.get('href')
+        return urljoin(self.base_url, href) if href is not None else None
+
+
+def element_text(el) -> str:
+    """Rendered text of an element with whitespace collapsed and block elements on their own lines"""
+    parts = []
+
+    def walk(node):
+        tag = node.tag if isinstance(node.tag, str) else None
+        if tag == 'br':
+            parts.append('\n')
+        elif tag in _BLOCK_TAGS:
+            parts.append('\n')
+        if tag is not None and node.text:
+            parts.append(node.text)
+        for child in node:
+            walk(child)
+            if child.tail:
+                parts.append(child.tail)
+        if tag in _BLOCK_TAGS:
+            parts.append('\n')
+
+    walk(el)
+    raw = ''.join(parts).replace('\xa0', ' ')
+    lines = (_SPACES.sub(' ', line).strip() for line in raw.split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+
+def _extract(page: ParsedPage, spec: ExtractionSpec, el, index: int) -> Optional[Dict[str, Any]]:
+    def read(e, source):
+        if source == 'text':
+            return element_text(e)
+        return page.href(e) if source == 'href' else e.get(source)
+
+    return spec.extract(el, page.find_all, read, index)
+
+
+def parse_posts(html: str, limit: Optional[int] = 7,
+                base_url: str = DEFAULT_BASE_URL) -> List[Optional[Dict[str, Any]]]:
+    """Extract posts from a /submitted/ page_source.
+
+    Returns one entry per post element, in page order; entries that have no title are None.
+    """
+    page = ParsedPage(html, base_url)
+    elements = page.containers(POST_SPEC.container_selectors())
+    if limit is not None:
+        elements = elements[:limit]
+    return [_extract(page, POST_SPEC, el, i) for i, el in enumerate(elements)]
+
+
+def parse_comments(html: str, limit: Optional[int] = 7,
+                   base_url: str = DEFAULT_BASE_URL) -> List[Optional[Dict[str, Any]]]:
+    """Extract comments from a /comments/ page_source.
+
+    Returns one entry per comment element, in page order; entries that have no body are None.
+    """
+    page = ParsedPage(html, base_url)
+    elements = page.containers(COMMENT_SPEC.container_selectors())
+    if limit is not None:
+        elements = elements[:limit]
+    return [_extract(page, COMMENT_SPEC, el, i) for i, el in enumerate(elements)]
+
+
+_PARSERS = {'posts': parse_posts, 'comments': parse_comments}
+
+
+def parse_file(path: str, section: str, limit: Optional[int] = 7) -> List[Dict[str, Any]]:
+    """Parse a saved page and return only the successfully extracted items"""
+    with open(path, 'r', encoding='utf-8') as f:
+        html = f.read()
+    return [item for item in _PARSERS[section](html, limit) if item]
+
+
+def parse_files(paths: List[str], section: str, limit: Optional[int] = 7,
+                workers: Optional[int] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Parse many saved pages in a process pool; returns {path: items}"""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(parse_file, paths, [section] * len(paths), [limit] * len(paths))
+        return dict(zip(paths, results))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in _PARSERS:
+        print("Usage: python html_extract.py posts|comments page.html [page.html ...]")
+        sys.exit(1)
+
+    parsed = parse_files(sys.argv[2:], sys.argv[1], limit=None)
+    print(json.dumps(parsed, indent=2, ensure_ascii=False))
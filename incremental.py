@@ -0,0 +1,75 @@
+"""
+incremental.py - Helpers for incremental scraping against a previous snapshot
+A snapshot is the profile written by RedditSeleniumScraper.save_to_file. Items are identified
+by post URL or, for comments, by parent post URL plus body, so a refresh can stop scrolling
+at the first already-known item and merge only what is new.
+"""
+
+import os
+import json
+from typing import Any, Callable, Iterable, List, Optional, Set
+
+from records import Comment, Post, UserProfile, as_profile
+
+
+def post_key(post: Post) -> str:
+    """Stable identity of a post: its permalink, falling back to its title"""
+    return post.key
+
+
+def comment_key(comment: Comment) -> str:
+    """Stable identity of a comment: parent post URL plus comment body"""
+    return comment.key
+
+
+SECTION_KEYS = {'posts': post_key, 'comments': comment_key}
+
+
+def known_keys(items: Iterable[Any], key: Callable[[Any], str]) -> Set[str]:
+    return {key(item) for item in items if item}
+
+
+def reached_known(items: Iterable[Optional[Any]], key: Callable[[Any], str],
+                  known: Set[str]) -> bool:
+    """True if any extracted item is already in the snapshot"""
+    return any(item and key(item) in known for item in items)
+
+
+def merge_items(new_items: List[Any], old_items: List[Any], key: Callable[[Any], str]) -> List[Any]:
+    """New items first, then previously known ones, without duplicates and re-indexed"""
+    merged = []
+    seen = set()
+    for item in list(new_items) + list(old_items):
+        item_key = key(item)
+        if item_key in seen:
+            continue
+        seen.add(item_key)
+        merged.append(item.reindexed(len(merged)))
+    return merged
+
+
+def snapshot_path(username: str) -> str:
+    """Default file written by save_to_file for username"""
+    return f"{username}_scraped_data.json"
+
+
+def load_snapshot(username: str, snapshot: Any = None) -> Optional[UserProfile]:
+    """Return the previous scrape for username from a profile, a dict, a file path, or the default file"""
+    if isinstance(snapshot, (UserProfile, dict)):
+        return as_profile(snapshot)
+
+    path = snapshot or snapshot_path(username)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Could not load snapshot {path}: {e}")
+        return None
+
+    if data.get('username', '').lower() != username.lower():
+        print(f"Snapshot {path} belongs to {data.get('username')}, ignoring it")
+        return None
+    return UserProfile.from_dict(data)
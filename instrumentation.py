@@ -0,0 +1,260 @@
+"""
+instrumentation.py - Span timers, counters and histograms for the scrapers
+Stages are timed with Metrics.span(), every WebDriver command (page loads, script calls and
+each find_element, including element-level lookups) is counted and timed by wrapping the
+driver's execute(), and selector misses are counted per field. Per-profile metrics roll up
+into a per-batch Metrics, and either can be exported as Prometheus text or JSON.
+"""
+
+import json
+import math
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds in seconds, from single WebDriver round trips up to whole profiles
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+SPAN_SECONDS = "scraper_span_seconds"
+WEBDRIVER_COMMANDS = "scraper_webdriver_commands_total"
+WEBDRIVER_SECONDS = "scraper_webdriver_command_seconds"
+SELECTOR_MISSES = "scraper_selector_misses_total"
+FIELD_MISSING = "scraper_field_missing_total"
+SESSION_RECYCLES = "scraper_session_recycles_total"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style"""
+
+    __slots__ = ('buckets', 'counts', 'count', 'sum', 'max')
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def merge(self, other: "Histogram"):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (capped at the observed max)"""
+        if not self.count:
+            return 0.0
+        rank = math.ceil(q * self.count)
+        seen = 0
+        for bound, count in zip(self.buckets + (math.inf,), self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (math.inf,), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count, 'sum': round(self.sum, 6), 'max': round(self.max, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else 0.0,
+            'p50': self.quantile(0.5), 'p95': self.quantile(0.95),
+            'buckets': {('+Inf' if math.isinf(bound) else str(bound)): count
+                        for bound, count in self.cumulative()},
+        }
+
+
+class Metrics:
+    """Thread-safe counters and histograms; a child forwards everything to its parent too"""
+
+    def __init__(self, parent: Optional["Metrics"] = None, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.parent = parent
+        self.buckets = buckets
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def child(self) -> "Metrics":
+        """New Metrics (e.g. for one profile) whose records also count towards this one"""
+        return Metrics(parent=self, buckets=self.buckets)
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+        if self.parent:
+            self.parent.inc(name, amount, **labels)
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+        if self.parent:
+            self.parent.observe(name, value, **labels)
+
+    @contextmanager
+    def span(self, name: str, **labels) -> Iterator[None]:
+        """Time the enclosed block into the span histogram (failed blocks are timed too)"""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(SPAN_SECONDS, time.monotonic() - started, span=name, **labels)
+
+    def selector_miss(self, field: str, count: int = 1):
+        """A selector in field's fallback chain found nothing (a wasted round trip)"""
+        self.inc(SELECTOR_MISSES, count, field=field)
+
+    def field_missing(self, field: str, count: int = 1):
+        """No selector in field's chain produced a value"""
+        self.inc(FIELD_MISSING, count, field=field)
+
+    def counter(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get((name, _labels(labels)), 0)
+
+    def _by_label(self, name: str, label: str) -> Dict[str, float]:
+        totals: Dict[str, float] = {}
+        with self._lock:
+            for (counter, labels), value in self._counters.items():
+                if counter == name:
+                    key = dict(labels).get(label, '')
+                    totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def _histograms_by_label(self, name: str, label: str) -> Dict[str, Histogram]:
+        merged: Dict[str, Histogram] = {}
+        with self._lock:
+            for (histogram_name, labels), histogram in self._histograms.items():
+                if histogram_name == name:
+                    key = dict(labels).get(label, '')
+                    merged.setdefault(key, Histogram(self.buckets)).merge(histogram)
+        return merged
+
+    def summary(self) -> Dict[str, Any]:
+        """Compact view: time per span, WebDriver round trips and selector misses per field"""
+        spans = {name: {key: value for key, value in histogram.to_dict().items() if key != 'buckets'}
+                 for name, histogram in sorted(self._histograms_by_label(SPAN_SECONDS, 'span').items())}
+        commands = self._by_label(WEBDRIVER_COMMANDS, 'command')
+        return {
+            'spans': spans,
+            'webdriver_round_trips': int(sum(commands.values())),
+            'webdriver_commands': dict(sorted(commands.items(), key=lambda item: -item[1])),
+            'selector_misses': dict(sorted(self._by_label(SELECTOR_MISSES, 'field').items())),
+            'fields_missing': dict(sorted(self._by_label(FIELD_MISSING, 'field').items())),
+        }
+
+    def format_summary(self, title: str = "TIMING") -> str:
+        summary = self.summary()
+        lines = [f"⏱  {title}:"]
+        for name, span in sorted(summary['spans'].items(), key=lambda item: -item[1]['sum']):
+            lines.append(f"   {name:<16} {span['sum']:8.2f}s total  {span['count']:5d}x  "
+                         f"mean {span['mean']:.3f}s  p95 ≤{span['p95']:.3f}s")
+        lines.append(f"   WebDriver round trips: {summary['webdriver_round_trips']}")
+        if summary['selector_misses']:
+            misses = ", ".join(f"{field}={count:g}" for field, count in summary['selector_misses'].items())
+            lines.append(f"   Selector misses: {misses}")
+        return "\n".join(lines)
+
+    def to_json(self) -> Dict[str, Any]:
+        """Every counter and full histogram, plus the summary"""
+        with self._lock:
+            counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                        for (name, labels), value in sorted(self._counters.items())]
+            histograms = [dict(histogram.to_dict(), name=name, labels=dict(labels))
+                          for (name, labels), histogram in sorted(self._histograms.items())]
+        return {'counters': counters, 'histograms': histograms, 'summary': self.summary()}
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        for (name, labels), histogram in histograms:
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            for bound, count in histogram.cumulative():
+                le = "+Inf" if math.isinf(bound) else f"{bound:g}"
+                lines.append(f"{name}_bucket{_format_labels(labels, ('le', le))} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """Export to path: Prometheus text for .prom/.txt files, JSON otherwise"""
+        with open(path, 'w', encoding='utf-8') as f:
+            if path.endswith(('.prom', '.txt')):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.to_json(), f, indent=2)
+        print(f"Metrics written to {path}")
+
+
+def instrument_driver(driver, metrics: Metrics):
+    """Count and time every WebDriver command the session sends into metrics.
+
+    WebElement calls go through their parent driver's execute(), so element-level
+    find_element / text / get_attribute round trips are included. Calling this again (e.g.
+    for the next profile on a pooled session) only redirects where the numbers go.
+    """
+    driver._metrics = metrics
+    if getattr(driver, '_instrumented', False):
+        return driver
+    execute = driver.execute
+
+    def timed_execute(command, params=None):
+        started = time.monotonic()
+        try:
+            return execute(command, params)
+        finally:
+            target = driver._metrics
+            if target is not None:
+                target.inc(WEBDRIVER_COMMANDS, command=command)
+                target.observe(WEBDRIVER_SECONDS, time.monotonic() - started, command=command)
+
+    driver.execute = timed_execute
+    driver._instrumented = True
+    return driver
@@ -0,0 +1,118 @@
+"""
+jsonl_sink.py - Streaming JSONL output for scraped posts and comments
+Every post and comment is appended as one JSON line the moment it is extracted, between a
+'start' line for each scrape attempt and a 'profile' summary line when the user is done, so a
+crashed run keeps everything written so far and consumers can tail the file. A compact manifest with totals is written on close.
+"""
+
+import os
+import json
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from records import Comment, Post, UserProfile
+
+FLUSH_POLICIES = ("record", "profile", "none")
+
+
+class JsonlSink:
+    """Thread-safe append-only JSONL writer with flush/fsync policies"""
+
+    def __init__(self, path: str, flush: str = "record", fsync: bool = False,
+                 manifest_path: Optional[str] = None):
+        if flush not in FLUSH_POLICIES:
+            raise ValueError(f"Unknown flush policy: {flush}")
+        self.path = path
+        self.flush_policy = flush
+        self.fsync = fsync
+        self.manifest_path = manifest_path or f"{os.path.splitext(path)[0]}.manifest.json"
+
+        self._file = open(path, 'a', encoding='utf-8')
+        # The file may hold earlier runs; this session's records start here
+        self.start_offset = os.path.getsize(path)
+        self._lock = threading.Lock()
+        self.started_at = datetime.now().isoformat()
+        self.counts = {'start': 0, 'post': 0, 'comment': 0, 'profile': 0}
+
+    def _sync(self):
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def write(self, record_type: str, username: str, item: Dict[str, Any], scraped_at: Optional[str] = None):
+        """Append one record: {'type', 'username', 'written_at', 'scraped_at', **item}.
+
+        scraped_at is when the item was extracted (default: now); items replayed from the cache
+        or the run journal pass their original time so relative timestamps keep their meaning.
+        """
+        written_at = datetime.now().isoformat()
+        record = {'type': record_type, 'username': username, 'written_at': written_at,
+                  'scraped_at': scraped_at or written_at}
+        record.update(item)
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self.counts[record_type] = self.counts.get(record_type, 0) + 1
+            if self.flush_policy == "record" or (self.flush_policy == "profile" and record_type == "profile"):
+                self._sync()
+
+    def profile(self, username: str) -> "ProfileWriter":
+        """Writer bound to one user, handed to the scrapers.
+
+        Writes a 'start' line first, so readers can drop the items of an earlier attempt for
+        the same user that failed before its 'profile' line.
+        """
+        self.write('start', username, {})
+        return ProfileWriter(self, username)
+
+    def write_manifest(self):
+        """Totals for this session: 'records' and 'bytes' cover the lines written since start_offset"""
+        size = os.path.getsize(self.path)
+        manifest = {
+            'path': os.path.abspath(self.path),
+            'started_at': self.started_at,
+            'updated_at': datetime.now().isoformat(),
+            'records': dict(self.counts),
+            'start_offset': self.start_offset,
+            'bytes': size - self.start_offset,
+            'file_bytes': size,
+        }
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._sync()
+            self._file.close()
+        self.write_manifest()
+        print(f"Streamed {self.counts['post']} posts and {self.counts['comment']} comments "
+              f"for {self.counts['profile']} profiles to {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ProfileWriter:
+    """Appends one user's posts and comments to a JsonlSink"""
+
+    def __init__(self, sink: JsonlSink, username: str):
+        self.sink = sink
+        self.username = username
+
+    def post(self, post: Post, scraped_at: Optional[str] = None):
+        self.sink.write('post', self.username, post.to_dict(), scraped_at)
+
+    def comment(self, comment: Comment, scraped_at: Optional[str] = None):
+        self.sink.write('comment', self.username, comment.to_dict(), scraped_at)
+
+    def finish(self, profile: UserProfile):
+        """Write the profile summary line (everything except the item lists)"""
+        self.sink.write('profile', self.username, profile.summary())
@@ -0,0 +1,186 @@
+"""
+lean.py - "Lean" Chrome sessions for text-only scraping, and a benchmark for them
+The scrapers only read text, links and scores, so lean sessions use the eager page-load
+strategy (driver.get returns at DOMContentLoaded), block images, media, fonts and
+analytics/tracking requests through CDP, and render into a smaller viewport.
+Run this module to compare page-load time, bytes received (from CDP network events) and
+browser memory of normal and lean sessions on the same pages.
+"""
+
+import sys
+import json
+import time
+import argparse
+from typing import Any, Dict, List, Optional, Sequence
+
+from driver_pool import browser_memory_mb
+
+LEAN_WINDOW_SIZE = "1280,900"
+
+# Chrome's Network.setBlockedURLs patterns ('*' is the only wildcard)
+BLOCKED_RESOURCE_PATTERNS = [
+    # images
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico", "*.bmp",
+    "*i.redd.it/*", "*preview.redd.it/*", "*external-preview.redd.it/*",
+    "*styles.redditmedia.com/*", "*emoji.redditmedia.com/*", "*thumbs.redditmedia.com/*",
+    # video and audio
+    "*.mp4", "*.webm", "*.m3u8", "*.mpd", "*.m4s", "*.ts", "*.mp3", "*.ogg",
+    "*v.redd.it/*",
+    # fonts
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    # analytics, ads and tracking
+    "*google-analytics.com/*", "*googletagmanager.com/*", "*googletagservices.com/*",
+    "*doubleclick.net/*", "*googlesyndication.com/*", "*adservice.google.com/*",
+    "*facebook.net/*", "*connect.facebook.net/*", "*redditstatic.com/ads/*",
+    "*w3-reporting.reddit.com/*", "*error-tracking.reddit.com/*", "*events.reddit.com/*",
+    "*alb.reddit.com/*", "*amazon-adsystem.com/*", "*scorecardresearch.com/*",
+]
+
+
+def apply_lean_options(chrome_options, window_size: str = LEAN_WINDOW_SIZE):
+    """Eager page loads, a smaller viewport and no image decoding for a new session"""
+    chrome_options.page_load_strategy = "eager"
+    chrome_options.add_argument(f"--window-size={window_size}")
+    chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+    chrome_options.add_argument("--mute-audio")
+    chrome_options.add_argument("--disable-remote-fonts")
+    chrome_options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+    })
+
+
+def block_resources(driver, patterns: Sequence[str] = BLOCKED_RESOURCE_PATTERNS):
+    """Make the browser fail matching requests before they leave it (lasts for the session)"""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {'urls': list(patterns)})
+
+
+# Navigation timing and resource count. Resource Timing is not used for bytes: transferSize is
+# 0 for cross-origin responses without Timing-Allow-Origin, which includes Reddit's media CDNs
+_PAGE_COST_JS = r"""
+var nav = performance.getEntriesByType('navigation')[0] || {};
+return {
+    dom_content_loaded: nav.domContentLoadedEventEnd || null,
+    load: nav.loadEventEnd || null,
+    resources: performance.getEntriesByType('resource').length
+};
+"""
+
+
+def page_cost(driver) -> Dict[str, Any]:
+    """Timing the browser recorded for the current page"""
+    return driver.execute_script(_PAGE_COST_JS) or {}
+
+
+def network_totals(driver) -> Dict[str, int]:
+    """Bytes received, requests finished and requests blocked since the last call.
+
+    Read from the CDP Network events in Chrome's performance log (the session must be created
+    with performance_log=True). encodedDataLength counts every response, whatever its origin.
+    """
+    totals = {'bytes': 0, 'requests': 0, 'blocked': 0}
+    for entry in driver.get_log('performance'):
+        message = json.loads(entry['message']).get('message', {})
+        method, params = message.get('method'), message.get('params', {})
+        if method == 'Network.loadingFinished':
+            totals['bytes'] += int(params.get('encodedDataLength') or 0)
+            totals['requests'] += 1
+        elif method == 'Network.loadingFailed' and params.get('blockedReason'):
+            totals['blocked'] += 1
+    return totals
+
+
+def measure_page(driver, url: str, settle: float = 2.0) -> Dict[str, Any]:
+    """Load url and report time to driver.get() returning, bytes received and browser memory.
+
+    settle seconds are allowed after the load so late requests (lazy images, analytics) are
+    counted too, as they would be while a scraper scrolls and extracts.
+    """
+    network_totals(driver)  # drop events from earlier pages
+    started = time.monotonic()
+    driver.get(url)
+    get_seconds = time.monotonic() - started
+    time.sleep(settle)
+    cost = page_cost(driver)
+    network = network_totals(driver)
+    return {
+        'url': url,
+        'get_seconds': get_seconds,
+        'dom_content_loaded_ms': cost.get('dom_content_loaded'),
+        'resources': cost.get('resources', 0),
+        'requests': network['requests'],
+        'blocked': network['blocked'],
+        'bytes': network['bytes'],
+        'memory_mb': browser_memory_mb(driver),
+    }
+
+
+def _summarize(runs: List[Dict[str, Any]]) -> Dict[str, Optional[float]]:
+    def mean(key):
+        values = [run[key] for run in runs if run.get(key) is not None]
+        return sum(values) / len(values) if values else None
+
+    return {key: mean(key) for key in ('get_seconds', 'dom_content_loaded_ms', 'resources', 'requests',
+                                       'blocked', 'bytes', 'memory_mb')}
+
+
+def benchmark(urls: Sequence[str], repeats: int = 1, headless: bool = True,
+              settle: float = 2.0) -> Dict[str, Dict[str, Optional[float]]]:
+    """Average per-page cost of a normal and a lean session over the same URLs"""
+    from scrape import RedditSeleniumScraper  # scrape imports this module
+
+    results = {}
+    for mode, lean in (("normal", False), ("lean", True)):
+        driver = RedditSeleniumScraper(headless=headless, lean=lean).create_driver(performance_log=True)
+        try:
+            runs = []
+            for _ in range(repeats):
+                for url in urls:
+                    run = measure_page(driver, url, settle)
+                    print(f"[{mode}] {url}: {run['get_seconds']:.2f}s, "
+                          f"{run['bytes'] / 1024:.0f} KiB in {run['requests']} requests, {run['blocked']} blocked")
+                    runs.append(run)
+                    # Start every page from a cold HTTP cache so the modes stay comparable
+                    driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+            results[mode] = _summarize(runs)
+        finally:
+            driver.quit()
+    return results
+
+
+def _format_change(normal: Optional[float], lean: Optional[float]) -> str:
+    if not normal or lean is None:
+        return "n/a"
+    return f"{(lean - normal) / normal * 100:+.0f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare page-load cost of normal and lean Chrome sessions")
+    parser.add_argument("urls", nargs="*", default=["https://www.reddit.com/user/spez/submitted/",
+                                                    "https://www.reddit.com/user/spez/comments/"])
+    parser.add_argument("--repeats", type=int, default=2, help="Loads per URL and mode")
+    parser.add_argument("--settle", type=float, default=2.0, help="Seconds to let late requests finish")
+    parser.add_argument("--show-browser", action="store_true", help="Run Chrome with a visible window")
+    args = parser.parse_args()
+
+    results = benchmark(args.urls, repeats=args.repeats, headless=not args.show_browser, settle=args.settle)
+    normal, lean = results["normal"], results["lean"]
+    print("\n📊 LEAN MODE BENCHMARK (mean per page)")
+    rows = [
+        ("driver.get()", 'get_seconds', lambda v: f"{v:.2f}s"),
+        ("DOMContentLoaded", 'dom_content_loaded_ms', lambda v: f"{v:.0f}ms"),
+        ("resources", 'resources', lambda v: f"{v:.0f}"),
+        ("requests", 'requests', lambda v: f"{v:.0f}"),
+        ("blocked", 'blocked', lambda v: f"{v:.0f}"),
+        ("received", 'bytes', lambda v: f"{v / 1024:.0f} KiB"),
+        ("browser memory", 'memory_mb', lambda v: f"{v:.0f} MB"),
+    ]
+    for label, key, fmt in rows:
+        before = fmt(normal[key]) if normal[key] is not None else "n/a"
+        after = fmt(lean[key]) if lean[key] is not None else "n/a"
+        print(f"   {label:<18} {before:>12} → {after:>12}  ({_format_change(normal[key], lean[key])})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
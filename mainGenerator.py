@@ -2,22 +2,58 @@ import json
 import google.generativeai as genai
 from datetime import datetime
 import re
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Union, Iterator, AsyncIterator
 import os
+import asyncio
+import threading
+from records import UserProfile, as_profile
+from disk_cache import PersonaCache
+from prompt_packing import pack_content
+from text_features import analyze_profiles, summarize_features
+from persona_stream import SectionSplitter, PersonaFileWriter, split_sections
 
 class RedditPersonaGenerator:
-    def __init__(self, api_key: str):
-        """Initialize the persona generator with Gemini API key"""
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-pro')
+    def __init__(self, api_key: str = None, model_name: str = 'gemini-pro',
+                 generation_config: Dict[str, Any] = None, cache: PersonaCache = None,
+                 model=None, rate_limiter=None, token_budget: int = 1500,
+                 max_item_tokens: int = 300, keyword_reference: Dict[str, Any] = None):
+        """Initialize the persona generator with Gemini API key.
+        
+        With a PersonaCache, responses are stored under a hash of model name, prompt and
+        generation_config, so regenerating from unchanged data makes no API call.
+        model replaces the Gemini client with any object exposing generate_content(_async)
+        (e.g. persona_batch.FakeModel); rate_limiter.acquire() is called before every API call.
+        token_budget bounds the Reddit content packed into each prompt (see prompt_packing).
+        keyword_reference is a text_features.build_reference corpus to rank keywords against.
+        """
+        self.model_name = model_name
+        if model is None:
+            genai.configure(api_key=api_key)
+            model = genai.GenerativeModel(model_name)
+        self.model = model
+        self.rate_limiter = rate_limiter
+        self.token_budget = token_budget
+        self.max_item_tokens = max_item_tokens
+        self.keyword_reference = keyword_reference
+        self.generation_config = generation_config
+        self.cache = cache
+        # Updated from PersonaBatchRunner worker threads, so only under _counter_lock
+        self.llm_calls = 0
+        self.cache_hits = 0
+        self._counter_lock = threading.Lock()
     
-    def analyze_reddit_data(self, reddit_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Analyze Reddit data to extract key insights"""
+    def analyze_reddit_data(self, reddit_data: Union[UserProfile, Dict[str, Any]],
+                            features: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Analyze Reddit data (a UserProfile or save_to_file dict) to extract key insights.
+        
+        features are the user's text_features.analyze_profiles entry; batch callers pass them
+        in so they are computed for many users at once.
+        """
         
         # Extract basic info
-        username = reddit_data.get('username', '')
-        posts = reddit_data.get('posts', [])
-        comments = reddit_data.get('comments', [])
+        profile = as_profile(reddit_data)
+        if features is None:
+            features = analyze_profiles([profile], reference=self.keyword_reference)[0]
         
         # Analyze posting patterns
         subreddits = set()
@@ -25,40 +61,36 @@ class RedditPersonaGenerator:
         engagement_style = []
         
         # Process posts
-        for post in posts:
-            subreddits.add(post.get('subreddit', ''))
-            topics.append(post.get('title', ''))
-            topics.append(post.get('content', ''))
+        for post in profile.posts:
+            subreddits.add(post.subreddit or '')
+            topics.append(post.title or '')
+            topics.append(post.content or '')
         
         # Process comments
-        for comment in comments:
-            engagement_style.append(comment.get('body', ''))
+        for comment in profile.comments:
+            engagement_style.append(comment.body or '')
         
         return {
-            'username': username,
-            'total_posts': len(posts),
-            'total_comments': len(comments),
-            'subreddits': list(subreddits),
+            'username': profile.username,
+            'total_posts': profile.total_posts,
+            'total_comments': profile.total_comments,
+            'subreddits': sorted(subreddits),
             'content_sample': topics + engagement_style,
-            'posts_data': posts,
-            'comments_data': comments
+            'features': features,
+            'profile': profile
         }
     
-    def generate_persona_prompt(self, analysis: Dict[str, Any]) -> str:
+    def generate_persona_prompt(self, analysis: Dict[str, Any], token_budget: int = None,
+                                max_item_tokens: int = None) -> str:
         """Generate a comprehensive prompt for persona creation"""
         
-        # Combine all text content for analysis
-        all_content = []
-        
-        # Add post titles and content
-        for post in analysis['posts_data']:
-            all_content.append(f"POST: {post.get('title', '')} - {post.get('content', '')}")
+        # Fill the content budget with deduplicated, recent posts/comments from many subreddits
+        all_content = pack_content(analysis['profile'],
+                                   token_budget=token_budget or self.token_budget,
+                                   max_item_tokens=max_item_tokens or self.max_item_tokens)
         
-        # Add comments
-        for comment in analysis['comments_data']:
-            all_content.append(f"COMMENT: {comment.get('body', '')}")
-        
-        content_text = "\n".join(all_content[:20])  # Limit to avoid token limits
+        content_text = "\n".join(all_content)
+        features_text = "\n        ".join(summarize_features(analysis['features']).splitlines())
         
         prompt = f"""
         Based on the following Reddit user data, create a detailed user persona in the style of a professional UX/Marketing persona document. 
@@ -68,6 +100,9 @@ class RedditPersonaGenerator:
         TOTAL COMMENTS: {analysis['total_comments']}
         ACTIVE SUBREDDITS: {', '.join(analysis['subreddits'])}
 
+        ACTIVITY SUMMARY:
+        {features_text}
+
         CONTENT ANALYSIS:
         {content_text}
 
@@ -123,7 +158,7 @@ class RedditPersonaGenerator:
         
         return prompt
     
-    def generate_persona(self, reddit_data: Dict[str, Any]) -> str:
+    def generate_persona(self, reddit_data: Union[UserProfile, Dict[str, Any]]) -> str:
         """Generate a complete persona from Reddit data"""
         
         try:
@@ -133,35 +168,170 @@ class RedditPersonaGenerator:
             # Generate prompt
             prompt = self.generate_persona_prompt(analysis)
             
-            # Call Gemini API
-            response = self.model.generate_content(prompt)
+            return self.complete(prompt)
+            
+        except Exception as e:
+            return f"Error generating persona: {str(e)}"
+    
+    async def generate_persona_async(self, reddit_data: Union[UserProfile, Dict[str, Any]]) -> str:
+        """Generate a complete persona from Reddit data without blocking the event loop"""
+        
+        try:
+            analysis = self.analyze_reddit_data(reddit_data)
+            prompt = self.generate_persona_prompt(analysis)
             
-            return response.text
+            return await self.complete_async(prompt)
             
         except Exception as e:
             return f"Error generating persona: {str(e)}"
     
+    def complete(self, prompt: str) -> str:
+        """Persona text for a prompt, from the cache or the model; API errors propagate"""
+        cached = self._cached_response(prompt)
+        if cached is not None:
+            return cached
+        
+        # Call Gemini API
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        self._count_llm_call()
+        if self.generation_config:
+            response = self.model.generate_content(prompt, generation_config=self.generation_config)
+        else:
+            response = self.model.generate_content(prompt)
+        
+        return self._store_response(prompt, response.text)
+    
+    async def complete_async(self, prompt: str) -> str:
+        """Async variant of complete using the native async Gemini call"""
+        cached = self._cached_response(prompt)
+        if cached is not None:
+            return cached
+        
+        if self.rate_limiter:
+            await asyncio.get_running_loop().run_in_executor(None, self.rate_limiter.acquire)
+        self._count_llm_call()
+        if self.generation_config:
+            response = await self.model.generate_content_async(prompt, generation_config=self.generation_config)
+        else:
+            response = await self.model.generate_content_async(prompt)
+        
+        return self._store_response(prompt, response.text)
+    
+    def generate_persona_stream(self, reddit_data: Union[UserProfile, Dict[str, Any]],
+                                filename: str = None) -> Iterator[str]:
+        """Yield persona sections as the model produces them, appending each chunk to filename.
+        
+        API errors propagate to the caller; the partial file is left in place.
+        """
+        prompt = self.generate_persona_prompt(self.analyze_reddit_data(reddit_data))
+        cached = self._cached_response(prompt)
+        with PersonaFileWriter(filename) as writer:
+            if cached is not None:
+                writer.write(cached)
+                yield from split_sections(cached)
+                return
+            
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            self._count_llm_call()
+            kwargs = {'generation_config': self.generation_config} if self.generation_config else {}
+            splitter = SectionSplitter()
+            chunks = []
+            for chunk in self.model.generate_content(prompt, stream=True, **kwargs):
+                chunks.append(chunk.text)
+                writer.write(chunk.text)
+                yield from splitter.feed(chunk.text)
+            yield from splitter.flush()
+        self._store_response(prompt, "".join(chunks))
+    
+    async def generate_persona_stream_async(self, reddit_data: Union[UserProfile, Dict[str, Any]],
+                                            filename: str = None) -> AsyncIterator[str]:
+        """Async-iterator variant of generate_persona_stream"""
+        prompt = self.generate_persona_prompt(self.analyze_reddit_data(reddit_data))
+        cached = self._cached_response(prompt)
+        with PersonaFileWriter(filename) as writer:
+            if cached is not None:
+                writer.write(cached)
+                for section in split_sections(cached):
+                    yield section
+                return
+            
+            if self.rate_limiter:
+                await asyncio.get_running_loop().run_in_executor(None, self.rate_limiter.acquire)
+            self._count_llm_call()
+            kwargs = {'generation_config': self.generation_config} if self.generation_config else {}
+            splitter = SectionSplitter()
+            chunks = []
+            response = await self.model.generate_content_async(prompt, stream=True, **kwargs)
+            async for chunk in response:
+                chunks.append(chunk.text)
+                writer.write(chunk.text)
+                for section in splitter.feed(chunk.text):
+                    yield section
+            for section in splitter.flush():
+                yield section
+        self._store_response(prompt, "".join(chunks))
+    
+    def _cached_response(self, prompt: str) -> str:
+        """Previously generated persona for an identical request, if cached"""
+        if not self.cache:
+            return None
+        text = self.cache.get_response(self.model_name, prompt, self.generation_config)
+        if text is not None:
+            with self._counter_lock:
+                self.cache_hits += 1
+                hits, calls = self.cache_hits, self.llm_calls
+            print(f"Using cached persona ({hits} cache hits, {calls} API calls)")
+        return text
+    
+    def _count_llm_call(self):
+        with self._counter_lock:
+            self.llm_calls += 1
+    
+    def _store_response(self, prompt: str, text: str) -> str:
+        if self.cache:
+            self.cache.put_response(self.model_name, prompt, text, self.generation_config)
+        return text
+    
+    @staticmethod
+    def default_persona_filename() -> str:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return f"reddit_persona_{timestamp}.md"
+    
     def save_persona(self, persona_text: str, filename: str = None):
         """Save persona to a file"""
         if filename is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"reddit_persona_{timestamp}.md"
+            filename = self.default_persona_filename()
         
         with open(filename, 'w', encoding='utf-8') as f:
             f.write(persona_text)
         
         print(f"Persona saved to {filename}")
 
+def _stream_persona(generator: RedditPersonaGenerator, reddit_data: Union[UserProfile, Dict[str, Any]]) -> str:
+    """Print each persona section as soon as it is generated; the file grows as it streams"""
+    print("Generating persona (streaming)...")
+    sections = []
+    for section in generator.generate_persona_stream(reddit_data, generator.default_persona_filename()):
+        print(section, end="", flush=True)
+        sections.append(section)
+    return "".join(sections)
+
 # Example usage function
-def create_persona_from_json(json_file_path: str, api_key: str):
+def create_persona_from_json(json_file_path: str, api_key: str, cache: PersonaCache = None,
+                             stream: bool = False):
     """Main function to create persona from JSON file"""
     
     # Load JSON data
     with open(json_file_path, 'r', encoding='utf-8') as f:
-        reddit_data = json.load(f)
+        reddit_data = UserProfile.from_dict(json.load(f))
     
     # Initialize generator
-    generator = RedditPersonaGenerator(api_key)
+    generator = RedditPersonaGenerator(api_key, cache=cache)
+    
+    if stream:
+        return _stream_persona(generator, reddit_data)
     
     # Generate persona
     print("Generating persona...")
@@ -173,11 +343,15 @@ def create_persona_from_json(json_file_path: str, api_key: str):
     return persona
 
 # Alternative: Direct usage with your existing data
-def create_persona_from_data(reddit_data: Dict[str, Any], api_key: str):
-    """Create persona directly from dictionary data"""
+def create_persona_from_data(reddit_data: Union[UserProfile, Dict[str, Any]], api_key: str,
+                             cache: PersonaCache = None, stream: bool = False):
+    """Create persona directly from a scraped UserProfile or dictionary data"""
     
     # Initialize generator
-    generator = RedditPersonaGenerator(api_key)
+    generator = RedditPersonaGenerator(api_key, cache=cache)
+    
+    if stream:
+        return _stream_persona(generator, reddit_data)
     
     # Generate persona
     print("Generating persona...")
@@ -0,0 +1,88 @@
+"""
+normalize.py - Parsing of Reddit's display strings into typed values
+Scores ("1.2k", "5 points"), counts ("12 comments") and timestamps (ISO datetimes or
+relative strings such as "1 yr. ago") as they appear in scraped post/comment dicts.
+"""
+
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Union
+
+_NUMBER = re.compile(r'(-?\d+(?:\.\d+)?)\s*([km])?\b', re.IGNORECASE)
+_THOUSANDS = re.compile(r'(?<=\d),(?=\d)')
+_RELATIVE = re.compile(r'(\d+)\s*([a-z]+)\.?\s*ago', re.IGNORECASE)
+
+_UNIT_SECONDS = {
+    's': 1, 'sec': 1, 'secs': 1, 'second': 1, 'seconds': 1,
+    'm': 60, 'min': 60, 'mins': 60, 'minute': 60, 'minutes': 60,
+    'h': 3600, 'hr': 3600, 'hrs': 3600, 'hour': 3600, 'hours': 3600,
+    'd': 86400, 'day': 86400, 'days': 86400,
+    'w': 7 * 86400, 'wk': 7 * 86400, 'wks': 7 * 86400, 'week': 7 * 86400, 'weeks': 7 * 86400,
+    'mo': 30 * 86400, 'mos': 30 * 86400, 'month': 30 * 86400, 'months': 30 * 86400,
+    'y': 365 * 86400, 'yr': 365 * 86400, 'yrs': 365 * 86400, 'year': 365 * 86400, 'years': 365 * 86400,
+}
+
+
+def parse_count(text: Optional[str]) -> Optional[int]:
+    """Parse '42', '1,234', '1.2k', '3M', '5 points' or '12 comments' into an int"""
+    if not text:
+        return None
+    match = _NUMBER.search(_THOUSANDS.sub('', text.replace('−', '-')))
+    if not match:
+        return None
+    value = float(match.group(1))
+    suffix = (match.group(2) or '').lower()
+    if suffix == 'k':
+        value *= 1_000
+    elif suffix == 'm':
+        value *= 1_000_000
+    return int(round(value))
+
+
+# Scores and comment counts share the same display format
+parse_score = parse_count
+
+
+def to_utc(value: Union[str, datetime, None]) -> Optional[datetime]:
+    """Parse an ISO string or datetime to an aware UTC datetime; naive values are taken as local time"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    return value.astimezone(timezone.utc)
+
+
+def is_absolute_timestamp(text: Optional[str]) -> bool:
+    """True for ISO datetimes, False for relative strings such as '5h ago'"""
+    return bool(text) and ('T' in text or '-' in text.strip()[:5])
+
+
+def parse_timestamp(text: Optional[str], reference: Union[str, datetime, None] = None) -> Optional[datetime]:
+    """Resolve an ISO or relative ('1 yr. ago', '5h ago', 'just now') timestamp to aware UTC.
+
+    Relative values are resolved against reference (e.g. the scrape's scraped_at), or now.
+    """
+    if not text:
+        return None
+    text = text.strip()
+
+    absolute = to_utc(text) if is_absolute_timestamp(text) else None
+    if absolute:
+        return absolute
+
+    base = to_utc(reference) if reference else datetime.now(timezone.utc)
+    if base is None:
+        return None
+    if text.lower() in ('just now', 'now'):
+        return base
+
+    match = _RELATIVE.search(text)
+    if not match:
+        return None
+    seconds = _UNIT_SECONDS.get(match.group(2).lower())
+    if seconds is None:
+        return None
+    return base - timedelta(seconds=int(match.group(1)) * seconds)
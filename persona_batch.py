@@ -0,0 +1,297 @@
+"""
+persona_batch.py - Concurrent persona generation for many scraped users
+One shared RedditPersonaGenerator (one Gemini client, one genai.configure) serves a bounded
+pool of worker threads. API calls go through a token bucket, failed calls are retried with
+exponential backoff and full jitter, and each persona is written as soon as it completes.
+FakeModel stands in for Gemini so throughput can be benchmarked offline.
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import random
+import asyncio
+import argparse
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Union
+
+from mainGenerator import RedditPersonaGenerator
+from disk_cache import PersonaCache
+from records import UserProfile, as_profile
+from text_features import analyze_profiles, load_reference
+
+
+class TokenBucket:
+    """Thread-safe token bucket: rate calls per second on average, bursts of up to capacity"""
+
+    def __init__(self, rate: float = 1.0, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until tokens are available; callers queue up in arrival order"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve now, even if that leaves the bucket in debt, and wait off the lock
+            self._tokens -= tokens
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if delay > 0:
+            time.sleep(delay)
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeModel:
+    """Offline stand-in for genai.GenerativeModel with configurable latency and failures"""
+
+    def __init__(self, latency: float = 1.0, jitter: float = 0.25, failure_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _next_call(self):
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            failed = self._random.random() < self.failure_rate
+        return delay, failed
+
+    @staticmethod
+    def _text(prompt: str) -> str:
+        sections = ["# Persona (fake model)\n\n", f"Generated from a {len(prompt)}-character prompt.\n\n"]
+        for number, title in enumerate(("DEMOGRAPHICS", "PSYCHOGRAPHICS", "DIGITAL BEHAVIOR", "KEY INSIGHTS"), 1):
+            sections.append(f"**{number}. {title}**\n- placeholder\n\n")
+        return "".join(sections)
+
+    @staticmethod
+    def _chunks(text: str, size: int = 40) -> List[str]:
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    def _stream(self, text: str, delay: float) -> Iterator[FakeResponse]:
+        chunks = self._chunks(text)
+        for chunk in chunks:
+            time.sleep(delay / len(chunks))
+            yield FakeResponse(chunk)
+
+    async def _stream_async(self, text: str, delay: float) -> AsyncIterator[FakeResponse]:
+        chunks = self._chunks(text)
+        for chunk in chunks:
+            await asyncio.sleep(delay / len(chunks))
+            yield FakeResponse(chunk)
+
+    def generate_content(self, prompt: str, generation_config: Any = None, stream: bool = False):
+        delay, failed = self._next_call()
+        if failed:
+            time.sleep(delay)
+            raise RuntimeError("fake model: simulated API error")
+        if stream:
+            return self._stream(self._text(prompt), delay)
+        time.sleep(delay)
+        return FakeResponse(self._text(prompt))
+
+    async def generate_content_async(self, prompt: str, generation_config: Any = None, stream: bool = False):
+        delay, failed = self._next_call()
+        if failed:
+            await asyncio.sleep(delay)
+            raise RuntimeError("fake model: simulated API error")
+        if stream:
+            return self._stream_async(self._text(prompt), delay)
+        await asyncio.sleep(delay)
+        return FakeResponse(self._text(prompt))
+
+
+def _read_jsonl_profiles(path: str) -> Iterator[UserProfile]:
+    """Group a jsonl_sink stream back into profiles; each is complete once its 'profile' line arrives"""
+    pending: Dict[str, Dict[str, Any]] = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            username = record.get('username')
+            record_type = record.get('type')
+            if record_type == 'start':
+                # A new attempt for this user: items of an earlier attempt that never reached
+                # its 'profile' line are dropped rather than merged into this one
+                pending.pop(username, None)
+                continue
+            data = pending.setdefault(username, {'username': username, 'posts': [], 'comments': []})
+            if record_type == 'post':
+                data['posts'].append(record)
+            elif record_type == 'comment':
+                data['comments'].append(record)
+            elif record_type == 'profile':
+                data.update(profile_url=record.get('profile_url'), scraped_at=record.get('scraped_at'))
+                yield UserProfile.from_dict(pending.pop(username))
+
+
+def iter_scrape_outputs(source: Union[str, Iterable[Any]]) -> Iterator[UserProfile]:
+    """Yield profiles from a directory of *_scraped_data.json files, one JSON or JSONL file,
+    or any iterable of UserProfile objects / save_to_file dicts"""
+    if not isinstance(source, str):
+        for data in source:
+            yield as_profile(data)
+        return
+
+    if os.path.isdir(source):
+        paths = sorted(glob.glob(os.path.join(source, "*_scraped_data.json")))
+    elif source.endswith('.jsonl'):
+        yield from _read_jsonl_profiles(source)
+        return
+    else:
+        paths = [source]
+
+    for path in paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                yield UserProfile.from_dict(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"Skipping {path}: {e}")
+
+
+class PersonaBatchRunner:
+    """Generate personas for many users with bounded concurrency and retries"""
+
+    def __init__(self, generator: RedditPersonaGenerator, concurrency: int = 4,
+                 max_retries: int = 3, backoff: float = 1.0, max_backoff: float = 30.0,
+                 output_dir: Optional[str] = "personas"):
+        self.generator = generator
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.output_dir = output_dir
+
+    def _generate(self, profile: UserProfile, features: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        started = time.monotonic()
+        analysis = self.generator.analyze_reddit_data(profile, features)
+        prompt = self.generator.generate_persona_prompt(analysis)
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                persona = self.generator.complete(prompt)
+                break
+            except Exception as e:
+                if attempt == self.max_retries:
+                    print(f"✗ {profile.username}: giving up after {attempt + 1} attempts: {e}")
+                    return {'username': profile.username, 'status': 'error', 'attempts': attempt + 1,
+                            'elapsed': time.monotonic() - started, 'error': str(e)}
+                # Full jitter keeps retrying workers from hitting the API in lockstep
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+                print(f"Retrying {profile.username} in {delay:.1f}s ({e})")
+                time.sleep(delay)
+
+        result = {'username': profile.username, 'status': 'ok', 'attempts': attempt + 1,
+                  'elapsed': time.monotonic() - started, 'persona': persona}
+        if self.output_dir:
+            filename = os.path.join(self.output_dir, f"{profile.username}_persona.md")
+            self.generator.save_persona(persona, filename)
+            result['path'] = filename
+        return result
+
+    def generate(self, profile: UserProfile, features: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Persona for one profile as a result dict; never raises"""
+        try:
+            return self._generate(profile, features)
+        except Exception as e:
+            traceback.print_exc()
+            return {'username': profile.username, 'status': 'error', 'attempts': 0,
+                    'elapsed': 0.0, 'error': str(e)}
+
+    def run(self, source: Union[str, Iterable[Any]]) -> Iterator[Dict[str, Any]]:
+        """Generate a persona per profile in source and yield one result dict per user as it finishes"""
+        if self.output_dir:
+            os.makedirs(self.output_dir, exist_ok=True)
+
+        profiles = iter_scrape_outputs(source)
+        pending = set()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while True:
+                # Top up to 2x concurrency profiles in flight, never more loaded at once; text
+                # features for the top-up are vectorized in one call (grouping does not change
+                # them, so prompts and cache keys match single-profile runs)
+                chunk = list(islice(profiles, self.concurrency * 2 - len(pending)))
+                if not chunk:
+                    break
+                features_list = analyze_profiles(chunk, reference=self.generator.keyword_reference)
+                for profile, features in zip(chunk, features_list):
+                    pending.add(executor.submit(self.generate, profile, features))
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate personas for many scraped users")
+    parser.add_argument("source", help="Directory of *_scraped_data.json files, a JSON file or a JSONL stream")
+    parser.add_argument("--api-key", default=os.environ.get("GEMINI_API_KEY"), help="Gemini API key")
+    parser.add_argument("--model", default="gemini-pro", help="Gemini model name")
+    parser.add_argument("--concurrency", type=int, default=4, help="Requests in flight at once")
+    parser.add_argument("--rate", type=float, default=1.0, help="Average API calls per second")
+    parser.add_argument("--burst", type=float, default=None, help="Token bucket capacity")
+    parser.add_argument("--retries", type=int, default=3, help="Retries per user after a failed call")
+    parser.add_argument("--output-dir", default="personas", help="Directory for persona markdown files")
+    parser.add_argument("--cache-dir", default=None, help="Reuse responses for identical prompts from this cache")
+    parser.add_argument("--keyword-reference", default=None,
+                        help="Reference corpus from text_features.py to rank keywords against")
+    parser.add_argument("--fake-model", type=float, default=None, metavar="LATENCY",
+                        help="Benchmark with an offline fake model answering in LATENCY seconds")
+    parser.add_argument("--fake-failure-rate", type=float, default=0.0,
+                        help="Fraction of fake model calls that fail")
+    args = parser.parse_args()
+
+    model = None
+    if args.fake_model is not None:
+        model = FakeModel(latency=args.fake_model, jitter=args.fake_model / 4,
+                          failure_rate=args.fake_failure_rate)
+    elif not args.api_key:
+        parser.error("--api-key or GEMINI_API_KEY is required unless --fake-model is used")
+
+    generator = RedditPersonaGenerator(
+        args.api_key, model_name=args.model, model=model,
+        cache=PersonaCache(args.cache_dir) if args.cache_dir else None,
+        rate_limiter=TokenBucket(args.rate, args.burst),
+        keyword_reference=load_reference(args.keyword_reference) if args.keyword_reference else None,
+    )
+    runner = PersonaBatchRunner(generator, concurrency=args.concurrency,
+                                max_retries=args.retries, output_dir=args.output_dir)
+
+    started = time.monotonic()
+    ok = failed = 0
+    for result in runner.run(args.source):
+        if result['status'] == 'ok':
+            ok += 1
+            print(f"✓ {result['username']} in {result['elapsed']:.1f}s ({result['attempts']} attempts)")
+        else:
+            failed += 1
+            print(f"✗ {result['username']}: {result['error']}")
+
+    elapsed = time.monotonic() - started
+    print(f"\n📊 PERSONA BATCH SUMMARY: {ok} succeeded, {failed} failed in {elapsed:.1f}s "
+          f"({(ok + failed) / elapsed if elapsed else 0:.2f} users/s, "
+          f"{generator.llm_calls} API calls, {generator.cache_hits} cache hits)")
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+persona_stream.py - Section splitting and incremental file output for streamed personas
+The model streams the persona document in arbitrary chunks; SectionSplitter regroups them
+into whole sections (split at markdown headings / numbered bold headings) so callers can
+render each section as soon as it is complete, while PersonaFileWriter appends every chunk
+to disk the moment it arrives.
+"""
+
+import re
+from typing import List, Optional
+
+# '# Heading', '**1. DEMOGRAPHICS**', '1. **DEMOGRAPHICS**' or '**PERSONA NAME & TAGLINE**'
+SECTION_HEADING = re.compile(r"^\s*(#{1,6}\s|\*\*\d+\.|\d+\.\s+\*\*|\*\*[A-Z][A-Z0-9 &/,'()-]+\*\*:?\s*$)")
+
+
+class SectionSplitter:
+    """Regroup streamed text chunks into complete persona sections"""
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, chunk: str) -> List[str]:
+        """Add a chunk; return the sections it completed"""
+        self._buffer += chunk
+        sections = []
+        # Only whole lines can be classified; the trailing partial line stays buffered
+        start = 0
+        lines_end = self._buffer.rfind("\n")
+        position = 0
+        while position <= lines_end:
+            line_end = self._buffer.index("\n", position)
+            line = self._buffer[position:line_end]
+            if position > start and SECTION_HEADING.match(line):
+                section = self._buffer[start:position]
+                if section.strip():
+                    sections.append(section)
+                start = position
+            position = line_end + 1
+        self._buffer = self._buffer[start:]
+        return sections
+
+    def flush(self) -> List[str]:
+        """Return whatever remains once the stream has ended"""
+        rest, self._buffer = self._buffer, ""
+        return [rest] if rest.strip() else []
+
+
+def split_sections(text: str) -> List[str]:
+    """Split a complete persona document the same way a stream would be split"""
+    splitter = SectionSplitter()
+    return splitter.feed(text) + splitter.flush()
+
+
+class PersonaFileWriter:
+    """Append streamed persona text to a file, flushing after every chunk"""
+
+    def __init__(self, filename: Optional[str]):
+        self.filename = filename
+        self._file = open(filename, 'w', encoding='utf-8') if filename else None
+
+    def write(self, chunk: str):
+        if self._file:
+            self._file.write(chunk)
+            self._file.flush()
+
+    def close(self):
+        if self._file and not self._file.closed:
+            self._file.close()
+            print(f"Persona saved to {self.filename}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
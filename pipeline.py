@@ -0,0 +1,215 @@
+"""
+pipeline.py - End-to-end scrape → persona pipeline with overlapping stages
+Profiles scraped by a BatchRunner (pooled browser sessions) flow through a bounded queue
+straight into persona-generation workers, so browser time and LLM time overlap instead of
+adding up. Full queues block the stage before them (backpressure), and a RunJournal records
+per-profile, per-stage progress so an interrupted run resumes where it stopped (--resume).
+"""
+
+import os
+import sys
+import time
+import queue
+import argparse
+import threading
+import traceback
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from batch import BatchRunner, read_profile_urls
+from disk_cache import PersonaCache
+from mainGenerator import RedditPersonaGenerator
+from persona_batch import FakeModel, PersonaBatchRunner, TokenBucket
+from records import UserProfile
+from run_journal import (
+    RunJournal, SCRAPE_STAGES, STAGE_COMMENTS, STAGE_PERSONA, STAGE_POSTS, STATUS_DONE, open_journal,
+)
+from scrape import RedditSeleniumScraper
+from streaming import ScrapeDepth
+from text_features import load_reference
+
+_DONE = object()
+
+STAGE_SCRAPED = "scraped"
+
+
+class Pipeline:
+    """Scrape profiles and generate their personas concurrently"""
+
+    def __init__(self, scrape_runner: BatchRunner, persona_runner: PersonaBatchRunner,
+                 journal: RunJournal, persona_workers: int = 2, queue_size: int = 4):
+        self.scrape_runner = scrape_runner
+        self.persona_runner = persona_runner
+        self.persona_workers = persona_workers
+        self.queue_size = queue_size
+        # The scrapers record their sections in the same journal the persona stage uses
+        self.journal = journal
+        scrape_runner.journal = journal
+
+    def _plan(self, profile_urls: Iterable[str]) -> Tuple[List[str], List[UserProfile]]:
+        """Split the input into URLs still to scrape and already scraped profiles awaiting a persona"""
+        to_scrape, to_generate = [], []
+        for url in profile_urls:
+            if self.journal.is_done(url, STAGE_PERSONA):
+                print(f"Skipping {url}: persona already generated")
+                continue
+            sections = {stage: self.journal.entry(url, stage) for stage in SCRAPE_STAGES}
+            if all(entry and entry['status'] == STATUS_DONE for entry in sections.values()):
+                posts, comments = sections[STAGE_POSTS], sections[STAGE_COMMENTS]
+                to_generate.append(UserProfile.from_dict({
+                    'username': posts['username'],
+                    'profile_url': url,
+                    'scraped_at': min(posts['output']['scraped_at'], comments['output']['scraped_at']),
+                    'posts': posts['output']['items'],
+                    'comments': comments['output']['items'],
+                }))
+                continue
+            to_scrape.append(url)
+        return to_scrape, to_generate
+
+    def _scrape(self, urls: List[str], resumed: List[UserProfile], profiles: queue.Queue,
+                events: queue.Queue):
+        try:
+            for profile in resumed:
+                profiles.put(profile)
+            if urls:
+                for result in self.scrape_runner.run(urls):
+                    events.put((STAGE_SCRAPED, result))
+                    if result['status'] == 'ok':
+                        # Blocks while persona workers are behind, pausing the scrapers in turn
+                        profiles.put(result['data'])
+        except Exception as e:
+            traceback.print_exc()
+            events.put(('error', {'status': 'error', 'error': f"scrape stage failed: {e}"}))
+        finally:
+            for _ in range(self.persona_workers):
+                profiles.put(_DONE)
+
+    def _generate(self, profiles: queue.Queue, events: queue.Queue, url_by_user: Dict[str, str]):
+        while True:
+            profile = profiles.get()
+            if profile is _DONE:
+                break
+            url = profile.profile_url or url_by_user.get(profile.username.lower(), profile.username)
+            self.journal.start(url, STAGE_PERSONA, profile.username)
+            result = self.persona_runner.generate(profile)
+            if result['status'] == 'ok':
+                self.journal.done(url, STAGE_PERSONA, {'path': result.get('path')}, profile.username)
+            else:
+                self.journal.failed(url, STAGE_PERSONA, result['error'], profile.username)
+            events.put((STAGE_PERSONA, result))
+        events.put((_DONE, None))
+
+    def run(self, profile_urls: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """Run both stages and yield one event dict per finished scrape and per finished persona"""
+        urls = list(profile_urls)
+        to_scrape, resumed = self._plan(urls)
+        if resumed:
+            print(f"Resuming: {len(resumed)} profiles already scraped, {len(to_scrape)} left to scrape")
+        if self.persona_runner.output_dir:
+            os.makedirs(self.persona_runner.output_dir, exist_ok=True)
+
+        # Fallback for profiles without a profile_url
+        url_by_user = {}
+        for url in urls:
+            try:
+                username = RedditSeleniumScraper.extract_username_from_url(url)
+            except ValueError:
+                continue
+            url_by_user[username.lower()] = url
+
+        profiles = queue.Queue(maxsize=self.queue_size)
+        events = queue.Queue()
+        threading.Thread(target=self._scrape, args=(to_scrape, resumed, profiles, events), daemon=True).start()
+        for _ in range(self.persona_workers):
+            threading.Thread(target=self._generate, args=(profiles, events, url_by_user), daemon=True).start()
+
+        finished_workers = 0
+        while finished_workers < self.persona_workers:
+            stage, result = events.get()
+            if stage is _DONE:
+                finished_workers += 1
+                continue
+            yield dict(result, stage=stage)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape Reddit profiles and generate personas in one pipeline")
+    parser.add_argument("url_file", help="File with one profile URL per line")
+    parser.add_argument("--workers", type=int, default=2, help="Number of browser sessions")
+    parser.add_argument("--min-interval", type=float, default=2.0,
+                        help="Minimum seconds between requests to the same domain")
+    parser.add_argument("--extraction-mode", default="element", choices=["element", "script", "html"])
+    parser.add_argument("--max-items", default="7", help="Posts/comments to collect per user, or 'all'")
+    parser.add_argument("--output-dir", default="scraped", help="Directory for per-user JSON files")
+    parser.add_argument("--lean", action="store_true",
+                        help="Eager page loads without images, media, fonts or analytics")
+    parser.add_argument("--show-browser", action="store_true", help="Run Chrome with a visible window")
+    parser.add_argument("--persona-workers", type=int, default=2, help="Persona requests in flight at once")
+    parser.add_argument("--persona-dir", default="personas", help="Directory for persona markdown files")
+    parser.add_argument("--api-key", default=os.environ.get("GEMINI_API_KEY"), help="Gemini API key")
+    parser.add_argument("--rate", type=float, default=1.0, help="Average persona API calls per second")
+    parser.add_argument("--persona-cache-dir", default=None,
+                        help="Reuse responses for identical prompts from this cache")
+    parser.add_argument("--keyword-reference", default=None,
+                        help="Reference corpus from text_features.py to rank keywords against")
+    parser.add_argument("--fake-model", type=float, default=None, metavar="LATENCY",
+                        help="Use an offline fake model answering in LATENCY seconds")
+    parser.add_argument("--queue-size", type=int, default=4,
+                        help="Scraped profiles allowed to wait for a persona worker")
+    parser.add_argument("--journal", default="run_journal.db",
+                        help="SQLite run journal recording what each run finished")
+    parser.add_argument("--resume", nargs="?", const=True, default=None, metavar="RUN_ID",
+                        help="Continue the latest run in --journal (or RUN_ID) instead of starting a new one")
+    args = parser.parse_args()
+
+    if args.fake_model is None and not args.api_key:
+        parser.error("--api-key or GEMINI_API_KEY is required unless --fake-model is used")
+
+    max_items = None if args.max_items == "all" else int(args.max_items)
+    depth = ScrapeDepth(max_items=max_items, max_scrolls=None if max_items is None or max_items > 7 else 8)
+    scrape_runner = BatchRunner(
+        workers=args.workers,
+        headless=not args.show_browser,
+        min_interval=args.min_interval,
+        output_dir=args.output_dir,
+        scraper_options={'extraction_mode': args.extraction_mode, 'depth': depth, 'lean': args.lean},
+    )
+    generator = RedditPersonaGenerator(
+        args.api_key,
+        model=FakeModel(latency=args.fake_model) if args.fake_model is not None else None,
+        cache=PersonaCache(args.persona_cache_dir) if args.persona_cache_dir else None,
+        rate_limiter=TokenBucket(args.rate),
+        keyword_reference=load_reference(args.keyword_reference) if args.keyword_reference else None,
+    )
+    persona_runner = PersonaBatchRunner(generator, concurrency=args.persona_workers,
+                                        output_dir=args.persona_dir)
+    journal = open_journal(args.journal, args.resume)
+    pipeline = Pipeline(scrape_runner, persona_runner, journal,
+                        persona_workers=args.persona_workers, queue_size=args.queue_size)
+
+    started = time.monotonic()
+    stage_time = {STAGE_SCRAPED: 0.0, STAGE_PERSONA: 0.0}
+    failed = personas = 0
+    for event in pipeline.run(read_profile_urls(args.url_file)):
+        stage = event['stage']
+        stage_time[stage] = stage_time.get(stage, 0.0) + event.get('elapsed', 0.0)
+        if event['status'] != 'ok':
+            failed += 1
+            print(f"✗ [{stage}] {event.get('url') or event.get('username')}: {event.get('error')}")
+        elif stage == STAGE_SCRAPED:
+            print(f"✓ scraped {event['data'].username} in {event['elapsed']:.1f}s")
+        else:
+            personas += 1
+            print(f"✓ persona for {event['username']} in {event['elapsed']:.1f}s")
+
+    elapsed = time.monotonic() - started
+    print(scrape_runner.metrics.format_summary("SCRAPE TIMING"))
+    print(f"Run journal {args.journal}, run {journal.run_id}: {journal.summary()}")
+    journal.close()
+    print(f"\n📊 PIPELINE SUMMARY: {personas} personas, {failed} failures in {elapsed:.1f}s "
+          f"(scraping {stage_time[STAGE_SCRAPED]:.1f}s + personas {stage_time[STAGE_PERSONA]:.1f}s of work)")
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
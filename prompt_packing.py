@@ -0,0 +1,107 @@
+"""
+prompt_packing.py - Token-budget-aware selection of Reddit content for persona prompts
+Instead of the first N lines, posts and comments are deduplicated, long bodies are truncated,
+and items are picked round-robin across subreddits, newest first, until a token budget is
+filled. The prompt size (and so cost and latency per persona) stays predictable.
+"""
+
+import re
+from datetime import datetime, timezone
+from typing import List, Optional, Set, Tuple
+
+from records import UserProfile
+
+CHARS_PER_TOKEN = 4
+MIN_ITEM_TOKENS = 8
+_WORD = re.compile(r"\w+")
+_OLDEST = datetime.min.replace(tzinfo=timezone.utc)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text)"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to about max_tokens at a word boundary, marking the cut with an ellipsis"""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars - 1]
+    if ' ' in cut:
+        cut = cut[:cut.rfind(' ')]
+    return cut.rstrip() + "…"
+
+
+def _shingles(text: str, size: int = 3) -> Set[Tuple[str, ...]]:
+    words = _WORD.findall(text.lower())
+    if len(words) < size:
+        return {tuple(words)}
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _near_duplicate(shingles: Set[Tuple[str, ...]], kept: List[Set[Tuple[str, ...]]],
+                    threshold: float) -> bool:
+    for other in kept:
+        union = len(shingles | other)
+        if union and len(shingles & other) / union >= threshold:
+            return True
+    return False
+
+
+def content_items(profile: UserProfile) -> List[Tuple[str, Optional[datetime], str]]:
+    """(subreddit, created_at, prompt line) for every post and comment"""
+    items = []
+    for post in profile.posts:
+        items.append((post.subreddit or '', post.created_at,
+                      f"POST: {post.title or ''} - {post.content or ''}"))
+    for comment in profile.comments:
+        items.append((comment.subreddit or '', comment.created_at, f"COMMENT: {comment.body or ''}"))
+    return items
+
+
+def pack_content(profile: UserProfile, token_budget: int = 3000, max_item_tokens: int = 300,
+                 duplicate_threshold: float = 0.8) -> List[str]:
+    """Pick prompt lines for profile that fit in token_budget.
+
+    Each subreddit's items are ordered newest first and subreddits take turns, so the packed
+    content covers as many communities as possible before going deeper into any one of them.
+    Near-identical items (word-trigram Jaccard >= duplicate_threshold) are dropped and every
+    item is truncated to max_item_tokens.
+    """
+    by_subreddit = {}
+    for subreddit, created_at, line in content_items(profile):
+        by_subreddit.setdefault(subreddit, []).append((created_at or _OLDEST, line))
+    queues = [sorted(items, key=lambda item: item[0], reverse=True) for items in by_subreddit.values()]
+    # Most recently active subreddits take their turn first
+    queues.sort(key=lambda items: items[0][0], reverse=True)
+
+    packed = []
+    kept_shingles = []
+    used = 0
+    considered = 0
+    while queues and used < token_budget:
+        next_round = []
+        for items in queues:
+            _, line = items.pop(0)
+            considered += 1
+            if items:
+                next_round.append(items)
+
+            shingles = _shingles(line)
+            if _near_duplicate(shingles, kept_shingles, duplicate_threshold):
+                continue
+            limit = min(max_item_tokens, token_budget - used)
+            if limit < MIN_ITEM_TOKENS and estimate_tokens(line) > limit:
+                continue  # only a meaningless stub of this item would still fit
+            line = truncate_tokens(line, limit)
+            tokens = estimate_tokens(line)
+            packed.append(line)
+            kept_shingles.append(shingles)
+            used += tokens
+        queues = next_round
+
+    total = profile.total_posts + profile.total_comments
+    print(f"Packed {len(packed)} of {total} items into ~{used} tokens "
+          f"(budget {token_budget}, {considered - len(packed)} skipped)")
+    return packed
@@ -0,0 +1,212 @@
+"""
+records.py - Compact typed records for scraped posts, comments and profiles
+Post, Comment and UserProfile use __slots__ instead of per-item dicts and parse the display
+strings (scores, comment counts, relative timestamps) once, on construction. to_dict()/from_dict()
+convert to and from the JSON layout written by save_to_file, the cache and the JSONL sink, so the
+files on disk are unchanged. Records and profiles also answer record['title'] / profile.get('posts')
+like the dicts they replace, so callers written against the old return values keep working.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+
+from normalize import parse_count, parse_timestamp, to_utc
+
+Reference = Union[str, datetime, None]
+
+
+class _Record:
+    """Shared dict conversion for slotted records; FIELDS are the raw JSON keys"""
+
+    __slots__ = ()
+    FIELDS: tuple = ()
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], reference: Reference = None):
+        """Build a record from a scraped dict; relative timestamps resolve against reference (or now)"""
+        return cls(reference=reference, **{field: data.get(field) for field in cls.FIELDS})
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON layout of the record; missing fields are omitted, as the extractors do"""
+        data = {}
+        for field in self.FIELDS:
+            value = getattr(self, field)
+            if value is not None:
+                data[field] = value
+        return data
+
+    def reindexed(self, index: int):
+        """Copy of the record at a new position"""
+        record = self.__class__.__new__(self.__class__)
+        for cls in type(self).__mro__:
+            for slot in getattr(cls, '__slots__', ()):
+                setattr(record, slot, getattr(self, slot))
+        record.index = index
+        return record
+
+    def __getitem__(self, field: str):
+        """Dict-style read of a JSON field; missing (None) fields raise KeyError like the old dicts"""
+        value = getattr(self, field) if field in self.FIELDS else None
+        if value is None:
+            raise KeyError(field)
+        return value
+
+    def get(self, field: str, default: Any = None) -> Any:
+        value = getattr(self, field) if field in self.FIELDS else None
+        return default if value is None else value
+
+    def __eq__(self, other):
+        return type(other) is type(self) and self.to_dict() == other.to_dict()
+
+    def __hash__(self):
+        # Equal records share a key; records are mutable, so do not change the fields behind
+        # key while one sits in a set or dict
+        return hash((type(self).__name__, self.key))
+
+    def __repr__(self):
+        fields = ', '.join(f"{key}={value!r}" for key, value in self.to_dict().items())
+        return f"{type(self).__name__}({fields})"
+
+
+class Post(_Record):
+    """One submitted post; score, comment_count and timestamp keep their display strings"""
+
+    FIELDS = ('index', 'title', 'url', 'subreddit', 'score', 'timestamp', 'content', 'comment_count')
+    __slots__ = FIELDS + ('score_value', 'comment_count_value', 'created_at')
+
+    def __init__(self, index: int = 0, title: Optional[str] = None, url: Optional[str] = None,
+                 subreddit: Optional[str] = None, score: Optional[str] = None,
+                 timestamp: Optional[str] = None, content: Optional[str] = None,
+                 comment_count: Optional[str] = None, reference: Reference = None):
+        self.index = index
+        self.title = title
+        self.url = url
+        self.subreddit = subreddit
+        self.score = score
+        self.timestamp = timestamp
+        self.content = content
+        self.comment_count = comment_count
+        self.score_value = parse_count(score)
+        self.comment_count_value = parse_count(comment_count)
+        self.created_at = parse_timestamp(timestamp, reference)
+
+    @property
+    def key(self) -> str:
+        """Stable identity: the permalink, falling back to the title"""
+        return self.url or f"title:{self.title or ''}"
+
+
+class Comment(_Record):
+    """One profile comment; score and timestamp keep their display strings"""
+
+    FIELDS = ('index', 'body', 'subreddit', 'score', 'timestamp', 'post_context', 'post_url')
+    __slots__ = FIELDS + ('score_value', 'created_at')
+
+    def __init__(self, index: int = 0, body: Optional[str] = None, subreddit: Optional[str] = None,
+                 score: Optional[str] = None, timestamp: Optional[str] = None,
+                 post_context: Optional[str] = None, post_url: Optional[str] = None,
+                 reference: Reference = None):
+        self.index = index
+        self.body = body
+        self.subreddit = subreddit
+        self.score = score
+        self.timestamp = timestamp
+        self.post_context = post_context
+        self.post_url = post_url
+        self.score_value = parse_count(score)
+        self.created_at = parse_timestamp(timestamp, reference)
+
+    @property
+    def key(self) -> str:
+        """Stable identity: parent post URL plus comment body"""
+        return f"{self.post_url or ''}|{self.body or ''}"
+
+
+SECTION_RECORDS = {'posts': Post, 'comments': Comment}
+
+
+class UserProfile:
+    """Everything scraped for one user, as returned by scrape_user_profile"""
+
+    __slots__ = ('username', 'profile_url', 'scraped_at', 'posts', 'comments')
+    # Keys of the dict scrape_user_profile used to return (and to_dict() still writes)
+    KEYS = ('username', 'profile_url', 'scraped_at', 'posts', 'comments', 'total_posts', 'total_comments')
+
+    def __init__(self, username: str, profile_url: Optional[str] = None,
+                 scraped_at: Optional[str] = None, posts: Optional[List[Post]] = None,
+                 comments: Optional[List[Comment]] = None):
+        self.username = username
+        self.profile_url = profile_url
+        self.scraped_at = scraped_at or datetime.now().isoformat()
+        self.posts = posts or []
+        self.comments = comments or []
+
+    @property
+    def total_posts(self) -> int:
+        return len(self.posts)
+
+    @property
+    def total_comments(self) -> int:
+        return len(self.comments)
+
+    @property
+    def scraped_at_utc(self) -> Optional[datetime]:
+        return to_utc(self.scraped_at)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "UserProfile":
+        """Build a profile from save_to_file output; relative timestamps resolve against scraped_at"""
+        scraped_at = data.get('scraped_at')
+        return cls(
+            username=data.get('username', ''),
+            profile_url=data.get('profile_url'),
+            scraped_at=scraped_at,
+            posts=[Post.from_dict(item, scraped_at) for item in data.get('posts') or []],
+            comments=[Comment.from_dict(item, scraped_at) for item in data.get('comments') or []],
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        """Profile fields without the item lists"""
+        return {
+            'username': self.username,
+            'profile_url': self.profile_url,
+            'scraped_at': self.scraped_at,
+            'total_posts': self.total_posts,
+            'total_comments': self.total_comments,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON layout written by save_to_file"""
+        return {
+            'username': self.username,
+            'profile_url': self.profile_url,
+            'scraped_at': self.scraped_at,
+            'posts': [post.to_dict() for post in self.posts],
+            'comments': [comment.to_dict() for comment in self.comments],
+            'total_posts': self.total_posts,
+            'total_comments': self.total_comments,
+        }
+
+    def __getitem__(self, key: str):
+        """Dict-style access for callers of the old dict return value (items come back as records)"""
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self.KEYS else default
+
+    def keys(self):
+        return self.KEYS
+
+    def __contains__(self, key) -> bool:
+        return key in self.KEYS
+
+    def __repr__(self):
+        return (f"UserProfile(username={self.username!r}, posts={self.total_posts}, "
+                f"comments={self.total_comments}, scraped_at={self.scraped_at!r})")
+
+
+def as_profile(data: Union[UserProfile, Dict[str, Any]]) -> UserProfile:
+    """Accept either a UserProfile or a save_to_file-style dict"""
+    return data if isinstance(data, UserProfile) else UserProfile.from_dict(data)
@@ -0,0 +1,138 @@
+"""
+reddit_selectors.py - CSS selector fallback chains shared by the Reddit scrapers
+Each chain is tried in order; the first selector that yields a valid value wins.
+Keeping them in one place lets the WebDriver, in-browser and offline extractors stay in sync.
+"""
+
+# Page-level containers for a single post on /user/<name>/submitted/
+POST_CONTAINER_SELECTORS = [
+    "shreddit-post",
+    "article[data-testid='post-container']",
+    "[data-testid='post-container']",
+    "div[data-click-id='body']",
+    ".Post",
+    "[data-adclicklocation='title']"
+]
+
+# Used when no container selector matches anything
+POST_FALLBACK_SELECTOR = "a[href*='/comments/']"
+
+POST_FIELD_SELECTORS = {
+    'title': [
+        "h3",
+        "[data-testid='post-title']",
+        "[slot='title']",
+        "a[data-testid='post-title']",
+        "[data-adclicklocation='title']",
+        ".Post-title",
+        "h1",
+        "[data-click-id='title']"
+    ],
+    'url': [
+        "a[href*='/comments/']",
+        "a[data-testid='post-title']",
+        "[data-click-id='title'] a"
+    ],
+    'subreddit': [
+        "a[href*='/r/'][data-testid='subreddit-name']",
+        "a[href*='/r/']",
+        "[data-testid='subreddit-name']",
+        "faceplate-tracker a[href*='/r/']"
+    ],
+    'score': [
+        "shreddit-score",
+        "[data-testid='vote-arrows'] span",
+        "faceplate-number",
+        ".score",
+        "[aria-label*='upvote']"
+    ],
+    'timestamp': [
+        "faceplate-timeago",
+        "[data-testid='post-timestamp']",
+        "time",
+        "[data-testid='post-metadata'] time"
+    ],
+    'content': [
+        "[data-testid='post-content']",
+        ".usertext-body",
+        "[slot='text-body']",
+        "div[data-adclicklocation='media']"
+    ],
+    'comment_count': [
+        "a[href*='/comments/'] span",
+        "[data-testid='comment-count']",
+        "a[data-click-id='comments']"
+    ],
+}
+
+# Page-level containers for a single comment on /user/<name>/comments/
+COMMENT_CONTAINER_SELECTORS = [
+    "shreddit-profile-comment",
+    "article[aria-label*='comment']",
+    "div[class*='hover:bg-neutral-background-hover'][class*='relative']",
+    "div[data-testid='comment']",
+    ".Comment",
+    "article[class*='mb-0'][class*='w-full']"
+]
+
+# Used when no container selector matches anything
+COMMENT_FALLBACK_SELECTORS = [
+    "div[class*='text-12'][class*='relative']",
+    "div[class*='post-revision-content']",
+    "div[aria-label*='comment']"
+]
+
+COMMENT_FIELD_SELECTORS = {
+    'body': [
+        "div[class*='post-revision-content']",
+        "div[slot='comment']",
+        "div[data-testid='comment-text']",
+        "div[class*='text-neutral-content-strong'][class*='overflow-hidden']",
+        "div[class*='usertext-body']",
+        "div p",
+        "div[class*='md']",
+        "[slot='text-body']",
+        # More specific selectors based on the structure
+        "div[class*='relative'] div[class*='text-neutral-content-strong']",
+        "div[class*='overflow-hidden'] p"
+    ],
+    'subreddit': [
+        "a[href*='/r/'][class*='hover:underline']",
+        "a[href*='/r/']",
+        "[data-testid='subreddit-name']",
+        "faceplate-tracker a[href*='/r/']"
+    ],
+    'score': [
+        "shreddit-score",
+        "div[class*='ml-[22px]'] span",
+        "faceplate-number",
+        ".score",
+        "[aria-label*='upvote']",
+        "div[class*='text-12'] span"
+    ],
+    'timestamp': [
+        "faceplate-timeago",
+        "time",
+        "[data-testid='comment-timestamp']",
+        "div[class*='text-12'] time",
+        "span[class*='text-12']"
+    ],
+    'post_context': [
+        "a[href*='/comments/'][class*='hover:underline']",
+        "a[href*='/comments/']",
+        "[data-testid='post-title']",
+        "div[class*='text-12'] a"
+    ],
+}
+
+# Extra metadata spans scanned after the main comment fields
+COMMENT_METADATA_SELECTOR = "div[class*='text-12'] span"
+
+POPUP_SELECTORS = [
+    "button[aria-label='Close']",
+    "button[data-testid='close-button']",
+    "button:contains('Continue')",
+    "button:contains('Accept')",
+    ".icon-close",
+    "[data-testid='cookie-banner'] button"
+]
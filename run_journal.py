@@ -0,0 +1,169 @@
+"""
+run_journal.py - Durable per-user, per-stage run journal in SQLite (WAL mode)
+Records whether each profile's posts, comments and persona are done or failed, together
+with the stage's output, so an interrupted batch resumes with only the remaining work:
+completed stages are skipped (and their output reused) and failed ones are retried.
+Entries belong to a run: a new RunJournal starts a fresh run, and only resuming that run
+(resume=True for the latest, or its run_id) reuses what it completed.
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+STAGE_POSTS = "posts"
+STAGE_COMMENTS = "comments"
+STAGE_PERSONA = "persona"
+SCRAPE_STAGES = (STAGE_POSTS, STAGE_COMMENTS)
+STAGES = SCRAPE_STAGES + (STAGE_PERSONA,)
+
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS run_stages (
+    run_id TEXT NOT NULL,
+    url TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    username TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    output TEXT,
+    started_at TEXT,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (run_id, url, stage)
+);
+"""
+
+
+class RunJournal:
+    """Thread-safe stage journal of one run; every update is committed before the call returns"""
+
+    def __init__(self, path: str = "run_journal.db", run_id: Optional[str] = None, resume: bool = False):
+        """Open run run_id in path, or the latest run if resume is set, or else start a new run"""
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        # WAL keeps writes cheap and readers unblocked; NORMAL sync is still crash-safe in WAL
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+        if run_id is None and resume:
+            row = self._conn.execute("SELECT run_id FROM runs ORDER BY started_at DESC LIMIT 1").fetchone()
+            run_id = row['run_id'] if row else None
+        self.resumed = run_id is not None and self._conn.execute(
+            "SELECT 1 FROM runs WHERE run_id = ?", (run_id,)).fetchone() is not None
+        self.run_id = run_id or datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        if not self.resumed:
+            self._conn.execute("INSERT INTO runs (run_id, started_at) VALUES (?, ?)",
+                               (self.run_id, datetime.now().isoformat()))
+
+    def _upsert(self, url: str, stage: str, status: str, username: Optional[str] = None,
+                error: Optional[str] = None, output: Any = None, attempt: bool = False):
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO run_stages (run_id, url, stage, username, status, attempts, error, output,
+                                        started_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (run_id, url, stage) DO UPDATE SET
+                    username = COALESCE(excluded.username, run_stages.username),
+                    status = excluded.status,
+                    attempts = run_stages.attempts + excluded.attempts,
+                    error = excluded.error,
+                    output = COALESCE(excluded.output, run_stages.output),
+                    started_at = COALESCE(excluded.started_at, run_stages.started_at),
+                    updated_at = excluded.updated_at
+                """,
+                (self.run_id, url, stage, username, status, 1 if attempt else 0, error,
+                 json.dumps(output, ensure_ascii=False) if output is not None else None,
+                 now if attempt else None, now),
+            )
+
+    def start(self, url: str, stage: str, username: Optional[str] = None):
+        """Record an attempt at stage; a crash leaves it 'running', which counts as not done"""
+        self._upsert(url, stage, STATUS_RUNNING, username, attempt=True)
+
+    def done(self, url: str, stage: str, output: Any = None, username: Optional[str] = None):
+        """Mark stage completed; output (any JSON value) is kept for resuming"""
+        self._upsert(url, stage, STATUS_DONE, username, output=output)
+
+    def failed(self, url: str, stage: str, error: str, username: Optional[str] = None):
+        self._upsert(url, stage, STATUS_FAILED, username, error=error)
+
+    def entry(self, url: str, stage: str) -> Optional[Dict[str, Any]]:
+        """{'status', 'attempts', 'error', 'output', ...} for one stage, or None if never started"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM run_stages WHERE run_id = ? AND url = ? AND stage = ?",
+                                     (self.run_id, url, stage)).fetchone()
+        if row is None:
+            return None
+        entry = dict(row)
+        entry['output'] = json.loads(entry['output']) if entry['output'] is not None else None
+        return entry
+
+    def is_done(self, url: str, stage: str) -> bool:
+        entry = self.entry(url, stage)
+        return entry is not None and entry['status'] == STATUS_DONE
+
+    def output(self, url: str, stage: str) -> Any:
+        """Output of a completed stage, or None"""
+        entry = self.entry(url, stage)
+        return entry['output'] if entry and entry['status'] == STATUS_DONE else None
+
+    def remaining(self, urls: Iterable[str], stages: Iterable[str] = STAGES) -> List[str]:
+        """URLs with at least one of stages not yet done (never started, running or failed)"""
+        stages = list(stages)
+        return [url for url in urls if not all(self.is_done(url, stage) for stage in stages)]
+
+    def failures(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, stage, username, attempts, error, updated_at FROM run_stages "
+                "WHERE run_id = ? AND status = ? ORDER BY updated_at", (self.run_id, STATUS_FAILED)).fetchall()
+        return [dict(row) for row in rows]
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        """{stage: {status: count}}"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT stage, status, COUNT(*) AS n FROM run_stages WHERE run_id = ? "
+                "GROUP BY stage, status", (self.run_id,)).fetchall()
+        summary: Dict[str, Dict[str, int]] = {}
+        for row in rows:
+            summary.setdefault(row['stage'], {})[row['status']] = row['n']
+        return summary
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_journal(path: str, resume: Union[bool, str, None] = None) -> RunJournal:
+    """Journal for a CLI run: resume=True continues the latest run, a string names the run to continue"""
+    run_id = resume if isinstance(resume, str) else None
+    journal = RunJournal(path, run_id=run_id, resume=bool(resume))
+    if journal.resumed:
+        print(f"Resuming run {journal.run_id} from {path}: {journal.summary()}")
+    else:
+        if resume:
+            print(f"No run to resume in {path}, starting a new one")
+        print(f"Starting run {journal.run_id} in {path}")
+    return journal
@@ -13,18 +13,104 @@ from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import time
 import re
 import json
-from typing import List, Dict, Any
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Set
 from datetime import datetime
 from comments import CommentScraper
+from waits import PageWaiter
+from incremental import post_key, comment_key, known_keys, merge_items, load_snapshot
+from streaming import AgeGate, ScrapeDepth, stream_items, depth_stop_condition
+from html_extract import parse_posts
+from records import Post, Comment, UserProfile, SECTION_RECORDS
+from instrumentation import SESSION_RECYCLES, Metrics, instrument_driver
+from selector_registry import SelectorRegistry
+from extraction import POST_SPEC, SpecExtractor, dismiss_popups, wait_and_scroll
+from lean import apply_lean_options, block_resources
 
 class RedditSeleniumScraper:
-    def __init__(self, headless: bool = False):
+    def __init__(self, headless: bool = False, wait_timeout: float = 10.0,
+                 scroll_timeout: float = 3.0, poll_interval: float = 0.25,
+                 extraction_mode: str = "element", rate_limiter=None,
+                 parallel_sections: bool = False, pool=None, cache=None, refresh: str = "stale",
+                 depth: ScrapeDepth = None, sink=None, journal=None,
+                 metrics: Metrics = None, selector_registry: SelectorRegistry = None,
+                 lean: bool = False, max_browser_memory_mb: float = None):
+        if refresh not in ("stale", "always", "never"):
+            raise ValueError(f"Unknown refresh policy: {refresh}")
+        if extraction_mode not in ("element", "script", "html"):
+            raise ValueError(f"Unknown extraction mode: {extraction_mode}")
+        if max_browser_memory_mb is not None and extraction_mode != "script":
+            raise ValueError("max_browser_memory_mb needs extraction_mode='script' "
+                             "(the other modes keep the whole page until they extract)")
         self.headless = headless
+        # Lean sessions: eager page loads, no images/media/fonts/analytics, smaller viewport
+        self.lean = lean
+        # Recycle a session mid-scroll once the browser uses more memory than this (script mode)
+        self.max_browser_memory_mb = max_browser_memory_mb
+        self.extraction_mode = extraction_mode
+        self.rate_limiter = rate_limiter
+        self.parallel_sections = parallel_sections
+        # Optional DriverPool: sessions are checked out per profile instead of started here
+        self.pool = pool
+        # Optional ScrapeCache; refresh is "stale" (re-scrape past the TTL),
+        # "always" (ignore cached data) or "never" (serve any cached data)
+        self.cache = cache
+        self.refresh = refresh
+        # How much history to collect per section (defaults to the 7 most recent items)
+        self.depth = depth or ScrapeDepth()
+        # Optional JsonlSink that receives every post and comment as it is extracted
+        self.sink = sink
+        self.profile_writer = None
+        # Optional RunJournal: sections completed in an earlier (interrupted) run are reused
+        self.journal = journal
+        # Run-level metrics (e.g. shared by a whole batch); each profile records into a child
+        self.metrics = metrics or Metrics()
+        self.profile_metrics = self.metrics.child()
+        # Selector hit rates; selectors that stopped matching are tried last (share and persist one to learn across runs)
+        self.selector_registry = selector_registry or SelectorRegistry()
+        self.wait_timeout = wait_timeout
+        self.scroll_timeout = scroll_timeout
+        self.poll_interval = poll_interval
         self.driver = None
         self.wait = None
+        self.waiter = None
+        # Second session used to scrape comments while posts load (parallel_sections)
+        self.comment_driver = None
+        self.comment_wait = None
+        self.comment_waiter = None
     
     def setup_driver(self):
         """Initialize Chrome WebDriver with appropriate options"""
+        with self.profile_metrics.span("driver_setup"):
+            self.driver = self.pool.acquire() if self.pool else self.create_driver()
+        self.wait = WebDriverWait(self.driver, 20)  # Increased timeout
+        self.waiter = PageWaiter(self.driver, timeout=self.wait_timeout, poll_interval=self.poll_interval,
+                                 ready_states=self._ready_states())
+        
+        return self.driver
+    
+    def setup_comment_driver(self):
+        """Initialize the secondary WebDriver used for parallel comment scraping"""
+        with self.profile_metrics.span("driver_setup"):
+            self.comment_driver = self.pool.acquire() if self.pool else self.create_driver()
+        self.comment_wait = WebDriverWait(self.comment_driver, 20)
+        self.comment_waiter = PageWaiter(self.comment_driver, timeout=self.wait_timeout,
+                                         poll_interval=self.poll_interval, ready_states=self._ready_states())
+        
+        return self.comment_driver
+    
+    def _ready_states(self) -> tuple:
+        # With the eager strategy the DOM is usable before 'complete'; waiting for it would
+        # give back what eager saved
+        return ("interactive", "complete") if self.lean else ("complete",)
+    
+    def create_driver(self, performance_log: bool = False):
+        """Start a new Chrome WebDriver session with appropriate options.
+        
+        performance_log records CDP network events for driver.get_log('performance')
+        (used by the lean.py benchmark).
+        """
         chrome_options = Options()
         
         if self.headless:
@@ -34,21 +120,28 @@ class RedditSeleniumScraper:
         chrome_options.add_argument("--no-sandbox")
         chrome_options.add_argument("--disable-dev-shm-usage")
         chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
+        if self.lean:
+            apply_lean_options(chrome_options)
+        else:
+            chrome_options.add_argument("--window-size=1920,1080")
         chrome_options.add_argument("--disable-blink-features=AutomationControlled")
         chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
         chrome_options.add_experimental_option('useAutomationExtension', False)
         
         # Realistic user agent
         chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+        if performance_log:
+            chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
         
-        self.driver = webdriver.Chrome(options=chrome_options)
-        self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        self.wait = WebDriverWait(self.driver, 20)  # Increased timeout
+        driver = webdriver.Chrome(options=chrome_options)
+        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        if self.lean:
+            block_resources(driver)
         
-        return self.driver
+        return driver
     
-    def extract_username_from_url(self, profile_url: str) -> str:
+    @staticmethod
+    def extract_username_from_url(profile_url: str) -> str:
         """Extract username from Reddit profile URL"""
         patterns = [
             r'reddit\.com/u/([^/?]+)',
@@ -62,51 +155,49 @@ class RedditSeleniumScraper:
         
         raise ValueError("Invalid Reddit profile URL")
     
-    def wait_and_scroll(self, scrolls: int = 8):
-        """Scroll page to load more content with better timing"""
-        for i in range(scrolls):
-            print(f"Scrolling... {i+1}/{scrolls}")
-            
-            # Get current page height
-            current_height = self.driver.execute_script("return document.body.scrollHeight")
-            
-            # Scroll to bottom
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            
-            # Wait for new content to load
-            time.sleep(3)
-            
-            # Check if new content loaded
-            new_height = self.driver.execute_script("return document.body.scrollHeight")
-            if new_height == current_height:
-                print("No new content loaded, stopping scroll")
-                break
-    
-    def scrape_posts(self, username: str) -> List[Dict[str, Any]]:
-        """Scrape user posts from their profile"""
+    def wait_and_scroll(self, scrolls: int = 8, item_selector: str = None,
+                        stop_when: Callable[[], bool] = None):
+        """Scroll page to load more content, waiting only until new content appears.
+        
+        scrolls=None keeps scrolling until no new content loads or stop_when() is true.
+        """
+        wait_and_scroll(self.driver, self.waiter, scrolls, item_selector, stop_when, self.scroll_timeout)
+    
+    def scrape_posts(self, username: str, known: Set[str] = None) -> List[Post]:
+        """Scrape user posts from their profile, as deep as self.depth asks.
+        
+        If known post keys are given, scrolling and extraction stop at the first known post.
+        """
         posts = []
         url = f"https://www.reddit.com/user/{username}/submitted/"
         
         try:
             print(f"Navigating to: {url}")
-            self.driver.get(url)
+            if self.rate_limiter:
+                with self.profile_metrics.span("rate_limit"):
+                    self.rate_limiter.wait(url)
+            with self.profile_metrics.span("navigate"):
+                self.driver.get(url)
             
             # Wait for page to load and accept any cookies/popups
-            time.sleep(3)
+            with self.profile_metrics.span("page_ready"):
+                self.waiter.page_ready()
             
             # Try to dismiss any popups
-            self.dismiss_popups()
+            with self.profile_metrics.span("popups"):
+                self.dismiss_popups()
             
             # Wait for posts to load - using more specific selectors
             try:
-                self.wait.until(
-                    EC.any_of(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "shreddit-post")),
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "[data-testid='post-container']")),
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "article[data-testid='post-container']")),
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "div[data-click-id='body']"))
+                with self.profile_metrics.span("wait_for_items"):
+                    self.wait.until(
+                        EC.any_of(
+                            EC.presence_of_element_located((By.CSS_SELECTOR, "shreddit-post")),
+                            EC.presence_of_element_located((By.CSS_SELECTOR, "[data-testid='post-container']")),
+                            EC.presence_of_element_located((By.CSS_SELECTOR, "article[data-testid='post-container']")),
+                            EC.presence_of_element_located((By.CSS_SELECTOR, "div[data-click-id='body']"))
+                        )
                     )
-                )
                 print("Posts loaded successfully")
             except TimeoutException:
                 print("Timeout waiting for posts to load")
@@ -117,48 +208,43 @@ class RedditSeleniumScraper:
                 print(f"Page source snippet: {page_source_snippet}")
                 return posts
             
-            # Scroll to load more content
-            self.wait_and_scroll(6)
-            
-            # Updated selectors based on current Reddit structure
-            post_selectors = [
-                "shreddit-post",
-                "article[data-testid='post-container']",
-                "[data-testid='post-container']",
-                "div[data-click-id='body']",
-                ".Post",
-                "[data-adclicklocation='title']"
-            ]
+            if self.extraction_mode == "script":
+                # Stream: extract posts as they load and drop extracted nodes from the DOM
+                with self.profile_metrics.span("stream"):
+                    for i, post in stream_items(self.driver, self.waiter, 'posts', self.depth,
+                                                self.scroll_timeout, known=known,
+                                                max_memory_mb=self.max_browser_memory_mb,
+                                                recycle=self.recycle_session):
+                        if not self._collect_post(posts, post, i):
+                            break
+                return posts
             
-            post_elements = []
-            for selector in post_selectors:
-                try:
-                    post_elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    if post_elements:
-                        print(f"Found {len(post_elements)} posts using selector: {selector}")
+            # Scroll until the page holds enough history
+            with self.profile_metrics.span("scroll"):
+                self.wait_and_scroll(self.depth.max_scrolls, item_selector="shreddit-post",
+                                     stop_when=depth_stop_condition(self.driver, 'posts', self.depth, known))
+            gate = AgeGate(self.depth, self.depth.cutoff())
+            
+            if self.extraction_mode == "html":
+                # Parse the whole page locally instead of per-element WebDriver round trips
+                with self.profile_metrics.span("extract"):
+                    extracted = parse_posts(self.driver.page_source, limit=None)
+                print(f"Extracted {len(extracted)} post elements in html mode")
+                for i, post_data in enumerate(extracted):
+                    post = Post.from_dict(post_data) if post_data else None
+                    if not self._collect_post(posts, post, i, known, gate):
                         break
-                except Exception as e:
-                    print(f"Selector {selector} failed: {e}")
-                    continue
-            
-            if not post_elements:
-                print("No post elements found. Trying fallback approach...")
-                # Fallback: try to find any links that might be posts
-                post_elements = self.driver.find_elements(By.CSS_SELECTOR, "a[href*='/comments/']")
-                print(f"Found {len(post_elements)} post links as fallback")
+                return posts
             
-            # Extract data from each post
-            for i, element in enumerate(post_elements[:7]):
-                try:
-                    post_data = self.extract_post_data(element, i)
-                    if post_data and post_data.get('title'):
-                        posts.append(post_data)
-                        print(f"✓ Extracted post {i+1}: {post_data['title'][:60]}...")
-                    else:
-                        print(f"✗ Failed to extract post {i+1}")
-                except Exception as e:
-                    print(f"✗ Error extracting post {i+1}: {e}")
-                    continue
+            # One in-page pass over all post elements instead of a round trip per selector attempt
+            extractor = self._extractor()
+            post_elements = extractor.find_containers(self.driver, POST_SPEC)
+            with self.profile_metrics.span("extract"):
+                extracted = extractor.extract_batch(self.driver, post_elements, POST_SPEC)
+                for i, post_data in enumerate(extracted):
+                    post = Post.from_dict(post_data) if post_data else None
+                    if not self._collect_post(posts, post, i, known, gate):
+                        break
             
         except Exception as e:
             print(f"Error scraping posts: {e}")
@@ -167,214 +253,319 @@ class RedditSeleniumScraper:
         
         return posts
     
+    def _collect_post(self, posts: List[Post], post: Post, i: int,
+                      known: Set[str] = None, gate: AgeGate = None) -> bool:
+        """Keep a post if it has a title and log the outcome; returns False once the depth is reached"""
+        if post and known and post_key(post) in known:
+            print(f"Post {i+1} is already known, stopping extraction")
+            return False
+        if post and gate and gate.too_old(post):
+            if gate.ended:
+                print(f"Post {i+1} is older than the requested window, stopping extraction")
+                return False
+            print(f"Post {i+1} is older than the requested window (pinned?), skipping")
+            return True
+        if post and post.title:
+            posts.append(post)
+            if self.profile_writer:
+                self.profile_writer.post(post)
+            print(f"✓ Extracted post {i+1}: {post.title[:60]}...")
+        else:
+            print(f"✗ Failed to extract post {i+1}")
+        return not self.depth.enough(len(posts))
+    
+    def recycle_session(self, driver, url: str):
+        """Replace driver (the main or the comment session) with a fresh one showing url.
+        
+        Used mid-scroll when the browser outgrows max_browser_memory_mb; the session's waiter
+        is pointed at the new driver, keeping its wait totals.
+        """
+        self.profile_metrics.inc(SESSION_RECYCLES)
+        with self.profile_metrics.span("recycle"):
+            if self.pool:
+                self.pool.release(driver, discard=True)
+                fresh = self.pool.acquire()
+            else:
+                driver.quit()
+                fresh = self.create_driver()
+            instrument_driver(fresh, self.profile_metrics)
+            if driver is self.comment_driver:
+                self.comment_driver = fresh
+                self.comment_wait = WebDriverWait(fresh, 20)
+                waiter = self.comment_waiter
+            else:
+                self.driver = fresh
+                self.wait = WebDriverWait(fresh, 20)
+                waiter = self.waiter
+            waiter.driver = fresh
+            if self.rate_limiter:
+                self.rate_limiter.wait(url)
+            fresh.get(url)
+            waiter.page_ready()
+            dismiss_popups(fresh)
+        return fresh
+    
     def dismiss_popups(self):
         """Try to dismiss common Reddit popups"""
-        popup_selectors = [
-            "button[aria-label='Close']",
-            "button[data-testid='close-button']",
-            "button:contains('Continue')",
-            "button:contains('Accept')",
-            ".icon-close",
-            "[data-testid='cookie-banner'] button"
-        ]
+        dismiss_popups(self.driver)
+    
+    def _extractor(self) -> SpecExtractor:
+        return SpecExtractor(self.selector_registry, self.profile_metrics)
+    
+    def extract_post_data(self, element, index: int) -> Post:
+        """Extract data from a single post element, one WebDriver call per selector tried"""
+        post_data = self._extractor().extract(element, POST_SPEC, index)
+        return Post.from_dict(post_data) if post_data else None
+    
+    def scrape_comments(self, username: str, driver=None, wait=None, waiter=None,
+                        known: Set[str] = None) -> List[Comment]:
+        """Scrape user comments with CommentScraper, on the main session unless one is given"""
+        comment_scraper = CommentScraper(driver or self.driver, wait or self.wait, waiter or self.waiter,
+                                         self.scroll_timeout,
+                                         extraction_mode=self.extraction_mode,
+                                         rate_limiter=self.rate_limiter, depth=self.depth,
+                                         item_sink=self.profile_writer, metrics=self.profile_metrics,
+                                         selector_registry=self.selector_registry,
+                                         max_memory_mb=self.max_browser_memory_mb,
+                                         recycle=self.recycle_session)
+        return comment_scraper.scrape_comments(username, known)
+    
+    def _cached_sections(self, username: str, refresh: str) -> Dict[str, Dict[str, Any]]:
+        """Look up cached posts/comments for username according to the refresh policy"""
+        if not self.cache or refresh == "always":
+            return {}
+        max_age = float('inf') if refresh == "never" else None
+        cached = {}
+        for section in ('posts', 'comments'):
+            entry = self.cache.get_section(username, section, max_age)
+            if entry is not None and not self.depth.covered_by(entry.get('depth')):
+                # A shallower scrape would silently cut a deeper request short, whatever its age
+                print(f"Cached {section} for {username} are shallower than {self.depth}, re-scraping")
+                entry = None
+            if entry is not None:
+                print(f"Using cached {section} for {username} (scraped at {entry['scraped_at']})")
+                cached[section] = self._section_records(section, entry)
+        return cached
+    
+    def _journaled_sections(self, profile_url: str,
+                            cached: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Add sections the journal's run already completed for profile_url (a resumed run).
         
-        for selector in popup_selectors:
-            try:
-                popup = self.driver.find_element(By.CSS_SELECTOR, selector)
-                if popup.is_displayed():
-                    popup.click()
-                    time.sleep(1)
-                    print(f"Dismissed popup with selector: {selector}")
-            except:
+        Entries are this run's own output, stored after the incremental merge, so they are
+        reused as they are whatever the refresh policy; that only governs the scrape cache.
+        """
+        if not self.journal:
+            return cached
+        for section in ('posts', 'comments'):
+            if section in cached:
                 continue
+            entry = self.journal.output(profile_url, section)
+            if entry is not None:
+                print(f"Using {section} completed earlier in run {self.journal.run_id} "
+                      f"(scraped at {entry['scraped_at']})")
+                cached[section] = self._section_records(section, entry)
+        return cached
+    
+    @staticmethod
+    def _section_records(section: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Stored {'scraped_at', 'items'} section with its item dicts turned into records"""
+        record = SECTION_RECORDS[section]
+        return dict(entry, items=[record.from_dict(item, entry['scraped_at']) for item in entry['items']])
+    
+    def _journal_sections(self, profile_url: str, username: str, sections: Dict[str, List[Any]],
+                          scraped_at: str):
+        if not self.journal:
+            return
+        for section, items in sections.items():
+            if items:
+                self.journal.done(profile_url, section, {'scraped_at': scraped_at,
+                                                         'items': [item.to_dict() for item in items]},
+                                  username=username)
+            else:
+                # Same rule as the cache: an empty section may be a failed page load, so retry it
+                self.journal.failed(profile_url, section, "no items extracted", username=username)
     
-    def extract_post_data(self, element, index: int) -> Dict[str, Any]:
-        """Extract data from a single post element with improved selectors"""
-        post_data = {'index': index}
+    def _profile_result(self, username: str, profile_url: str, posts: List[Post],
+                        comments: List[Comment], scraped_at: str = None) -> UserProfile:
+        return UserProfile(username, profile_url, scraped_at, posts, comments)
+    
+    def scrape_user_profile(self, profile_url: str, parallel_sections: bool = None,
+                            refresh: str = None, incremental: bool = False,
+                            snapshot: Any = None) -> UserProfile:
+        """Scrape posts and comments for a profile.
         
-        try:
-            # Extract title with multiple approaches
-            title_selectors = [
-                "h3",
-                "[data-testid='post-title']",
-                "[slot='title']",
-                "a[data-testid='post-title']",
-                "[data-adclicklocation='title']",
-                ".Post-title",
-                "h1",
-                "[data-click-id='title']"
-            ]
-            
-            for selector in title_selectors:
-                try:
-                    title_element = element.find_element(By.CSS_SELECTOR, selector)
-                    title_text = title_element.text.strip()
-                    if title_text:
-                        post_data['title'] = title_text
-                        break
-                except:
-                    continue
-            
-            # Extract URL/permalink
-            url_selectors = [
-                "a[href*='/comments/']",
-                "a[data-testid='post-title']",
-                "[data-click-id='title'] a"
-            ]
-            
-            for selector in url_selectors:
-                try:
-                    url_element = element.find_element(By.CSS_SELECTOR, selector)
-                    href = url_element.get_attribute('href')
-                    if href and '/comments/' in href:
-                        post_data['url'] = href
-                        break
-                except:
-                    continue
-            
-            # Extract subreddit
-            subreddit_selectors = [
-                "a[href*='/r/'][data-testid='subreddit-name']",
-                "a[href*='/r/']",
-                "[data-testid='subreddit-name']",
-                "faceplate-tracker a[href*='/r/']"
-            ]
-            
-            for selector in subreddit_selectors:
-                try:
-                    subreddit_element = element.find_element(By.CSS_SELECTOR, selector)
-                    subreddit_text = subreddit_element.text.strip()
-                    if subreddit_text:
-                        post_data['subreddit'] = subreddit_text.replace('r/', '')
-                        break
-                except:
-                    continue
-            
-            # Extract score/upvotes
-            score_selectors = [
-                "shreddit-score",
-                "[data-testid='vote-arrows'] span",
-                "faceplate-number",
-                ".score",
-                "[aria-label*='upvote']"
-            ]
-            
-            for selector in score_selectors:
-                try:
-                    score_element = element.find_element(By.CSS_SELECTOR, selector)
-                    score_text = score_element.text.strip()
-                    if score_text and score_text != '•':
-                        post_data['score'] = score_text
-                        break
-                except:
-                    continue
-            
-            # Extract timestamp
-            time_selectors = [
-                "faceplate-timeago",
-                "[data-testid='post-timestamp']",
-                "time",
-                "[data-testid='post-metadata'] time"
-            ]
-            
-            for selector in time_selectors:
-                try:
-                    time_element = element.find_element(By.CSS_SELECTOR, selector)
-                    timestamp = time_element.get_attribute('datetime') or time_element.text
-                    if timestamp:
-                        post_data['timestamp'] = timestamp
-                        break
-                except:
-                    continue
-            
-            # Extract post content/selftext
-            content_selectors = [
-                "[data-testid='post-content']",
-                ".usertext-body",
-                "[slot='text-body']",
-                "div[data-adclicklocation='media']"
-            ]
-            
-            for selector in content_selectors:
-                try:
-                    content_element = element.find_element(By.CSS_SELECTOR, selector)
-                    content_text = content_element.text.strip()
-                    if content_text:
-                        post_data['content'] = content_text
-                        break
-                except:
-                    continue
-            
-            # Extract number of comments
-            comment_selectors = [
-                "a[href*='/comments/'] span",
-                "[data-testid='comment-count']",
-                "a[data-click-id='comments']"
-            ]
-            
-            for selector in comment_selectors:
+        With incremental=True, the previous scrape (a dict, a file path, or the default
+        save_to_file output) is loaded, scrolling stops at already-known items and only
+        new items are merged in front of the old ones.
+        
+        Returns a UserProfile; to_dict() gives the JSON layout, and profile['posts'] /
+        post['title'] style reads still work for code written against the old dict result.
+        """
+        username = self.extract_username_from_url(profile_url)
+        self.profile_metrics = self.metrics.child()
+        with self.profile_metrics.span("profile"):
+            data = self._scrape_or_reuse(username, profile_url, parallel_sections, refresh,
+                                         incremental, snapshot)
+        print(self.profile_metrics.format_summary(f"TIMING FOR {username}"))
+        return data
+    
+    def _scrape_or_reuse(self, username: str, profile_url: str, parallel_sections: bool,
+                         refresh: str, incremental: bool, snapshot: Any) -> UserProfile:
+        # Per-profile JSONL writer: items are appended as soon as they are extracted
+        self.profile_writer = self.sink.profile(username) if self.sink else None
+        refresh = refresh or self.refresh
+        cached = self._journaled_sections(profile_url, self._cached_sections(username, refresh))
+        if self.profile_writer:
+            # Replayed items keep the time they were scraped at, not the time they are re-emitted
+            if 'posts' in cached:
+                for entry in cached['posts']['items']:
+                    self.profile_writer.post(entry, cached['posts']['scraped_at'])
+            if 'comments' in cached:
+                for entry in cached['comments']['items']:
+                    self.profile_writer.comment(entry, cached['comments']['scraped_at'])
+        
+        if len(cached) == 2:
+            # Full cache hit: no browser needed at all
+            data = self._profile_result(
+                username, profile_url, cached['posts']['items'], cached['comments']['items'],
+                scraped_at=min(entry['scraped_at'] for entry in cached.values())
+            )
+        else:
+            previous = load_snapshot(username, snapshot) if incremental else None
+            if incremental and not previous:
+                print(f"No previous snapshot for {username}, doing a full scrape")
+            
+            if not self.pool:
+                data = self._scrape_user_profile(profile_url, parallel_sections, cached, previous)
+            else:
+                # Borrow warm sessions for this profile only and hand them back afterwards
+                completed = False
                 try:
-                    comment_element = element.find_element(By.CSS_SELECTOR, selector)
-                    comment_text = comment_element.text.strip()
-                    if 'comment' in comment_text.lower():
-                        post_data['comment_count'] = comment_text
-                        break
-                except:
-                    continue
-            
-        except Exception as e:
-            print(f"Error extracting post data: {e}")
+                    data = self._scrape_user_profile(profile_url, parallel_sections, cached, previous)
+                    completed = True
+                finally:
+                    self.close(discard=not completed)
         
-        return post_data if post_data.get('title') else None
-      
+        if self.profile_writer:
+            self.profile_writer.finish(data)
+            self.profile_writer = None
+        return data
+    
+    async def scrape_user_profile_async(self, profile_url: str, parallel_sections: bool = None) -> UserProfile:
+        """Async wrapper around scrape_user_profile (one profile at a time per scraper;
+        use AsyncRedditScraper to keep many profiles in flight)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.scrape_user_profile, profile_url, parallel_sections)
     
-    def scrape_user_profile(self, profile_url: str) -> Dict[str, Any]:
+    def _scrape_user_profile(self, profile_url: str, parallel_sections: bool = None,
+                             cached: Dict[str, Dict[str, Any]] = None,
+                             previous: UserProfile = None) -> UserProfile:
+        cached = cached or {}
+        known_posts = known_keys(previous.posts, post_key) if previous else set()
+        known_comments = known_keys(previous.comments, comment_key) if previous else set()
+        if parallel_sections is None:
+            parallel_sections = self.parallel_sections
         if not self.driver:
             self.setup_driver()
+        instrument_driver(self.driver, self.profile_metrics)
+        self.waiter.reset()
     
         username = self.extract_username_from_url(profile_url)
         print(f"Scraping profile for user: {username}")
+        scraped_at = datetime.now().isoformat()
+        depth = self.depth.to_dict()
+        if self.journal:
+            for section in ('posts', 'comments'):
+                if section not in cached:
+                    self.journal.start(profile_url, section, username)
     
-        print("\n" + "="*50)
-        print("SCRAPING POSTS")
-        print("="*50)
-        posts = self.scrape_posts(username)
-    
-        time.sleep(5)
-    
-        print("\n" + "="*50)
-        print("SCRAPING COMMENTS")
-        print("="*50)
-    
-    # ✅ Use CommentScraper from comments.py
-        comment_scraper = CommentScraper(self.driver, self.wait)
-        comments = comment_scraper.scrape_comments(username)
-    
-        return {
-            'username': username,
-            'profile_url': profile_url,
-            'scraped_at': datetime.now().isoformat(),
-            'posts': posts,
-            'comments': comments,
-            'total_posts': len(posts),
-            'total_comments': len(comments)
-        }
+        if parallel_sections and not cached:
+            # /submitted/ and /comments/ are independent: load them in two sessions at once
+            if not self.comment_driver:
+                self.setup_comment_driver()
+            instrument_driver(self.comment_driver, self.profile_metrics)
+            self.comment_waiter.reset()
+            
+            print("\n" + "="*50)
+            print("SCRAPING POSTS AND COMMENTS IN PARALLEL")
+            print("="*50)
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                comments_future = executor.submit(self.scrape_comments, username, self.comment_driver,
+                                                  self.comment_wait, self.comment_waiter, known_comments)
+                posts = self.scrape_posts(username, known_posts)
+                comments = comments_future.result()
+            
+            wait_time = self.waiter.total_wait_time() + self.comment_waiter.total_wait_time()
+        else:
+            if 'posts' in cached:
+                posts = cached['posts']['items']
+            else:
+                print("\n" + "="*50)
+                print("SCRAPING POSTS")
+                print("="*50)
+                with self.profile_metrics.span("posts"):
+                    posts = self.scrape_posts(username, known_posts)
+    
+            if 'comments' in cached:
+                comments = cached['comments']['items']
+            else:
+                print("\n" + "="*50)
+                print("SCRAPING COMMENTS")
+                print("="*50)
+    
+                # ✅ Use CommentScraper from comments.py
+                with self.profile_metrics.span("comments"):
+                    comments = self.scrape_comments(username, known=known_comments)
+            
+            wait_time = self.waiter.total_wait_time()
+    
+        print(f"Total time spent waiting on page readiness: {wait_time:.2f}s")
+        
+        if previous:
+            new_posts, new_comments = len(posts), len(comments)
+            if 'posts' not in cached:
+                posts = merge_items(posts, previous.posts, post_key)
+            if 'comments' not in cached:
+                comments = merge_items(comments, previous.comments, comment_key)
+            print(f"Incremental scrape: {new_posts} new posts, {new_comments} new comments")
+        
+        if self.cache:
+            # Empty results are not cached so a failed page load is retried next time
+            for section, items in (('posts', posts), ('comments', comments)):
+                if section not in cached and items:
+                    self.cache.put_section(username, section, [item.to_dict() for item in items],
+                                           scraped_at, depth)
+        
+        self._journal_sections(profile_url, username, {
+            section: items for section, items in (('posts', posts), ('comments', comments))
+            if section not in cached
+        }, scraped_at)
+    
+        timestamps = [scraped_at] + [entry['scraped_at'] for entry in cached.values()]
+        return self._profile_result(username, profile_url, posts, comments, scraped_at=min(timestamps))
 
     
-    def save_to_file(self, data: Dict[str, Any], filename: str = None):
+    def save_to_file(self, data: UserProfile, filename: str = None):
         """Save scraped data to JSON file"""
         if not filename:
-            filename = f"{data['username']}_scraped_data.json"
+            filename = f"{data.username}_scraped_data.json"
         
         with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+            json.dump(data.to_dict(), f, indent=2, ensure_ascii=False)
         
         print(f"Data saved to {filename}")
     
-    def close(self):
-        """Close the browser driver"""
-        if self.driver:
-            self.driver.quit()
+    def close(self, discard: bool = False):
+        """Close the browser driver(s), or return them to the pool"""
+        for driver in (self.driver, self.comment_driver):
+            if not driver:
+                continue
+            if self.pool:
+                self.pool.release(driver, discard=discard)
+            else:
+                driver.quit()
+        self.driver = None
+        self.comment_driver = None
 
 def main():
     """Example usage of the scraper"""
@@ -403,8 +594,8 @@ def main():
             
             # Print summary
             print(f"\n📊 SCRAPING SUMMARY:")
-            print(f"   Posts found: {data['total_posts']}")
-            print(f"   Comments found: {data['total_comments']}")
+            print(f"   Posts found: {data.total_posts}")
+            print(f"   Comments found: {data.total_comments}")
             
             # Save to file
             scraper.save_to_file(data)
@@ -0,0 +1,149 @@
+"""
+selector_registry.py - Adaptive ordering of selector fallback chains
+The chains in reddit_selectors.py are ordered by precision (specific selectors first, broad
+ones like "div p" last), so that order is kept. The registry records how often each selector
+produces a value and only moves a selector to the back once it has clearly stopped matching,
+so after a markup change each field stops paying for the same misses on every element.
+Demoted selectors are re-tried every so often, and stats decay, so a reverted change is
+picked up again. Stats can be saved to a JSON file and reused by later runs.
+"""
+
+import os
+import json
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Weight of older observations; 0.98 halves a selector's history every ~35 lookups
+DEFAULT_DECAY = 0.98
+# A selector goes to the back of its chain once its smoothed hit rate is below this...
+DEFAULT_DEMOTE_BELOW = 0.2
+# ...over at least this many (decayed) tries
+DEFAULT_MIN_TRIES = 10.0
+# Every Nth lookup of a chain (counting each element of a batch) uses the declared order,
+# so demoted selectors get re-tried
+DEFAULT_PROBE_EVERY = 50
+
+
+class SelectorRegistry:
+    """Thread-safe per-chain, per-selector hit rates with optional persistence"""
+
+    def __init__(self, path: Optional[str] = None, decay: float = DEFAULT_DECAY,
+                 demote_below: float = DEFAULT_DEMOTE_BELOW, min_tries: float = DEFAULT_MIN_TRIES,
+                 probe_every: int = DEFAULT_PROBE_EVERY):
+        self.path = path
+        self.decay = decay
+        self.demote_below = demote_below
+        self.min_tries = min_tries
+        self.probe_every = probe_every
+        # {chain: {selector: [decayed hits, decayed tries]}}
+        self._stats: Dict[str, Dict[str, List[float]]] = {}
+        self._orders: Dict[str, List[str]] = {}
+        self._calls: Dict[str, int] = {}
+        # This run only: chain lookups served and selectors tried, for lookups_per_field()
+        self._resolutions: Dict[str, int] = {}
+        self._lookups: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        if path:
+            self.load(path)
+
+    @staticmethod
+    def _rate(stats: Optional[List[float]]) -> float:
+        # Laplace smoothing: untried selectors start at 0.5 and still get their turn
+        hits, tries = stats or (0.0, 0.0)
+        return (hits + 1) / (tries + 2)
+
+    def _demoted(self, stats: Optional[List[float]]) -> bool:
+        return stats is not None and stats[1] >= self.min_tries and self._rate(stats) < self.demote_below
+
+    def ordered(self, chain: str, selectors: Sequence[str]) -> List[str]:
+        """selectors in declaration order, with ones that stopped matching moved to the back"""
+        order, probes = self.plan(chain, selectors)
+        # Probe: demoted selectors that match again recover their rate
+        return list(selectors) if probes else order
+
+    def plan(self, chain: str, selectors: Sequence[str], count: int = 1) -> Tuple[List[str], List[int]]:
+        """Order for the next count lookups of chain (a batch), and which of them are probes.
+
+        Probes are 0-based positions in the batch that should use the declared order instead;
+        every probe_every-th lookup of the chain is one, however the lookups are batched.
+        """
+        with self._lock:
+            start = self._calls.get(chain, 0)
+            self._calls[chain] = start + count
+            probes = []
+            if self.probe_every:
+                probes = list(range(-(start + 1) % self.probe_every, count, self.probe_every))
+            order = self._orders.get(chain)
+            if order is None or len(order) != len(selectors) or set(order) != set(selectors):
+                stats = self._stats.get(chain, {})
+                demoted = [selector for selector in selectors if self._demoted(stats.get(selector))]
+                order = [selector for selector in selectors if selector not in demoted] + demoted
+                self._orders[chain] = order
+            return order, probes
+
+    def demoted(self) -> Dict[str, List[str]]:
+        """{chain: selectors currently moved to the back}"""
+        with self._lock:
+            return {chain: [selector for selector, stats in selectors.items() if self._demoted(stats)]
+                    for chain, selectors in sorted(self._stats.items())
+                    if any(self._demoted(stats) for stats in selectors.values())}
+
+    def record(self, chain: str, selector: str, hit: bool):
+        """Count one lookup of selector in chain and whether it produced a value"""
+        with self._lock:
+            stats = self._stats.setdefault(chain, {}).setdefault(selector, [0.0, 0.0])
+            stats[0] = stats[0] * self.decay + (1.0 if hit else 0.0)
+            stats[1] = stats[1] * self.decay + 1.0
+            self._lookups[chain] = self._lookups.get(chain, 0) + 1
+            self._orders.pop(chain, None)
+
+    def resolved(self, chain: str, count: int = 1):
+        """Count count field lookups through chain (each may try several selectors)"""
+        with self._lock:
+            self._resolutions[chain] = self._resolutions.get(chain, 0) + count
+
+    def hit(self, chain: str, selector: str):
+        self.record(chain, selector, True)
+
+    def miss(self, chain: str, selector: str):
+        self.record(chain, selector, False)
+
+    def rates(self) -> Dict[str, Dict[str, float]]:
+        """{chain: {selector: smoothed hit rate}}"""
+        with self._lock:
+            return {chain: {selector: round(self._rate(stats), 3) for selector, stats in selectors.items()}
+                    for chain, selectors in self._stats.items()}
+
+    def lookups_per_field(self) -> Dict[str, float]:
+        """{chain: average selectors tried per lookup} in this run; 1.0 means the first choice always hit"""
+        with self._lock:
+            return {chain: round(self._lookups.get(chain, 0) / count, 2)
+                    for chain, count in sorted(self._resolutions.items()) if count}
+
+    def load(self, path: str):
+        """Merge saved stats from path; a missing or unreadable file starts from scratch"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            for chain, selectors in saved.get('chains', {}).items():
+                for selector, stats in selectors.items():
+                    self._stats.setdefault(chain, {})[selector] = [float(stats[0]), float(stats[1])]
+            self._orders.clear()
+
+    def save(self, path: Optional[str] = None):
+        """Write the stats atomically to path (default: the path it was loaded from)"""
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            payload = {'decay': self.decay,
+                       'chains': {chain: {selector: [round(value, 4) for value in stats]
+                                          for selector, stats in selectors.items()}
+                                  for chain, selectors in self._stats.items()}}
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, indent=2)
+        os.replace(tmp_path, path)
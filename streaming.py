@@ -0,0 +1,279 @@
+"""
+streaming.py - Configurable scrape depth and the streaming scroll-and-extract loop
+Instead of scrolling a fixed number of times and extracting everything at the end, the
+loop extracts newly loaded items after every scroll and removes already-extracted nodes,
+so long histories can be collected without the page growing without bound. With a memory
+limit, a browser session that still grows past it is swapped for a fresh one that reopens
+the listing after the last item collected.
+"""
+
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from browser_extract import extract_posts_in_browser, extract_comments_in_browser
+from driver_pool import browser_memory_mb
+from incremental import SECTION_KEYS
+from normalize import to_utc
+from records import SECTION_RECORDS
+
+SECTION_EXTRACTORS = {
+    'posts': extract_posts_in_browser,
+    'comments': extract_comments_in_browser,
+}
+
+SECTION_ITEM_SELECTORS = {
+    'posts': "shreddit-post",
+    'comments': "shreddit-profile-comment",
+}
+
+# Session recycles allowed per section before the loop keeps the session it has
+DEFAULT_MAX_RECYCLES = 5
+
+# Consecutive items older than the cutoff that end a time-window scrape; a single old item
+# is usually a pinned post sitting above newer ones
+DEFAULT_OLD_STREAK = 3
+
+_POST_ID = re.compile(r'/comments/([a-z0-9]+)')
+
+
+def listing_fullname(data: dict) -> Optional[str]:
+    """Listing fullname of an extracted item, usable as an ?after= cursor, or None"""
+    if data.get('fullname'):
+        return data['fullname']
+    match = _POST_ID.search(data.get('url') or '')
+    return f"t3_{match.group(1)}" if match else None
+
+
+def resume_url(url: str, after: str) -> str:
+    """url with its ?after= cursor set to after, keeping any other query parameters"""
+    parts = urlsplit(url)
+    query = [(name, value) for name, value in parse_qsl(parts.query) if name != 'after']
+    query.append(('after', after))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+class ScrapeDepth:
+    """How much history to collect: an item count, a time window, or everything"""
+
+    def __init__(self, max_items: Optional[int] = 7, since: Optional[datetime] = None,
+                 window: Optional[timedelta] = None, max_scrolls: Optional[int] = 8,
+                 old_streak: int = DEFAULT_OLD_STREAK):
+        self.max_items = max_items
+        self.since = since
+        self.window = window
+        self.max_scrolls = max_scrolls
+        self.old_streak = old_streak
+
+    @classmethod
+    def all(cls) -> "ScrapeDepth":
+        """Collect the complete history"""
+        return cls(max_items=None, max_scrolls=None)
+
+    @classmethod
+    def within(cls, window: timedelta) -> "ScrapeDepth":
+        """Collect everything newer than now - window"""
+        return cls(max_items=None, window=window, max_scrolls=None)
+
+    def cutoff(self) -> Optional[datetime]:
+        """Oldest timestamp still inside the depth, as aware UTC"""
+        cutoffs = []
+        if self.since:
+            cutoffs.append(to_utc(self.since))
+        if self.window:
+            cutoffs.append(datetime.now(timezone.utc) - self.window)
+        return max(cutoffs) if cutoffs else None
+
+    def enough(self, count: int) -> bool:
+        return self.max_items is not None and count >= self.max_items
+
+    def too_old(self, item: Any, cutoff: Optional[datetime]) -> bool:
+        """True if the Post/Comment was created before cutoff"""
+        if cutoff is None:
+            return False
+        return item.created_at is not None and item.created_at < cutoff
+
+    def reached(self, items: List[Optional[Any]], cutoff: Optional[datetime]) -> bool:
+        """True once the extracted items already satisfy the depth"""
+        gate = AgeGate(self, cutoff)
+        within = 0
+        for item in items:
+            if not item:
+                continue
+            if gate.too_old(item):
+                if gate.ended:
+                    return True
+            else:
+                within += 1
+        return self.enough(within)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The limits a scrape at this depth ran under, with the cutoff fixed to an absolute time"""
+        cutoff = self.cutoff()
+        return {'max_items': self.max_items, 'max_scrolls': self.max_scrolls,
+                'cutoff': cutoff.isoformat() if cutoff else None}
+
+    def covered_by(self, collected: Optional[Dict[str, Any]]) -> bool:
+        """True if a scrape recorded with to_dict() went at least as deep as this depth asks"""
+        if not collected:
+            return False
+
+        def at_least(stored, wanted):
+            # None is unlimited
+            return stored is None or (wanted is not None and stored >= wanted)
+
+        cutoff = self.cutoff()
+        stored_cutoff = collected.get('cutoff')
+        return (at_least(collected.get('max_items'), self.max_items)
+                and at_least(collected.get('max_scrolls'), self.max_scrolls)
+                and (stored_cutoff is None
+                     or (cutoff is not None and to_utc(stored_cutoff) <= cutoff)))
+
+    def __repr__(self):
+        return (f"ScrapeDepth(max_items={self.max_items}, since={self.since}, "
+                f"window={self.window}, max_scrolls={self.max_scrolls})")
+
+
+class AgeGate:
+    """Tracks one pass over a listing against a depth's cutoff.
+
+    Items older than the cutoff are skipped rather than ending the pass, because pinned posts
+    sit above newer ones; the window has ended once depth.old_streak of them come in a row.
+    """
+
+    def __init__(self, depth: ScrapeDepth, cutoff: Optional[datetime]):
+        self.depth = depth
+        self.cutoff = cutoff
+        self.streak = 0
+
+    def too_old(self, item: Any) -> bool:
+        """True if item falls outside the window and should be skipped"""
+        if self.depth.too_old(item, self.cutoff):
+            self.streak += 1
+            return True
+        self.streak = 0
+        return False
+
+    @property
+    def ended(self) -> bool:
+        return self.streak >= self.depth.old_streak
+
+
+def stream_items(driver, waiter, section: str, depth: ScrapeDepth, scroll_timeout: float = 3.0,
+                 prune: bool = True, known: Optional[Set[str]] = None,
+                 max_memory_mb: Optional[float] = None,
+                 recycle: Optional[Callable[[Any, str], Any]] = None,
+                 max_recycles: int = DEFAULT_MAX_RECYCLES) -> Iterator[Tuple[int, Optional[Any]]]:
+    """Yield (index, record) for every post/comment element as it appears while scrolling.
+
+    record is a Post or Comment, or None for elements that could not be extracted. The loop stops when depth is
+    satisfied, depth.old_streak items in a row older than the depth's cutoff (single old items,
+    such as pinned posts, are skipped) or an already-known item appears, the
+    scroll budget runs out, or no new content loads. Callers may also stop iterating early.
+
+    If the browser's resident memory passes max_memory_mb between scrolls, recycle(driver, url)
+    must return a fresh session showing url. url is the listing opened after the last item
+    yielded (?after=<fullname>); when no fullname is known it is the current page, and the loop
+    scrolls back past the items already yielded. Either way it carries on with the same indexes
+    and counts, skipping anything yielded before. At most max_recycles recycles happen per call.
+    """
+    extract = SECTION_EXTRACTORS[section]
+    record = SECTION_RECORDS[section]
+    key = SECTION_KEYS[section]
+    item_selector = SECTION_ITEM_SELECTORS[section]
+    cutoff = depth.cutoff()
+    gate = AgeGate(depth, cutoff)
+    position = 0
+    kept = 0
+    scrolls = 0
+    # Identities yielded so far (the listing fullname, or the content key when the page has
+    # none, which would merge two identical "Thanks!" comments on one post), the fullname of
+    # the last one, and whether a recycled session without a cursor is still scrolling back
+    seen: Set[str] = set()
+    cursor: Optional[str] = None
+    recycles = 0
+    replaying = False
+
+    while True:
+        for data in extract(driver, limit=None, fresh_only=True, prune=prune, fullnames=True):
+            item = record.from_dict(dict(data, index=position)) if data else None
+            fullname = listing_fullname(data) if data else None
+            if item is not None and (fullname or key(item)) in seen:
+                # Listings shift while they are read; never yield the same item twice
+                continue
+            if replaying:
+                if item is None:
+                    continue
+                print(f"Caught up after {position} {section}, continuing")
+                replaying = False
+            index = position
+            position += 1
+            if item is not None:
+                seen.add(fullname or key(item))
+                cursor = fullname or cursor
+                if known and key(item) in known:
+                    print(f"Reached already-known {section[:-1]} at position {index + 1}")
+                    return
+                if gate.too_old(item):
+                    if gate.ended:
+                        print(f"Reached {section} older than {cutoff:%Y-%m-%d %H:%M} UTC")
+                        return
+                    print(f"Skipping {section[:-1]} {index + 1}, older than the window (pinned?)")
+                    continue
+                kept += 1
+            yield index, item
+            if depth.enough(kept):
+                return
+
+        if max_memory_mb is not None and recycle and not replaying and recycles < max_recycles:
+            memory = browser_memory_mb(driver)
+            if memory is not None and memory > max_memory_mb:
+                recycles += 1
+                url = resume_url(driver.current_url, cursor) if cursor else driver.current_url
+                print(f"Browser session using {memory:.0f} MB after {position} {section}, recycling it "
+                      f"({recycles}/{max_recycles}) and resuming "
+                      f"{'after ' + cursor if cursor else 'from the top'}")
+                driver = recycle(driver, url)
+                waiter.driver = driver
+                replaying = cursor is None
+                continue
+
+        if not replaying and depth.max_scrolls is not None and scrolls >= depth.max_scrolls:
+            return
+
+        if replaying:
+            # Scrolling back over ground already covered does not use up the scroll budget
+            print(f"Scrolling back to {section[:-1]} {position + 1}...")
+        else:
+            scrolls += 1
+            print(f"Scrolling... {scrolls}/{depth.max_scrolls or '∞'} ({kept} {section} so far)")
+        current_height = waiter.scroll_height()
+        current_count = waiter.element_count(item_selector)
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        if not waiter.new_content(current_height, item_selector, current_count, timeout=scroll_timeout):
+            print("No new content loaded, stopping scroll")
+            return
+        waiter.stable_scroll_height(settle=waiter.poll_interval * 2, timeout=scroll_timeout)
+
+
+def depth_stop_condition(driver, section: str, depth: ScrapeDepth,
+                         known: Optional[Set[str]] = None) -> Optional[Callable[[], bool]]:
+    """stop_when callback for wait_and_scroll: True once the page holds enough history.
+
+    Returns None when nothing but the scroll budget limits the depth, so no check is needed.
+    """
+    extract = SECTION_EXTRACTORS[section]
+    record = SECTION_RECORDS[section]
+    key = SECTION_KEYS[section]
+    cutoff = depth.cutoff()
+    if depth.max_items is None and cutoff is None and not known:
+        return None
+
+    def reached():
+        items = [record.from_dict(data) if data else None for data in extract(driver, limit=None)]
+        if known and any(item and key(item) in known for item in items):
+            return True
+        return depth.reached(items, cutoff)
+
+    return reached
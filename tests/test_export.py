@@ -0,0 +1,26 @@
+from datetime import datetime, timezone
+
+import pyarrow as pa
+
+from export import iter_scraped_items, post_row, subreddit_summary
+from jsonl_sink import JsonlSink
+from records import Post
+
+POST = {'index': 0, 'title': "Borrow checker question", 'subreddit': "rust", 'timestamp': "3 days ago"}
+
+
+def test_replayed_jsonl_items_keep_their_scrape_time(tmp_path):
+    path = str(tmp_path / "run.jsonl")
+    with JsonlSink(path) as sink:
+        sink.profile("example_user").post(Post.from_dict(POST), "2024-03-10T12:00:00+00:00")
+
+    [(section, username, item, scraped_at)] = list(iter_scraped_items(path))
+    assert (section, username, scraped_at) == ('posts', "example_user", "2024-03-10T12:00:00+00:00")
+    assert post_row(username, item, scraped_at)['created_at'] == datetime(2024, 3, 7, 12, tzinfo=timezone.utc)
+
+
+def test_subreddit_summary_counts_items_without_a_subreddit():
+    table = pa.table({'subreddit': pa.array(["rust", None, None, "Python"]).dictionary_encode(),
+                      'score': [1, 2, 3, 4]})
+    counts = {row['subreddit']: row['subreddit_count'] for row in subreddit_summary(table).to_pylist()}
+    assert counts == {"rust": 1, None: 2, "Python": 1}
@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+from html_extract import ParsedPage, parse_comments, parse_file, parse_posts
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def _read(name):
+    with open(os.path.join(FIXTURES, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+EXPECTED_POSTS = [
+    {
+        'index': 0,
+        'title': "TIL about functools.cache",
+        'url': "https://www.reddit.com/r/Python/comments/1abc23/til_about_functools_cache/",
+        'subreddit': "Python",
+        'score': "1,234",
+        'timestamp': "7 mo. ago",
+        'content': "It memoizes a function with an unbounded cache.\nHandy for recursive helpers.",
+        'comment_count': "56 comments",
+    },
+    {
+        # shreddit-score only holds '•' here, so the score falls back to faceplate-number
+        'index': 1,
+        'title': "Borrow checker question",
+        'url': "https://www.reddit.com/r/rust/comments/2def45/borrow_checker_question/",
+        'subreddit': "rust",
+        'score': "42",
+        'timestamp': "8 mo. ago",
+        'comment_count': "1 comment",
+    },
+    None,  # no title
+]
+
+EXPECTED_COMMENTS = [
+    {
+        'index': 0,
+        'body': "lru_cache(maxsize=None) does the same on older versions.\ncache is just a shorter spelling.",
+        'subreddit': "Python",
+        'score': "17",
+        'timestamp': "7 mo. ago",
+        'post_context': "TIL about functools.cache",
+        'post_url': "https://www.reddit.com/r/Python/comments/1abc23/til_about_functools_cache/",
+    },
+    {
+        # score and timestamp come from the metadata spans
+        'index': 1,
+        'body': "Clone it first, then move the clone into the closure.",
+        'subreddit': "rust",
+        'post_context': "Borrow checker question",
+        'post_url': "https://www.reddit.com/r/rust/comments/2def45/borrow_checker_question/",
+        'score': "3 points",
+        'timestamp': "2 days ago",
+    },
+    None,  # body too short to be told apart from labels
+]
+
+
+def test_parse_posts():
+    assert parse_posts(_read("submitted.html"), limit=None) == EXPECTED_POSTS
+
+
+def test_parse_comments():
+    assert parse_comments(_read("comments.html"), limit=None) == EXPECTED_COMMENTS
+
+
+@pytest.mark.parametrize("parse, name", [(parse_posts, "submitted.html"), (parse_comments, "comments.html")])
+def test_limit(parse, name):
+    assert len(parse(_read(name), limit=1)) == 1
+
+
+def test_parse_file_drops_failed_items():
+    items = parse_file(os.path.join(FIXTURES, "submitted.html"), 'posts', limit=None)
+    assert items == EXPECTED_POSTS[:2]
+
+
+def test_find_all_is_scoped_to_descendants():
+    page = ParsedPage("<div id='a'><p id='x'><a id='1'></a></p><a id='2'></a></div><a id='3'></a>")
+    outer, inner = page.select_all("div")[0], page.select_all("p")[0]
+    assert [el.get('id') for el in page.find_all(outer, "a")] == ['1', '2']
+    assert [el.get('id') for el in page.find_all(inner, "a")] == ['1']
+    # Like querySelectorAll, the selector itself may reach above the scope
+    assert [el.get('id') for el in page.find_all(inner, "div a")] == ['1']
+    assert page.find_all(inner, "p") == []
@@ -0,0 +1,22 @@
+import pytest
+
+from normalize import parse_count
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("42", 42),
+    ("5 points", 5),
+    ("12 comments", 12),
+    ("1 comment", 1),
+    ("1,234 comments", 1234),
+    ("12,345 points", 12345),
+    ("1,234,567", 1234567),
+    ("1.2k", 1200),
+    ("3M", 3_000_000),
+    ("−7", -7),
+    ("•", None),
+    ("", None),
+    (None, None),
+])
+def test_parse_count(text, expected):
+    assert parse_count(text) == expected
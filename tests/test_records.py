@@ -0,0 +1,42 @@
+import pytest
+
+from records import Comment, Post, UserProfile
+
+POST = {'index': 0, 'title': "TIL about functools.cache", 'subreddit': "Python", 'score': "1,234",
+        'url': "https://www.reddit.com/r/Python/comments/1abc23/til_about_functools_cache/"}
+COMMENT = {'index': 0, 'body': "Clone it first, then move the clone.", 'score': "3 points",
+           'post_url': "https://www.reddit.com/r/rust/comments/2def45/borrow_checker_question/"}
+
+
+def test_records_are_hashable_and_equal_by_value():
+    assert Post.from_dict(POST) == Post.from_dict(POST)
+    assert len({Post.from_dict(POST), Post.from_dict(POST), Comment.from_dict(COMMENT)}) == 2
+
+
+def test_record_dict_access():
+    post = Post.from_dict(POST)
+    assert post['title'] == POST['title']
+    assert post.get('content') is None
+    assert post.get('content', '') == ''
+    with pytest.raises(KeyError):
+        post['content']
+    assert post.score_value == 1234
+
+
+def test_profile_dict_access():
+    profile = UserProfile.from_dict({'username': "example_user", 'scraped_at': "2024-03-03T00:00:00",
+                                     'posts': [POST], 'comments': [COMMENT]})
+    assert profile['username'] == "example_user"
+    assert profile['total_posts'] == 1
+    assert profile['posts'][0]['title'] == POST['title']
+    assert profile.get('missing', 'x') == 'x'
+    assert 'comments' in profile
+    assert dict(profile)['total_comments'] == 1
+    with pytest.raises(KeyError):
+        profile['missing']
+
+
+def test_profile_round_trip():
+    data = {'username': "example_user", 'profile_url': None, 'scraped_at': "2024-03-03T00:00:00",
+            'posts': [POST], 'comments': [COMMENT], 'total_posts': 1, 'total_comments': 1}
+    assert UserProfile.from_dict(data).to_dict() == data
@@ -0,0 +1,29 @@
+from run_journal import STAGE_POSTS, RunJournal
+
+URL = "https://www.reddit.com/user/example_user/"
+
+
+def test_new_run_does_not_reuse_earlier_runs(tmp_path):
+    path = str(tmp_path / "journal.db")
+    with RunJournal(path) as first:
+        first.done(URL, STAGE_POSTS, {'items': []})
+        assert first.is_done(URL, STAGE_POSTS)
+    with RunJournal(path) as second:
+        assert not second.resumed
+        assert second.run_id != first.run_id
+        assert second.output(URL, STAGE_POSTS) is None
+
+
+def test_resume_continues_the_latest_or_named_run(tmp_path):
+    path = str(tmp_path / "journal.db")
+    with RunJournal(path, run_id="run-a") as first:
+        first.done(URL, STAGE_POSTS, {'items': [1]})
+    with RunJournal(path, run_id="run-b") as second:
+        second.failed(URL, STAGE_POSTS, "timeout")
+    with RunJournal(path, resume=True) as latest:
+        assert latest.resumed and latest.run_id == "run-b"
+        assert not latest.is_done(URL, STAGE_POSTS)
+        assert latest.summary() == {STAGE_POSTS: {'failed': 1}}
+    with RunJournal(path, run_id="run-a", resume=True) as named:
+        assert named.resumed
+        assert named.output(URL, STAGE_POSTS) == {'items': [1]}
@@ -0,0 +1,54 @@
+from reddit_selectors import COMMENT_FIELD_SELECTORS
+from selector_registry import SelectorRegistry
+
+CHAIN = "comment.body"
+BODY = COMMENT_FIELD_SELECTORS['body']
+PRECISE, BROAD = BODY[0], "div p"
+
+
+def _lookup(registry, matches):
+    """Walk the chain like the extractors do; matches is the set of selectors that hit"""
+    for selector in registry.ordered(CHAIN, BODY):
+        hit = selector in matches
+        registry.record(CHAIN, selector, hit)
+        if hit:
+            return selector
+    return None
+
+
+def test_broad_selector_is_not_promoted_by_an_early_hit():
+    registry = SelectorRegistry()
+    # The first comment lacks the precise container; a broad selector catches it
+    assert _lookup(registry, {BROAD}) == BROAD
+    used = [_lookup(registry, {PRECISE, BROAD}) for _ in range(200)]
+    assert used == [PRECISE] * 200
+    assert registry.ordered(CHAIN, BODY)[0] == PRECISE
+
+
+def test_selector_that_stops_matching_is_demoted_and_recovers():
+    registry = SelectorRegistry(probe_every=20)
+    for _ in range(30):
+        _lookup(registry, {BROAD})
+    order = registry.ordered(CHAIN, BODY)
+    assert order.index(PRECISE) > order.index(BROAD)
+    assert PRECISE in registry.demoted()[CHAIN]
+    # Markup reverted: probes try the precise selector again until it is back in front
+    for _ in range(200):
+        _lookup(registry, {PRECISE, BROAD})
+    assert registry.ordered(CHAIN, BODY)[0] == PRECISE
+
+
+def test_declared_order_is_kept_among_matching_selectors():
+    registry = SelectorRegistry()
+    for _ in range(50):
+        _lookup(registry, set(BODY[3:]))
+    order = registry.ordered(CHAIN, BODY)
+    assert order[:len(BODY) - 3] == BODY[3:]
+
+
+def test_probes_count_every_lookup_of_a_batch():
+    registry = SelectorRegistry(probe_every=5)
+    batches = [registry.plan(CHAIN, BODY, 3)[1] for _ in range(5)]
+    # Lookups 5, 10 and 15 probe, wherever they fall in a batch
+    assert batches == [[], [1], [], [0], [2]]
+    assert registry.plan(CHAIN, BODY, 12)[1] == [4, 9]
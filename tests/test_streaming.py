@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import streaming
+from streaming import AgeGate, ScrapeDepth
+
+
+@pytest.mark.parametrize("stored, requested, covered", [
+    (ScrapeDepth(), ScrapeDepth(), True),
+    (ScrapeDepth(), ScrapeDepth.all(), False),
+    (ScrapeDepth(), ScrapeDepth.within(timedelta(days=3)), False),
+    (ScrapeDepth(max_items=50), ScrapeDepth(max_items=7, max_scrolls=8), True),
+    (ScrapeDepth.all(), ScrapeDepth(), True),
+    (ScrapeDepth.all(), ScrapeDepth.within(timedelta(days=3)), True),
+    (ScrapeDepth.within(timedelta(days=30)), ScrapeDepth.within(timedelta(days=3)), True),
+    (ScrapeDepth.within(timedelta(days=3)), ScrapeDepth.within(timedelta(days=30)), False),
+    (ScrapeDepth.within(timedelta(days=3)), ScrapeDepth.all(), False),
+])
+def test_covered_by(stored, requested, covered):
+    assert requested.covered_by(stored.to_dict()) is covered
+
+
+def test_unrecorded_depth_is_not_covered():
+    assert not ScrapeDepth().covered_by(None)
+
+
+class _Item:
+    def __init__(self, days_ago):
+        self.created_at = datetime.now(timezone.utc) - timedelta(days=days_ago)
+
+
+def test_pinned_old_post_does_not_end_the_window():
+    depth = ScrapeDepth.within(timedelta(days=3))
+    items = [_Item(400), _Item(1), _Item(2)]
+    assert not depth.reached(items, depth.cutoff())
+    assert ScrapeDepth(max_items=2, max_scrolls=None).reached(items, None)
+
+
+def test_window_ends_after_a_run_of_old_items():
+    depth = ScrapeDepth.within(timedelta(days=3))
+    gate = AgeGate(depth, depth.cutoff())
+    assert [gate.too_old(item) for item in [_Item(400), _Item(1), _Item(5), _Item(6)]] == [True, False, True, True]
+    assert not gate.ended
+    assert gate.too_old(_Item(7)) and gate.ended
+    assert depth.reached([_Item(1), None, _Item(5), _Item(6), _Item(7)], depth.cutoff())
+
+
+class _Waiter:
+    poll_interval = 0.0
+
+    def __init__(self, pages):
+        self.pages = pages
+
+    def scroll_height(self):
+        return 0
+
+    def element_count(self, selector):
+        return 0
+
+    def new_content(self, height, selector, count, timeout):
+        return bool(self.pages)
+
+    def stable_scroll_height(self, settle, timeout):
+        pass
+
+
+class _Driver:
+    def execute_script(self, script):
+        pass
+
+
+def test_stream_dedupes_on_fullname(monkeypatch):
+    post_url = "https://www.reddit.com/r/rust/comments/2def45/borrow_checker_question/"
+    thanks = [{'body': "Thanks, that fixed it!", 'post_url': post_url, 'fullname': f"t1_{n}"} for n in "abc"]
+    # The listing shifts between scrolls, so the second batch repeats t1_b
+    pages = [[thanks[0], thanks[1]], [thanks[1], thanks[2]]]
+    waiter = _Waiter(pages)
+    monkeypatch.setitem(streaming.SECTION_EXTRACTORS, 'comments', lambda driver, **options: waiter.pages.pop(0))
+
+    depth = ScrapeDepth(max_items=None, max_scrolls=None)
+    items = list(streaming.stream_items(_Driver(), waiter, 'comments', depth))
+    assert [index for index, _ in items] == [0, 1, 2]
+    assert [comment.body for _, comment in items] == [thanks[0]['body']] * 3
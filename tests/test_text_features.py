@@ -0,0 +1,46 @@
+from records import UserProfile
+from text_features import analyze_profiles, build_reference, summarize_features
+
+
+def _profile(username, posts):
+    return UserProfile.from_dict({'username': username, 'comments': [],
+                                  'posts': [{'title': title, 'subreddit': subreddit} for title, subreddit in posts]})
+
+
+ALICE = _profile("alice", [("python caching trick with functools", "Python"),
+                           ("python decorators explained", "Python"),
+                           ("rust borrow checker", "rust")])
+BOB = _profile("bob", [("rust lifetimes", "rust"), ("python async", "Python"), ("cooking pasta", "Cooking")])
+CAROL = _profile("carol", [("gardening tomatoes", "gardening"), ("python gardening", "Python")])
+
+
+def _features_of(username, batch, reference=None):
+    return next(f for f in analyze_profiles(batch, reference=reference) if f['username'] == username)
+
+
+def test_features_do_not_depend_on_the_batch():
+    alone = analyze_profiles([ALICE])[0]
+    for batch in ([ALICE, BOB], [CAROL, ALICE, BOB], [BOB, CAROL, ALICE]):
+        assert _features_of("alice", batch) == alone
+    assert alone['keywords'][0] == "python"
+    assert alone['subreddit_activity'] == {'Python': 2, 'rust': 1}
+
+
+def test_reference_keywords_do_not_depend_on_the_batch():
+    reference = build_reference([ALICE, BOB, CAROL])
+    alone = analyze_profiles([ALICE], reference=reference)[0]
+    assert _features_of("alice", [BOB, CAROL, ALICE], reference) == alone
+    # 'rust' also appears in bob's history, so it ranks below alice's own terms
+    assert alone['keywords'][-1] == "rust"
+
+
+def test_keyword_label_matches_the_ranking():
+    assert "FREQUENT KEYWORDS: python" in summarize_features(analyze_profiles([ALICE])[0])
+    reference = build_reference([ALICE, BOB, CAROL])
+    assert "DISTINCTIVE KEYWORDS: " in summarize_features(analyze_profiles([ALICE], reference=reference)[0])
+
+
+def test_empty_profiles():
+    [features] = analyze_profiles([UserProfile.from_dict({'username': "nobody"})])
+    assert features['keywords'] == [] and features['subreddit_activity'] == {}
+    assert features['total_words'] == 0
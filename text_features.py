@@ -0,0 +1,257 @@
+"""
+text_features.py - Local, vectorized text features for persona prompts
+Computes structured signals for a whole batch of users at once with NumPy: per-subreddit
+activity, posting-hour histograms, keywords, vocabulary richness and comment length.
+summarize_features() turns them into a compact block that replaces much of the raw text
+otherwise sent to the LLM. Every feature depends only on the user's own data (and an optional
+fixed reference corpus), never on who else is in the batch, so prompts and the persona cache
+keys built from them are stable.
+"""
+
+import re
+import sys
+import json
+from collections import Counter
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from normalize import is_absolute_timestamp
+from records import UserProfile
+
+_TOKEN = re.compile(r"[a-z][a-z0-9']{2,}")
+
+STOPWORDS = frozenset("""
+the and for are but not you all any can had her was one our out has have him his how its may new
+now old see two way who did get got let say she too use that with this from they will would there
+their what about which when make like time just know take into year your some could them than then
+look only come over think also back after work first well even want because these give most very
+been were more other being such here much where should those while does doing done each few own same
+still through under again further once both why off isn't it's i'm don't didn't doesn't can't won't
+that's there's they're you're i've i'd i'll we're http https www com reddit really thing things
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens of 3+ characters without stopwords"""
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def _profile_texts(profile: UserProfile) -> List[str]:
+    texts = [f"{post.title or ''} {post.content or ''}" for post in profile.posts]
+    texts.extend(comment.body or '' for comment in profile.comments)
+    return texts
+
+
+def build_reference(profiles: Iterable[UserProfile]) -> Dict[str, Any]:
+    """Document frequencies of a reference corpus (one document per user) for keyword IDF.
+
+    Build it once from a representative set of scrapes and pass it to every analyze_profiles
+    call, so keywords stay the same however the users being analyzed are batched.
+    """
+    documents = 0
+    document_frequency: Counter = Counter()
+    for profile in profiles:
+        documents += 1
+        terms = set()
+        for text in _profile_texts(profile):
+            terms.update(tokenize(text))
+        document_frequency.update(terms)
+    return {'documents': documents, 'document_frequency': dict(document_frequency)}
+
+
+def save_reference(reference: Dict[str, Any], path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(reference, f, sort_keys=True)
+
+
+def load_reference(path: str) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _unique(codes: np.ndarray, return_counts: bool = False):
+    """Sorted unique values of an integer array (and their counts), by sorting.
+
+    np.unique without return_counts takes a hash-based path that is far slower on the millions
+    of codes a large batch produces.
+    """
+    codes = np.sort(codes)
+    starts = np.flatnonzero(np.concatenate(([True], codes[1:] != codes[:-1]))) if len(codes) else codes
+    if not return_counts:
+        return codes[starts]
+    return codes[starts], np.diff(np.append(starts, len(codes)))
+
+
+def _reference_idf(reference: Dict[str, Any], terms: np.ndarray) -> np.ndarray:
+    """Smoothed IDF of terms in the reference corpus; unseen terms count as the rarest"""
+    frequency = reference['document_frequency']
+    doc_freq = np.array([frequency.get(term, 0) for term in terms], dtype=float)
+    return np.log((1 + reference['documents']) / (1 + doc_freq)) + 1.0
+
+
+def _group_top(groups: np.ndarray, keys: np.ndarray, scores: np.ndarray, n_groups: int,
+               top: int) -> List[List[int]]:
+    """Keys of the top-scoring entries of each group, best first.
+
+    Entries must come sorted by (group, key); the sort is stable, so ties keep key order.
+    """
+    order = np.lexsort((-scores, groups))
+    sorted_groups = groups[order]
+    starts = np.searchsorted(sorted_groups, np.arange(n_groups), side='left')
+    ends = np.searchsorted(sorted_groups, np.arange(n_groups), side='right')
+    return [keys[order[start:min(end, start + top)]].tolist() for start, end in zip(starts, ends)]
+
+
+def analyze_profiles(profiles: Sequence[UserProfile], top_keywords: int = 10,
+                     top_subreddits: int = 8,
+                     reference: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Feature dict per profile, computed for the whole batch in a few array operations.
+
+    With a reference (see build_reference), keywords are ranked by TF-IDF against that fixed
+    corpus ('keyword_ranking' is 'tf-idf'). Without one, they are the user's most frequent terms,
+    weighted by how many of the user's own posts and comments use them so a word repeated in a
+    single item does not dominate ('keyword_ranking' is 'frequency'). Either
+    way a user's features are the same whichever batch they are analyzed in. Posting hours
+    use only absolute (ISO) timestamps, since relative ones like '1 yr. ago' carry no time of day.
+    """
+    n_users = len(profiles)
+    if n_users == 0:
+        return []
+
+    subreddit_names = set()
+    item_users, item_subreddits = [], []
+    hour_users, hours = [], []
+    comment_users, comment_lengths = [], []
+
+    # Tokens of every post/comment, flattened into integer columns without a per-token loop
+    texts = [_profile_texts(profile) for profile in profiles]
+    item_owners = np.repeat(np.arange(n_users), [len(user_texts) for user_texts in texts])
+    token_lists = [_TOKEN.findall(text.lower()) for text in chain.from_iterable(texts)]
+    tokens = list(chain.from_iterable(token_lists))
+    # Term ids are alphabetical, so they also break score ties; stopwords map past the end
+    terms = np.array(sorted(set(tokens) - STOPWORDS), dtype=object)
+    vocabulary = dict.fromkeys(STOPWORDS, len(terms))
+    vocabulary.update(zip(terms.tolist(), range(len(terms))))
+    token_ids = np.fromiter(map(vocabulary.__getitem__, tokens), dtype=np.int64, count=len(tokens))
+    token_items = np.repeat(np.arange(len(token_lists)), [len(item_tokens) for item_tokens in token_lists])
+    kept = token_ids < len(terms)
+    token_ids, token_items = token_ids[kept], token_items[kept]
+    token_users = item_owners[token_items]
+
+    for user, profile in enumerate(profiles):
+        for item in list(profile.posts) + list(profile.comments):
+            if item.subreddit:
+                item_users.append(user)
+                item_subreddits.append(item.subreddit)
+                subreddit_names.add(item.subreddit)
+            if item.created_at is not None and is_absolute_timestamp(item.timestamp):
+                hour_users.append(user)
+                hours.append(item.created_at.hour)
+        for comment in profile.comments:
+            comment_users.append(user)
+            comment_lengths.append(len((comment.body or '').split()))
+
+    subreddits = np.array(sorted(subreddit_names), dtype=object)
+    subreddit_ids = {name: i for i, name in enumerate(subreddits.tolist())}
+
+    # Term counts as a sparse (user, term) -> count table
+    n_terms = max(len(terms), 1)
+    pair_codes, pair_counts = _unique(token_users * n_terms + token_ids, return_counts=True)
+    pair_users, pair_terms = np.divmod(pair_codes, n_terms)
+    doc_lengths = np.bincount(token_users, minlength=n_users)
+    doc_types = np.bincount(pair_users, minlength=n_users)
+    if reference is not None:
+        idf = _reference_idf(reference, terms)
+        scores = pair_counts / np.maximum(doc_lengths[pair_users], 1) * idf[pair_terms]
+    else:
+        # Items of the user that contain each (user, term) pair; same code order as pair_codes
+        item_terms = _unique(token_items * n_terms + token_ids)
+        items, item_term_ids = np.divmod(item_terms, n_terms)
+        _, spread = _unique(item_owners[items] * n_terms + item_term_ids, return_counts=True)
+        scores = pair_counts * np.log1p(spread)
+    keywords = _group_top(pair_users, pair_terms, scores.astype(float), n_users, top_keywords)
+
+    # Subreddit activity as a sparse (user, subreddit) -> count table
+    item_users = np.asarray(item_users, dtype=np.int64)
+    n_subs = max(len(subreddits), 1)
+    subreddit_codes = np.fromiter(map(subreddit_ids.__getitem__, item_subreddits), dtype=np.int64,
+                                  count=len(item_subreddits))
+    sub_codes, sub_counts = _unique(item_users * n_subs + subreddit_codes, return_counts=True)
+    sub_users, sub_ids = np.divmod(sub_codes, n_subs)
+    top_subs = _group_top(sub_users, np.arange(len(sub_codes)), sub_counts.astype(float),
+                          n_users, top_subreddits)
+
+    hour_histograms = np.bincount(np.asarray(hour_users, dtype=np.int64) * 24 + np.asarray(hours, dtype=np.int64),
+                                  minlength=n_users * 24).reshape(n_users, 24)
+
+    comment_users = np.asarray(comment_users, dtype=np.int64)
+    comment_counts = np.bincount(comment_users, minlength=n_users)
+    comment_words = np.bincount(comment_users, weights=np.asarray(comment_lengths, dtype=float),
+                                minlength=n_users)
+    avg_comment_words = comment_words / np.maximum(comment_counts, 1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        type_token_ratio = np.where(doc_lengths > 0, doc_types / doc_lengths, 0.0)
+        # Guiraud's root TTR depends less on text length than the plain ratio
+        root_ttr = np.where(doc_lengths > 0, doc_types / np.sqrt(doc_lengths), 0.0)
+
+    features = []
+    for user, profile in enumerate(profiles):
+        features.append({
+            'username': profile.username,
+            'subreddit_activity': {subreddits[sub_ids[i]]: int(sub_counts[i]) for i in top_subs[user]},
+            'hour_histogram': hour_histograms[user].tolist(),
+            'keywords': terms[keywords[user]].tolist() if keywords[user] else [],
+            'keyword_ranking': 'tf-idf' if reference is not None else 'frequency',
+            'total_words': int(doc_lengths[user]),
+            'type_token_ratio': round(float(type_token_ratio[user]), 3),
+            'vocabulary_richness': round(float(root_ttr[user]), 2),
+            'avg_comment_words': round(float(avg_comment_words[user]), 1),
+        })
+    return features
+
+
+def _active_hours(histogram: List[int]) -> str:
+    if not sum(histogram):
+        return "unknown"
+    peak = sorted(range(24), key=lambda hour: histogram[hour], reverse=True)[:3]
+    return ", ".join(f"{hour:02d}:00" for hour in sorted(peak)) + " UTC"
+
+
+# Only TF-IDF against a reference corpus finds what sets a user apart; without one the
+# keywords are just the user's most used terms and the prompt must not claim more
+_KEYWORD_LABELS = {'tf-idf': "DISTINCTIVE KEYWORDS", 'frequency': "FREQUENT KEYWORDS", None: "KEYWORDS"}
+
+
+def summarize_features(features: Dict[str, Any]) -> str:
+    """Compact plain-text summary of one user's features for the persona prompt"""
+    activity = ", ".join(f"r/{name} ({count})" for name, count in features['subreddit_activity'].items())
+    return "\n".join([
+        f"SUBREDDIT ACTIVITY: {activity or 'unknown'}",
+        f"MOST ACTIVE HOURS: {_active_hours(features['hour_histogram'])}",
+        f"{_KEYWORD_LABELS[features.get('keyword_ranking')]}: {', '.join(features['keywords']) or 'none'}",
+        f"VOCABULARY: {features['total_words']} words, type/token ratio {features['type_token_ratio']}, "
+        f"richness {features['vocabulary_richness']}",
+        f"AVERAGE COMMENT LENGTH: {features['avg_comment_words']} words",
+    ])
+
+
+def main():
+    if len(sys.argv) != 3:
+        print("Usage: python text_features.py SCRAPE_SOURCE reference.json")
+        print("Builds the keyword reference corpus from a directory of *_scraped_data.json files,")
+        print("a JSON file or a JSONL stream")
+        return 1
+    from persona_batch import iter_scrape_outputs  # persona_batch imports this module
+
+    reference = build_reference(iter_scrape_outputs(sys.argv[1]))
+    save_reference(reference, sys.argv[2])
+    print(f"Reference corpus of {reference['documents']} users, "
+          f"{len(reference['document_frequency'])} terms written to {sys.argv[2]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
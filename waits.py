@@ -0,0 +1,122 @@
+"""
+waits.py - Event-driven page waits for the Reddit Selenium scraper
+Polls the DOM for the condition that actually matters (element count, scroll height,
+network activity) instead of sleeping a fixed worst-case time.
+"""
+
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+class PageWaiter:
+    """Bounded polling waits that report how long each wait really took"""
+
+    def __init__(self, driver, timeout: float = 10.0, poll_interval: float = 0.25, verbose: bool = True,
+                 ready_states: tuple = ("complete",)):
+        self.driver = driver
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.verbose = verbose
+        # document.readyState values page_ready() accepts; eager sessions only need "interactive"
+        self.ready_states = ready_states
+        self.history: List[Dict[str, Any]] = []
+
+    def until(self, condition: Callable[[], Any], label: str, timeout: Optional[float] = None) -> bool:
+        """Poll condition until it is truthy or the timeout passes; returns whether it was met"""
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        satisfied = False
+
+        while True:
+            try:
+                if condition():
+                    satisfied = True
+                    break
+            except Exception:
+                # Transient script errors during navigation count as "not yet"
+                pass
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(self.poll_interval)
+
+        elapsed = time.monotonic() - start
+        self.history.append({'label': label, 'elapsed': elapsed, 'satisfied': satisfied})
+        if self.verbose:
+            status = "" if satisfied else f" (gave up after {timeout:.1f}s)"
+            print(f"Waited {elapsed:.2f}s for {label}{status}")
+        return satisfied
+
+    def until_stable(self, probe: Callable[[], Any], label: str, settle: float = 0.5,
+                     timeout: Optional[float] = None) -> bool:
+        """Wait until probe() returns the same value for `settle` seconds"""
+        state = {'value': None, 'since': None}
+
+        def is_stable():
+            value = probe()
+            now = time.monotonic()
+            if state['since'] is None or value != state['value']:
+                state['value'] = value
+                state['since'] = now
+                return False
+            return now - state['since'] >= settle
+
+        return self.until(is_stable, label, timeout)
+
+    # -- DOM probes --------------------------------------------------------
+
+    def scroll_height(self) -> int:
+        return self.driver.execute_script("return document.body.scrollHeight")
+
+    def element_count(self, selector: str) -> int:
+        return self.driver.execute_script(
+            "return document.querySelectorAll(arguments[0]).length", selector
+        )
+
+    def resource_count(self) -> int:
+        return self.driver.execute_script(
+            "return window.performance.getEntriesByType('resource').length"
+        )
+
+    # -- Common waits ------------------------------------------------------
+
+    def page_ready(self, timeout: Optional[float] = None) -> bool:
+        """Wait for document.readyState to reach one of ready_states ('complete' by default)"""
+        return self.until(
+            lambda: self.driver.execute_script("return document.readyState") in self.ready_states,
+            "page ready", timeout
+        )
+
+    def element_count_increase(self, selector: str, previous_count: int,
+                               timeout: Optional[float] = None) -> bool:
+        """Wait until more than previous_count elements match selector"""
+        return self.until(
+            lambda: self.element_count(selector) > previous_count,
+            f"more than {previous_count} '{selector}' elements", timeout
+        )
+
+    def stable_scroll_height(self, settle: float = 0.5, timeout: Optional[float] = None) -> bool:
+        """Wait until document.body.scrollHeight stops changing"""
+        return self.until_stable(self.scroll_height, "stable scroll height", settle, timeout)
+
+    def network_idle(self, idle_time: float = 0.5, timeout: Optional[float] = None) -> bool:
+        """Wait until no new resource entries are recorded for idle_time seconds"""
+        return self.until_stable(self.resource_count, "network idle", idle_time, timeout)
+
+    def new_content(self, previous_height: int, selector: Optional[str] = None,
+                    previous_count: int = 0, timeout: Optional[float] = None) -> bool:
+        """Wait until the page grows or more items matching selector appear"""
+        def grew():
+            if self.scroll_height() > previous_height:
+                return True
+            return bool(selector) and self.element_count(selector) > previous_count
+
+        return self.until(grew, "new content", timeout)
+
+    def reset(self):
+        """Forget recorded waits, e.g. before starting the next profile"""
+        self.history.clear()
+
+    def total_wait_time(self) -> float:
+        """Sum of all recorded wait durations"""
+        return sum(entry['elapsed'] for entry in self.history)